@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# --- 페이지별 콜드 스타트 벤치마크 ---
+# 페이지마다 새 파이썬 프로세스를 띄워 (컨테이너가 새로 뜬 직후와 같은 상태)
+# 스크립트 임포트 + 첫 렌더링 시간과 두 번째 rerun 시간을 재고, 그 사이에 새로 임포트된
+# 무거운 모듈을 기록합니다. 결과를 cold_start_budget.json의 예산과 비교해 넘으면 실패합니다.
+#
+#   python benchmarks/cold_start.py             # 예산과 비교 (초과 시 종료 코드 1)
+#   python benchmarks/cold_start.py --record    # 현재 측정값 * 여유 배수로 예산 갱신
+#
+# streamlit 자체와 AppTest 임포트 시간은 모든 페이지에 공통이므로 따로 기록하고 예산에서는 제외합니다.
+# OCR 백엔드는 네트워크/인증 정보 없이 측정하도록 local 구현을 사용하고, 예측 기록은 빈 상태로 측정합니다.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(ROOT, "benchmarks", "cold_start_budget.json")
+
+PAGES = ["app.py", "pages/page_1.py", "pages/page_2.py", "pages/page_3.py"]
+
+# 첫 렌더링에서 임포트되면 시작 시간을 크게 늘리는 모듈
+HEAVY_MODULES = ["pandas", "pyarrow", "sklearn", "joblib", "scipy", "google.cloud.vision", "grpc"]
+
+# --record 시 측정값(중앙값)에 곱하는 여유 배수와 최소 예산
+BUDGET_HEADROOM = 1.5
+BUDGET_FLOOR_MS = 50
+
+
+# --- 측정 (자식 프로세스) ---
+def measure_page(page):
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    os.environ["CAREBITE_OCR_BACKEND"] = "local"
+    # 예측 기록은 빈 임시 데이터베이스로 측정 (실제 기록을 건드리지 않음)
+    os.environ["CAREBITE_HISTORY_DB"] = os.path.join(tempfile.mkdtemp(prefix="carebite-bench-"), "history.sqlite3")
+
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_import_ms = (time.perf_counter() - started) * 1000
+
+    modules_before = set(sys.modules)
+    started = time.perf_counter()
+    # 실제 배포와 같이 app.py를 메인 스크립트로 두고 해당 페이지로 바로 접속한 경우를 측정
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    if page != "app.py":
+        at.switch_page(page)
+        # 다른 페이지는 랜딩 페이지가 session_state에 넣어 둔 OCR 백엔드를 사용
+        from carebite.ocr_backends import create_ocr_backend
+
+        at.session_state["ocr_backend"] = create_ocr_backend("local")
+    at.run()
+    first_render_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    at.run()
+    rerun_ms = (time.perf_counter() - started) * 1000
+
+    new_modules = set(sys.modules) - modules_before
+    heavy_imported = [
+        name for name in HEAVY_MODULES
+        if any(m == name or m.startswith(name + ".") for m in new_modules)
+    ]
+    return {
+        "page": page,
+        "streamlit_import_ms": streamlit_import_ms,
+        "first_render_ms": first_render_ms,
+        "rerun_ms": rerun_ms,
+        "modules_imported": len(new_modules),
+        "heavy_imported": heavy_imported,
+        "exceptions": [e.message for e in at.exception],
+    }
+
+
+def run_child(page):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", page],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+# --- 집계 및 예산 비교 ---
+def summarize(page, runs):
+    return {
+        "page": page,
+        "streamlit_import_ms": statistics.median(r["streamlit_import_ms"] for r in runs),
+        "first_render_ms": statistics.median(r["first_render_ms"] for r in runs),
+        "rerun_ms": statistics.median(r["rerun_ms"] for r in runs),
+        "modules_imported": max(r["modules_imported"] for r in runs),
+        "heavy_imported": sorted({name for r in runs for name in r["heavy_imported"]}),
+        "exceptions": sorted({e for r in runs for e in r["exceptions"]}),
+    }
+
+
+def load_budget(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("pages", {})
+
+
+def check_budget(summary, budget):
+    problems = []
+    page_budget = budget.get(summary["page"])
+    if page_budget is None:
+        return [f"{summary['page']}: 예산이 기록되어 있지 않습니다 (--record로 기록)"]
+    if summary["first_render_ms"] > page_budget["first_render_ms"]:
+        problems.append(
+            f"{summary['page']}: 첫 렌더링 {summary['first_render_ms']:.0f}ms > 예산 {page_budget['first_render_ms']}ms"
+        )
+    for name in summary["heavy_imported"]:
+        if name in page_budget.get("forbidden_modules", []):
+            problems.append(f"{summary['page']}: 첫 렌더링에서 '{name}'을(를) 임포트했습니다")
+    for message in summary["exceptions"]:
+        problems.append(f"{summary['page']}: 스크립트 예외 - {message}")
+    return problems
+
+
+def record_budget(path, summaries):
+    import streamlit
+
+    # 측정하지 않은 페이지의 예산은 그대로 둠 (--pages로 일부만 다시 기록할 때)
+    pages = load_budget(path)
+    for summary in summaries:
+        budget_ms = max(BUDGET_FLOOR_MS, summary["first_render_ms"] * BUDGET_HEADROOM)
+        pages[summary["page"]] = {
+            "first_render_ms": int(-(-budget_ms // 10) * 10),
+            "forbidden_modules": [name for name in HEAVY_MODULES if name not in summary["heavy_imported"]],
+            "measured_first_render_ms": round(summary["first_render_ms"], 1),
+            "measured_rerun_ms": round(summary["rerun_ms"], 1),
+        }
+    data = {
+        "recorded_with": {
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "headroom": BUDGET_HEADROOM,
+        },
+        "pages": pages,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="페이지별 콜드 스타트(임포트 + 첫 렌더링) 시간 측정")
+    parser.add_argument("--repeat", type=int, default=3, help="페이지당 측정 횟수 (중앙값 사용)")
+    parser.add_argument("--pages", nargs="*", default=PAGES, help="측정할 페이지 스크립트")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="예산 파일 경로")
+    parser.add_argument("--record", action="store_true", help="측정값으로 예산 파일을 갱신")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure_page(args.child), ensure_ascii=False))
+        return 0
+
+    summaries = []
+    for page in args.pages:
+        summary = summarize(page, [run_child(page) for _ in range(max(1, args.repeat))])
+        summaries.append(summary)
+        heavy = ", ".join(summary["heavy_imported"]) or "-"
+        print(
+            f"{page:<18} 첫 렌더링 {summary['first_render_ms']:7.0f}ms  rerun {summary['rerun_ms']:6.0f}ms  "
+            f"모듈 {summary['modules_imported']:4d}개  무거운 모듈: {heavy}"
+        )
+    print(f"(streamlit + AppTest 임포트 {statistics.median(s['streamlit_import_ms'] for s in summaries):.0f}ms, 예산에서 제외)")
+
+    if args.record:
+        record_budget(args.budget, summaries)
+        print(f"예산을 기록했습니다: {args.budget}")
+        return 0
+
+    budget = load_budget(args.budget)
+    problems = [problem for summary in summaries for problem in check_budget(summary, budget)]
+    for problem in problems:
+        print(f"예산 초과: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
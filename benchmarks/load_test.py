@@ -0,0 +1,448 @@
+import argparse
+import hashlib
+import io
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+
+# --- 동시 세션 부하 테스트 ---
+# 한 프로세스(= Streamlit 서버 하나)에서 N개의 가상 사용자 세션을 동시에 실행합니다.
+# 세션마다 실제 app.py(랜딩 페이지)를 연 뒤 pages/page_1.py로 이동해 검진 결과 이미지를 업로드하고,
+# 분석이 끝날 때까지의 시간과 같은 화면을 다시 그리는 rerun 시간을 잽니다.
+# OCR은 지연 시간을 설정할 수 있는 가짜 Vision 클라이언트(또는 local 백엔드)가 처리하므로
+# 네트워크/인증 정보 없이 디스패처, OCR 캐시, 예측 기록까지 실제 경로를 그대로 거칩니다.
+#
+#   python benchmarks/load_test.py --sessions 20 --ocr-latency 0.8
+#   python benchmarks/load_test.py --sessions 8 --mode batch --batch-size 5 --iterations 3
+#   python benchmarks/load_test.py --backend local          # CAREBITE_LOCAL_OCR_LATENCY_SECONDS 사용
+#   python benchmarks/load_test.py --max-p99-ms 3000 --json result.json   # p99 초과 시 종료 코드 1
+#
+# 결과: 처리량(분석/초), 단계별 p50/p99 지연 시간, 프로세스 메모리(RSS, 최대 RSS), OCR 호출 수, 오류.
+# 예측 기록은 임시 데이터베이스를 사용하므로 실제 기록을 건드리지 않습니다.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 세션 하나의 단계: 랜딩 페이지 -> 분석 페이지 이동 -> 업로드 후 분석 -> 같은 화면 rerun
+PHASES = ["landing", "open_page", "analyze", "rerun"]
+PHASE_LABELS = {
+    "landing": "랜딩 페이지",
+    "open_page": "분석 페이지 이동",
+    "analyze": "업로드 → 분석 완료",
+    "rerun": "결과 화면 rerun",
+}
+
+# 업로드한 파일을 세션별로 넘겨주는 session_state 키 (AppTest는 파일 업로드 위젯을 지원하지 않음)
+UPLOAD_STATE_KEY = "_load_test_uploads"
+
+
+# --- 픽스처 ---
+def make_fixture_images(count, width=1240, height=1754, seed=0):
+    # 서로 다른 검진 결과지 이미지 count장 (A4 150dpi 크기의 PNG). 내용이 달라야 캐시/병합 없이 OCR을 호출
+    from PIL import Image, ImageDraw
+
+    # 여백은 기본 크기에서 80px, 작은 이미지에서는 크기에 맞춰 줄임 (줄 길이 범위가 비지 않도록)
+    margin = min(80, width // 8, height // 8)
+    max_length = max(width // 4, width - 2 * margin)
+    images = []
+    for i in range(count):
+        rng = random.Random(seed * 100003 + i)
+        img = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(img)
+        for row in range(40):
+            y = margin + row * (height - 2 * margin) // 40
+            draw.rectangle((margin, y, margin + rng.randint(width // 4, max_length), y + 12), fill=rng.randint(0, 96))
+        output = io.BytesIO()
+        img.save(output, format="PNG")
+        images.append((f"checkup_{i:04d}.png", output.getvalue()))
+    return images
+
+
+def load_fixture_images(directory):
+    images = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith((".jpg", ".jpeg", ".png", ".gif", ".bmp")):
+            with open(os.path.join(directory, name), "rb") as f:
+                images.append((name, f.read()))
+    if not images:
+        raise SystemExit(f"픽스처 이미지가 없습니다: {directory}")
+    return images
+
+
+class FixtureUpload(io.BytesIO):
+    # st.file_uploader가 돌려주는 UploadedFile과 같은 속성을 가진 업로드 파일
+    def __init__(self, name, content):
+        super().__init__(content)
+        self.name = name
+        self.type = "image/png"
+        self.size = len(content)
+        self.file_id = hashlib.sha256(content).hexdigest()[:16]
+
+
+# --- 가짜 Vision 클라이언트 ---
+def fixture_ocr_text(image_content):
+    # 이미지 내용에 따라 수치가 조금씩 다른 검진 결과 텍스트 (같은 이미지는 항상 같은 텍스트)
+    from carebite.ocr_backends import SAMPLE_OCR_TEXT
+
+    rng = random.Random(hashlib.sha256(image_content).digest())
+    replacements = {
+        "45세": f"{rng.randint(25, 75)}세",
+        "72(kg)": f"{rng.randint(50, 100)}(kg)",
+        "공복혈당(mg/dL) 98": f"공복혈당(mg/dL) {rng.randint(75, 140)}",
+        "총콜레스테롤(mg/dL) 210": f"총콜레스테롤(mg/dL) {rng.randint(150, 280)}",
+        "중성지방(mg/dL) 150": f"중성지방(mg/dL) {rng.randint(60, 300)}",
+        "감마지티피 40": f"감마지티피 {rng.randint(10, 120)}",
+    }
+    text = SAMPLE_OCR_TEXT
+    for before, after in replacements.items():
+        text = text.replace(before, after)
+    return text
+
+
+def fixture_annotation(text):
+    # Vision 응답의 full_text_annotation 형태 (pages -> blocks -> paragraphs -> words, 단어마다 경계 상자/신뢰도)
+    from carebite.ocr_layout import words_from_text
+
+    def word(text, x0, y0, x1, y1, confidence):
+        return types.SimpleNamespace(
+            symbols=[types.SimpleNamespace(text=ch) for ch in text],
+            bounding_box=types.SimpleNamespace(vertices=[
+                types.SimpleNamespace(x=x, y=y) for x, y in ((x0, y0), (x1, y0), (x1, y1), (x0, y1))
+            ]),
+            confidence=confidence,
+        )
+
+    words = [word(*w) for w in words_from_text(text) or ()]
+    page = types.SimpleNamespace(height=0, blocks=[types.SimpleNamespace(paragraphs=[types.SimpleNamespace(words=words)])])
+    return types.SimpleNamespace(text=text, pages=[page])
+
+
+class FakeVisionClient:
+    # google.cloud.vision.ImageAnnotatorClient 대신 사용하는 클라이언트. 호출마다 latency(+지터)초 후 응답
+    def __init__(self, latency_seconds=0.5, jitter_seconds=0.0):
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.calls = 0
+        self.images = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, images):
+        with self._lock:
+            self.calls += 1
+            self.images += len(images)
+        delay = self.latency_seconds + (random.uniform(0, self.jitter_seconds) if self.jitter_seconds > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        return [
+            types.SimpleNamespace(
+                full_text_annotation=fixture_annotation(fixture_ocr_text(image.content)),
+                error=types.SimpleNamespace(message=""),
+            )
+            for image in images
+        ]
+
+    def document_text_detection(self, image=None, timeout=None, retry=None):
+        return self._respond([image])[0]
+
+    def batch_annotate_images(self, requests=None, timeout=None, retry=None):
+        return types.SimpleNamespace(responses=self._respond([request.image for request in requests]))
+
+
+# --- 여러 AppTest를 한 프로세스에서 동시에 실행하기 위한 준비 ---
+# 가상 사용자 세션 id (세션 스레드별, run_session에서 설정)
+_virtual_session = threading.local()
+
+
+def prepare_concurrent_apptest():
+    # AppTest.run()은 실행마다 전역 Runtime 싱글턴을 새 모의 객체로 바꾸고 끝나면 지우므로,
+    # 세션을 동시에 실행하면 다른 세션이 실행 중인 Runtime을 지워버립니다.
+    # 부하 테스트 동안에는 모든 세션이 모의 Runtime 하나를 함께 쓰도록 고정합니다. (실제 서버도 Runtime은 하나)
+    from unittest.mock import MagicMock
+
+    import streamlit as st
+    from streamlit import config as st_config
+    from streamlit.logger import set_log_level
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+    # 스크립트 바이트코드 캐시도 실제 서버처럼 하나를 공유 (AppTest는 실행마다 스크립트를 다시 컴파일하며,
+    # 여러 스레드에서 동시에 컴파일하면 파이썬 3.11의 AST 생성기가 실패할 수 있음)
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    # AppTest는 모든 실행에 같은 세션 id("test session id")를 쓰므로, 가상 사용자마다 자기 세션 id로 실행
+    # (세션 중간 결과 보관소 등 세션 id로 나누는 집계가 실제 서버처럼 세션별로 잡히도록)
+    runner_init = local_script_runner.LocalScriptRunner.__init__
+
+    def init_with_virtual_session(self, *args, **kwargs):
+        runner_init(self, *args, **kwargs)
+        self._session_id = getattr(_virtual_session, "id", self._session_id)
+
+    local_script_runner.LocalScriptRunner.__init__ = init_with_virtual_session
+    # 실행마다 바꿨다가 되돌리는 설정도 미리 고정 (되돌리는 시점이 세션마다 달라 서로 덮어쓰지 않도록)
+    st_config.set_option("global.appTest", True)
+    # 세션 스레드에서 session_state를 채울 때마다 나오는 ScriptRunContext 경고 등은 숨김
+    set_log_level("error")
+
+    # 업로드 위젯은 세션의 session_state에 넣어 둔 픽스처 파일을 돌려줌
+    def file_uploader(label, *args, accept_multiple_files=False, **kwargs):
+        uploads = [FixtureUpload(name, content) for name, content in st.session_state.get(UPLOAD_STATE_KEY, [])]
+        if accept_multiple_files:
+            return uploads
+        return uploads[0] if uploads else None
+
+    st.file_uploader = file_uploader
+
+
+def install_fake_vision(latency_seconds, jitter_seconds):
+    from carebite import ocr_backends
+
+    client = FakeVisionClient(latency_seconds, jitter_seconds)
+    ocr_backends._create_vision_client = lambda credentials_info=None: client
+    return client
+
+
+# --- 세션 ---
+def run_session(session_id, uploads, mode, iterations, backend, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    timings = {phase: [] for phase in PHASES}
+    errors = []
+    _virtual_session.id = f"vu-{session_id}"
+
+    def timed(phase, action):
+        started = time.perf_counter()
+        at = action()
+        timings[phase].append(time.perf_counter() - started)
+        errors.extend(f"{phase}: {e.message}" for e in at.exception)
+        errors.extend(f"{phase}: {e.value}" for e in at.error)
+        return at
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout)
+    if backend == "vision":
+        at.secrets["google_cloud"] = {"type": "service_account"}
+    timed("landing", at.run)
+    at.switch_page("pages/page_1.py")
+    timed("open_page", at.run)
+    if mode == "batch":
+        at = timed("open_page", lambda: at.radio[0].set_value("일괄 분석").run())
+
+    for iteration in range(iterations):
+        at.session_state[UPLOAD_STATE_KEY] = uploads[iteration]
+        timed("analyze", at.run)
+        timed("rerun", at.run)
+    # 프로세스에 하나뿐인 OCR 디스패처 (app.py가 session_state에 넣어 둔 것)
+    return {"session": session_id, "timings": timings, "errors": errors, "dispatcher": at.session_state["ocr_backend"]}
+
+
+def assign_uploads(images, sessions, iterations, batch_size, shared_ratio, seed):
+    # 세션 * 반복마다 업로드할 파일 목록. shared_ratio 비율만큼은 여러 세션이 같은 이미지를 올림 (병합/캐시 효과)
+    rng = random.Random(seed)
+    unique = iter(images)
+    shared = images[: max(1, len(images) // 10)]
+    plan = []
+    for _ in range(sessions):
+        session_uploads = []
+        for _ in range(iterations):
+            files = []
+            for _ in range(batch_size):
+                if rng.random() < shared_ratio:
+                    files.append(rng.choice(shared))
+                else:
+                    files.append(next(unique, None) or rng.choice(images))
+            session_uploads.append(files)
+        plan.append(session_uploads)
+    return plan
+
+
+# --- 집계 ---
+def percentile(values, q):
+    if not values:
+        return None
+    # nearest-rank 방식
+    values = sorted(values)
+    return values[max(0, min(len(values), math.ceil(q / 100.0 * len(values))) - 1)]
+
+
+def summarize(results, wall_seconds, analyses, rss_before, rss_after, peak_rss, vision_client, dispatcher_stats):
+    phases = {}
+    for phase in PHASES:
+        values = [v for r in results for v in r["timings"][phase]]
+        if values:
+            phases[phase] = {
+                "count": len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": max(values) * 1000,
+                "mean_ms": statistics.fmean(values) * 1000,
+            }
+    errors = [e for r in results for e in r["errors"]]
+    return {
+        "sessions": len(results),
+        "analyses": analyses,
+        "wall_seconds": wall_seconds,
+        "throughput_per_second": analyses / wall_seconds if wall_seconds > 0 else None,
+        "phases": phases,
+        "rss_before_bytes": rss_before,
+        "rss_after_bytes": rss_after,
+        "rss_peak_bytes": peak_rss,
+        # 워밍업 이후 늘어난 RSS를 세션 수로 나눈 값 (세션 상태 + 캐시된 결과)
+        "rss_per_session_bytes": (rss_after - rss_before) / len(results) if results else None,
+        "vision_calls": vision_client.calls if vision_client else None,
+        "vision_images": vision_client.images if vision_client else None,
+        "dispatcher": dispatcher_stats,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:10],
+    }
+
+
+def print_summary(summary):
+    mb = 1024 * 1024
+    print(
+        f"세션 {summary['sessions']}개, 분석 {summary['analyses']}건, {summary['wall_seconds']:.2f}초 "
+        f"→ 처리량 {summary['throughput_per_second']:.2f}건/초"
+    )
+    for phase, stats in summary["phases"].items():
+        print(
+            f"  {PHASE_LABELS[phase]:<16} {stats['count']:5d}회  p50 {stats['p50_ms']:8.0f}ms  "
+            f"p99 {stats['p99_ms']:8.0f}ms  최대 {stats['max_ms']:8.0f}ms"
+        )
+    print(
+        f"  메모리: RSS {summary['rss_before_bytes'] / mb:.0f}MB → {summary['rss_after_bytes'] / mb:.0f}MB "
+        f"(최대 {summary['rss_peak_bytes'] / mb:.0f}MB, 세션당 약 {summary['rss_per_session_bytes'] / mb:.1f}MB)"
+    )
+    if summary.get("artifacts"):
+        artifacts = summary["artifacts"]
+        print(
+            f"  세션 중간 결과: {artifacts['total_bytes'] / mb:.1f}MB, 항목 {artifacts['entries']}개, "
+            f"세션 {artifacts['sessions']}개, 해제 {artifacts['evicted'] + artifacts['expired']}건"
+        )
+        if artifacts["largest_sessions"]:
+            largest = artifacts["largest_sessions"][0]
+            print(f"  세션별 중간 결과 최대: {largest['bytes'] / mb:.2f}MB ({largest['session']})")
+    if summary["vision_calls"] is not None:
+        print(f"  Vision 호출 {summary['vision_calls']}회 (이미지 {summary['vision_images']}장)")
+    if summary["dispatcher"]:
+        print(f"  OCR 디스패처: {json.dumps(summary['dispatcher'], ensure_ascii=False)}")
+    if summary["errors"]:
+        print(f"  오류 {summary['errors']}건:", file=sys.stderr)
+        for message in summary["error_samples"]:
+            print(f"    {message[:200]}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="여러 사용자 세션을 동시에 실행해 분석 페이지의 처리량/지연 시간/메모리 측정")
+    parser.add_argument("--sessions", type=int, default=10, help="동시 세션 수")
+    parser.add_argument("--iterations", type=int, default=1, help="세션당 업로드 횟수")
+    parser.add_argument("--mode", choices=["single", "batch"], default="single", help="분석 모드")
+    parser.add_argument("--batch-size", type=int, default=4, help="일괄 분석 시 한 번에 올리는 이미지 수")
+    parser.add_argument("--shared-ratio", type=float, default=0.0, help="여러 세션이 같은 이미지를 올리는 비율 (0~1)")
+    parser.add_argument("--fixtures", help="업로드할 이미지 디렉터리 (없으면 합성 이미지 생성)")
+    parser.add_argument("--backend", choices=["vision", "local"], default="vision",
+                        help="vision: 가짜 Vision 클라이언트, local: 로컬 대체 구현")
+    parser.add_argument("--ocr-latency", type=float, default=0.5, help="가짜 Vision 호출 지연 (초)")
+    parser.add_argument("--ocr-jitter", type=float, default=0.2, help="가짜 Vision 호출 지연 지터 (초)")
+    parser.add_argument("--timeout", type=float, default=300, help="rerun 한 번의 제한 시간 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--max-p99-ms", type=float, help="업로드 → 분석 완료 p99가 이 값을 넘으면 실패")
+    parser.add_argument("--max-rerun-p99-ms", type=float, help="결과 화면 rerun p99가 이 값을 넘으면 실패")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    os.environ["CAREBITE_OCR_BACKEND"] = args.backend
+    os.environ["CAREBITE_HISTORY_DB"] = os.path.join(tempfile.mkdtemp(prefix="carebite-load-"), "history.sqlite3")
+
+    batch_size = args.batch_size if args.mode == "batch" else 1
+    if args.fixtures:
+        images = load_fixture_images(args.fixtures)
+    else:
+        images = make_fixture_images(args.sessions * args.iterations * batch_size, seed=args.seed)
+    plan = assign_uploads(images, args.sessions, args.iterations, batch_size, args.shared_ratio, args.seed)
+
+    prepare_concurrent_apptest()
+    vision_client = install_fake_vision(args.ocr_latency, args.ocr_jitter) if args.backend == "vision" else None
+
+    # 세션 하나를 먼저 실행해 임포트, 스크립트 컴파일, 모델 로드를 끝낸 뒤 측정 (콜드 스타트는 cold_start.py에서 측정)
+    warmup_uploads = [make_fixture_images(batch_size, seed=args.seed + 1000003)]
+    run_session(-1, warmup_uploads, args.mode, 1, args.backend, args.timeout)
+    from carebite.memory import ARTIFACTS, process_memory
+
+    rss_before, _ = process_memory()
+    if vision_client is not None:
+        vision_client.calls = vision_client.images = 0
+    results = [None] * args.sessions
+    start_barrier = threading.Barrier(args.sessions + 1)
+
+    def worker(session_id):
+        start_barrier.wait()
+        try:
+            results[session_id] = run_session(
+                session_id, plan[session_id], args.mode, args.iterations, args.backend, args.timeout
+            )
+        except Exception as e:
+            results[session_id] = {
+                "session": session_id, "timings": {phase: [] for phase in PHASES}, "errors": [f"세션 실패: {e!r}"],
+            }
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"load-session-{i}") for i in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - started
+    rss_after, peak_rss = process_memory()
+
+    dispatcher = next((r["dispatcher"] for r in results if r.get("dispatcher") is not None), None)
+    analyses = sum(len(r["timings"]["analyze"]) for r in results) * batch_size
+    summary = summarize(
+        results, wall_seconds, analyses, rss_before, rss_after, peak_rss,
+        vision_client, dispatcher.stats() if hasattr(dispatcher, "stats") else None,
+    )
+    from carebite.metrics import REGISTRY
+
+    summary["stages"] = REGISTRY.snapshot()
+    # 세션 중간 결과 보관소 (세션별 미리보기 등)
+    summary["artifacts"] = ARTIFACTS.stats()
+    summary["config"] = vars(args)
+    print_summary(summary)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    problems = []
+    analyze = summary["phases"].get("analyze")
+    rerun = summary["phases"].get("rerun")
+    if args.max_p99_ms is not None and analyze and analyze["p99_ms"] > args.max_p99_ms:
+        problems.append(f"업로드 → 분석 완료 p99 {analyze['p99_ms']:.0f}ms > {args.max_p99_ms:.0f}ms")
+    if args.max_rerun_p99_ms is not None and rerun and rerun["p99_ms"] > args.max_rerun_p99_ms:
+        problems.append(f"결과 화면 rerun p99 {rerun['p99_ms']:.0f}ms > {args.max_rerun_p99_ms:.0f}ms")
+    if summary["errors"]:
+        problems.append(f"오류 {summary['errors']}건")
+    for problem in problems:
+        print(f"실패: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
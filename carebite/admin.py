@@ -0,0 +1,107 @@
+import functools
+
+import streamlit as st
+
+from carebite import config
+from carebite.memory import current_session_id, memory_report
+from carebite.metrics import REGISTRY
+from carebite.profiling import active_profile, format_peak, start_rerun_profile
+
+# --- 관리자 사이드바 ---
+# URL에 ?admin=<CAREBITE_ADMIN_TOKEN>을 붙여 접속한 경우에만 운영 지표를 표시합니다.
+
+# 모든 세션이 같은 객체를 가리키는 session_state 키 (세션별 메모리 사용량에서 제외)
+SHARED_SESSION_KEYS = ("ocr_backend",)
+
+
+def is_admin():
+    return bool(config.ADMIN_TOKEN) and st.query_params.get("admin") == config.ADMIN_TOKEN
+
+
+def render_admin_sidebar(extra_sections=None):
+    # extra_sections: {제목: 통계 dict} 형태로 페이지별 추가 지표를 함께 표시
+    if not is_admin():
+        return
+
+    with st.sidebar:
+        st.header("관리자: 파이프라인 지표")
+
+        rows = REGISTRY.snapshot()
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        else:
+            st.caption("아직 기록된 지표가 없습니다.")
+
+        for title, stats in (extra_sections or {}).items():
+            st.subheader(title)
+            st.json(stats)
+
+        # 프로세스 RSS, 세션 중간 결과 보관소, 캐시 메모리, 이 세션의 session_state 키별 크기 (바이트)
+        st.subheader("메모리")
+        session_state = {key: value for key, value in st.session_state.items() if key not in SHARED_SESSION_KEYS}
+        st.json(memory_report(current_session_id(), session_state))
+
+        st.download_button(
+            "Prometheus 형식으로 내보내기",
+            REGISTRY.to_prometheus(),
+            file_name="carebite_metrics.prom",
+            mime="text/plain",
+        )
+
+
+# --- rerun 프로파일링 ---
+# CAREBITE_PROFILE=1이면 모든 세션, 관리자는 ?admin=<토큰>&profile=1로 자기 세션의 rerun만 프로파일링합니다.
+# 파일은 항상 CAREBITE_PROFILE_DIR에 남기고, 시간/할당 상위 항목 요약은 관리자 사이드바에만 표시합니다.
+def profiling_requested():
+    return config.PROFILE_ENABLED or (is_admin() and st.query_params.get("profile") == "1")
+
+
+def start_page_profile(page_name):
+    # 페이지 스크립트 맨 앞에서 호출하고, 받은 값을 맨 끝에서 finish_page_profile에 넘김
+    if not profiling_requested():
+        return None
+    return start_rerun_profile(page_name, current_session_id())
+
+
+def finish_page_profile(profile):
+    if profile is None:
+        return
+    summary = profile.finish()
+    if summary is None or not is_admin():
+        return
+
+    with st.sidebar:
+        st.header(f"프로파일: {summary['name']}")
+        st.caption(
+            f"이번 rerun {summary['wall_ms']:.1f}ms (CPU {summary['cpu_ms']:.1f}ms), "
+            f"추적 메모리 순증가 {summary['traced_growth_bytes'] / 1024 / 1024:.1f}MB, {format_peak(summary)}"
+        )
+        if summary["path"]:
+            st.caption(f"프로파일 파일: {summary['path']}")
+        else:
+            st.warning(f"프로파일 파일을 쓰지 못했습니다: {summary.get('write_error')}")
+        st.subheader("시간 상위 함수")
+        st.dataframe(summary["hotspots"], hide_index=True)
+        st.subheader("메모리 할당 상위 위치")
+        if summary["allocations"]:
+            st.dataframe(summary["allocations"], hide_index=True)
+        else:
+            st.caption("이번 rerun에서 늘어난 할당이 없습니다.")
+
+
+def profile_fragment(name):
+    # st.fragment 함수가 따로 다시 실행될 때(텍스트 수정 등)도 프로파일링 (파일만 남김)
+    # 전체 rerun 중에 호출되면 페이지 프로파일에 포함되므로 따로 재지 않음
+    # 사용: @st.fragment 아래에 @profile_fragment("page_1.analyze_ocr_text")
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if active_profile() is not None or not profiling_requested():
+                return func(*args, **kwargs)
+            profile = start_rerun_profile(name, current_session_id())
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.finish()
+        return wrapper
+    return decorator
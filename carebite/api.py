@@ -0,0 +1,245 @@
+import argparse
+import asyncio
+import hmac
+import json
+import math
+import sys
+
+import numpy as np
+import tornado.web
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+from tornado.process import fork_processes
+
+from carebite import config
+from carebite import pipeline
+from carebite.metrics import REGISTRY as metrics
+from carebite.model_reload import shared_reloader
+from carebite.ocr_parser import parse_health_data
+from carebite.risk_levels import RISK_LEVELS
+
+# --- JSON 점수화 API (Streamlit 옆에서 따로 실행) ---
+# 검진 수치를 이미 가진 시스템(EMR 연동 등)이 Streamlit 화면(rerun, 위젯 비교, 웹소켓)을 거치지 않고
+# 페이지와 같은 파이프라인(파싱 -> 피처 엔지니어링 -> 예측 -> 위험 등급)으로 여러 레코드를 한 번에 점수화합니다.
+# 예측 모델은 페이지와 같이 carebite.model_reload로 읽으므로 model/ 파일이 바뀌면 재시작 없이 교체됩니다.
+#
+#   python -m carebite.api --port 8502
+#   python -m carebite.api --port 8502 --processes 4     # 프로세스 여러 개가 같은 포트를 나눠 받음 (Linux/macOS)
+#
+#   POST /v1/score   {"records": [{"id": "a1", "나이": 45, "성별": "남성", ...}, {"id": "a2", "text": "OCR 텍스트"}]}
+#                    {"columns": {"나이": [45, 61], "성별": ["남성", "여성"], ...}}   # 열 형식 (대량 전송용)
+#   GET  /healthz    모델 로드 여부와 버전 (모델이 없으면 503)
+#   GET  /metrics    단계별 지표 (Prometheus 텍스트 형식, 프로세스별)
+#
+# 레코드에 "text"(OCR 텍스트, 선택 "words" 단어 배치)가 있으면 파싱한 값에 레코드의 다른 항목을 덮어써 사용합니다.
+# CAREBITE_API_TOKEN을 설정하면 /v1/score는 'Authorization: Bearer <토큰>' 헤더가 있어야 합니다.
+
+# 레코드에서 검진 항목이 아닌 키
+RECORD_META_KEYS = ("id", "text", "words")
+
+
+class ScoreRequestError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# --- 점수화 (Tornado에 의존하지 않음) ---
+def score_payload(payload, engine, max_records=None):
+    # 반환값: 응답 JSON 객체 {"model_version", "risk_thresholds", "results": [{"probability", "risk_level"}, ...]}
+    max_records = config.API_MAX_RECORDS if max_records is None else max_records
+    if not isinstance(payload, dict):
+        raise ScoreRequestError("요청 본문은 JSON 객체여야 합니다.")
+    if "columns" in payload:
+        results = _score_columns(payload["columns"], engine, max_records)
+    elif "records" in payload:
+        results = _score_records(payload["records"], engine, max_records)
+    else:
+        raise ScoreRequestError("요청 본문에 'records' 또는 'columns'가 있어야 합니다.")
+    return {
+        "model_version": engine.version,
+        "risk_thresholds": list(pipeline.risk_thresholds(engine)),
+        "results": results,
+    }
+
+
+def _check_size(n_records, max_records):
+    if max_records and n_records > max_records:
+        raise ScoreRequestError(f"한 요청의 레코드 수는 {max_records:,}건 이하여야 합니다: {n_records:,}건", status=413)
+
+
+def _score_records(records, engine, max_records):
+    if not isinstance(records, list):
+        raise ScoreRequestError("'records'는 레코드(JSON 객체) 목록이어야 합니다.")
+    _check_size(len(records), max_records)
+
+    results = [None] * len(records)
+    raw_records = []
+    scored_indexes = []
+    text_records = [i for i, record in enumerate(records) if isinstance(record, dict) and record.get("text") is not None]
+    parsed = {}
+    if text_records:
+        with metrics.timed("parse", size=len(text_records)):
+            for i in text_records:
+                try:
+                    parsed[i], _ = parse_health_data(str(records[i]["text"]), records[i].get("words") or None)
+                except Exception as e:
+                    results[i] = {"error": f"텍스트 파싱 실패: {e}"}
+
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            results[i] = {"error": "레코드는 JSON 객체여야 합니다."}
+            continue
+        if results[i] is not None:
+            continue
+        raw_data = {key: value for key, value in record.items() if key not in RECORD_META_KEYS}
+        # 목록/객체 값은 피처 변환에서 실패하므로 그 레코드만 오류로 돌려줌 (열 형식과 같은 규칙)
+        invalid_keys = [key for key, value in raw_data.items() if isinstance(value, (list, dict))]
+        if invalid_keys:
+            results[i] = {"error": f"항목 값은 숫자, 문자열 또는 null이어야 합니다: {', '.join(invalid_keys)}"}
+            continue
+        if i in parsed:
+            raw_data = {**parsed[i], **raw_data}
+        raw_records.append(raw_data)
+        scored_indexes.append(i)
+
+    with metrics.timed("features", size=len(raw_records)):
+        model_input = pipeline.build_model_input(raw_records)
+    for i, result in zip(scored_indexes, _score_model_input(model_input, engine)):
+        if i in parsed:
+            result["parsed"] = parsed[i]
+        results[i] = result
+    for i, record in enumerate(records):
+        if isinstance(record, dict) and "id" in record:
+            results[i] = {"id": record["id"], **results[i]}
+    return results
+
+
+def _score_columns(columns, engine, max_records):
+    if not isinstance(columns, dict) or not all(isinstance(values, list) for values in columns.values()):
+        raise ScoreRequestError("'columns'는 {항목: 값 목록} 형태의 JSON 객체여야 합니다.")
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ScoreRequestError(f"'columns'의 값 목록 길이가 서로 다릅니다: {sorted(lengths)}")
+    n_rows = lengths.pop() if lengths else 0
+    _check_size(n_rows, max_records)
+    if any(isinstance(value, (list, dict)) for values in columns.values() for value in values):
+        raise ScoreRequestError("'columns'의 값은 숫자, 문자열 또는 null이어야 합니다.")
+
+    with metrics.timed("features", size=n_rows):
+        model_input = pipeline.build_model_input_columns(
+            {name: _column_array(values) for name, values in columns.items()}, n_rows
+        )
+    return _score_model_input(model_input, engine)
+
+
+def _column_array(values):
+    # 숫자만 있는 열은 숫자 배열(벡터 연산), 그 밖에는 값을 그대로 둔 object 배열 (레코드 형식과 같은 결과)
+    array = np.asarray(values)
+    return array if array.dtype.kind in "iuf" else np.asarray(values, dtype=object)
+
+
+def _score_model_input(model_input, engine):
+    if not len(model_input):
+        return []
+    with metrics.timed("predict", size=len(model_input)):
+        probabilities = engine.predict_proba(model_input)
+    level_codes = pipeline.classify_risk_levels(probabilities, pipeline.risk_thresholds(engine))
+    return [
+        {"probability": probability if math.isfinite(probability) else None, "risk_level": RISK_LEVELS[code]}
+        for probability, code in zip(probabilities.tolist(), level_codes.tolist())
+    ]
+
+
+# --- HTTP 핸들러 ---
+class JsonHandler(tornado.web.RequestHandler):
+    def write_json(self, payload, status=200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+
+    def write_error(self, status_code, **kwargs):
+        self.write_json({"error": self._reason}, status_code)
+
+
+class ScoreHandler(JsonHandler):
+    def prepare(self):
+        if config.API_TOKEN:
+            authorization = self.request.headers.get("Authorization", "")
+            if not hmac.compare_digest(authorization.encode("utf-8"), f"Bearer {config.API_TOKEN}".encode("utf-8")):
+                self.write_json({"error": "인증 토큰이 올바르지 않습니다."}, 401)
+
+    def post(self):
+        # 요청 하나는 처음 받은 엔진으로 끝까지 점수화 (모델 교체 중에도 한 버전의 결과만 반환)
+        reloader = shared_reloader()
+        engine = reloader.current()
+        if engine is None:
+            self.write_json({"error": f"예측 모델을 로드하지 못했습니다: {reloader.last_error}"}, 503)
+            return
+        try:
+            payload = json.loads(self.request.body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            self.write_json({"error": f"JSON 형식이 아닙니다: {e}"}, 400)
+            return
+        try:
+            with metrics.timed("api_score") as timing:
+                response = score_payload(payload, engine)
+                timing.size = len(response["results"])
+        except ScoreRequestError as e:
+            self.write_json({"error": str(e)}, e.status)
+            return
+        self.write_json(response)
+
+
+class HealthHandler(JsonHandler):
+    def get(self):
+        reloader = shared_reloader()
+        engine = reloader.current()
+        if engine is None:
+            self.write_json({"status": "unavailable", "error": reloader.last_error}, 503)
+            return
+        self.write_json({"status": "ok", "model_version": engine.version})
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.finish(metrics.to_prometheus())
+
+
+def make_app():
+    return tornado.web.Application([
+        (r"/v1/score", ScoreHandler),
+        (r"/healthz", HealthHandler),
+        (r"/metrics", MetricsHandler),
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON 고혈압 위험도 점수화 API 서버")
+    parser.add_argument("--port", type=int, default=config.API_PORT, help="포트")
+    parser.add_argument("--address", default=config.API_ADDRESS, help="바인드 주소")
+    parser.add_argument("--processes", type=int, default=1, help="서버 프로세스 수 (0이면 CPU 수)")
+    args = parser.parse_args(argv)
+
+    sockets = bind_sockets(args.port, args.address)
+    if args.processes != 1:
+        fork_processes(args.processes)
+
+    async def serve():
+        # 모델 로드와 model/ 확인 스레드는 프로세스마다 (fork 이후에) 시작
+        engine = shared_reloader().current()
+        server = HTTPServer(make_app(), max_body_size=config.API_MAX_BODY_BYTES)
+        server.add_sockets(sockets)
+        print(
+            f"carebite.api: http://{args.address or '0.0.0.0'}:{args.port} "
+            f"(모델 {engine.version if engine is not None else '없음'})",
+            file=sys.stderr,
+        )
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from carebite import config
+from carebite import pipeline
+from carebite.ocr_parser import FIELD_ORDER, parse_health_data
+from carebite.risk_levels import classify_risk_level
+
+# --- 헤드리스 일괄 예측 CLI ---
+# 이미지 디렉터리 또는 OCR 텍스트 JSONL 파일을 입력받아 페이지와 같은 파이프라인
+# (파싱 -> 피처 엔지니어링 -> 예측)을 프로세스 풀에서 실행하고,
+# 결과를 청크 단위로 CSV 또는 Parquet 파일에 씁니다.
+#
+#   python -m carebite.batch_cli scans/ -o results.parquet
+#   python -m carebite.batch_cli ocr_texts.jsonl -o results.csv --workers 8
+#
+# JSONL 각 줄 형식: {"id": "...", "text": "OCR 텍스트", "words": [...]} (id, words(단어 배치)는 생략 가능)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".bmp")
+
+# 출력 컬럼 (문자열 컬럼 외에는 모두 float64)
+OUTPUT_COLUMNS = ["id", "상태", "예측 확률", "위험 등급", "모델 버전"] + FIELD_ORDER
+TEXT_COLUMNS = {"id", "상태", "위험 등급", "모델 버전", "성별", "요단백", "흡연 상태", "음주 여부"}
+
+# 작업 프로세스별 상태 (프로세스 풀 initializer에서 설정)
+_worker_engine = None
+_worker_ocr_backend = None
+_worker_ocr_cache = None
+
+
+# --- 입력 읽기 ---
+def iter_image_records(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                path = os.path.join(root, name)
+                yield {"id": os.path.relpath(path, directory), "path": path}
+
+
+def iter_jsonl_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                # 잘못된 줄은 그 행의 상태에 기록하고 다음 줄을 계속 처리
+                yield {"id": str(line_number), "text": "", "words": None, "error": f"JSON 형식 오류: {e}"}
+                continue
+            if not isinstance(record, dict):
+                yield {"id": str(line_number), "text": "", "words": None, "error": "JSON 형식 오류: 객체가 아닙니다"}
+                continue
+            # words: 선택, OCR 단어 배치 [[텍스트, x0, y0, x1, y1, 신뢰도], ...]
+            yield {
+                "id": str(record.get("id", line_number)),
+                "text": record.get("text") or "",
+                "words": record.get("words") or None,
+            }
+
+
+def iter_chunks(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# --- 작업 프로세스 ---
+def _init_worker(artifact_path, model_path, scaler_path, use_ocr):
+    global _worker_engine, _worker_ocr_backend, _worker_ocr_cache
+    _worker_engine = pipeline.load_scoring_engine(artifact_path, model_path, scaler_path)
+    if use_ocr:
+        from carebite.ocr_backends import create_ocr_backend
+        from carebite.ocr_cache import OcrCache
+
+        # CAREBITE_OCR_BACKEND 설정에 따라 Vision API 또는 로컬 대체 구현을 사용합니다.
+        _worker_ocr_backend = create_ocr_backend()
+        _worker_ocr_cache = OcrCache(
+            max_entries=config.OCR_CACHE_MAX_ENTRIES,
+            disk_dir=config.OCR_CACHE_DIR,
+            disk_max_bytes=config.OCR_CACHE_MAX_BYTES,
+            ttl_seconds=config.OCR_CACHE_TTL_SECONDS,
+            max_memory_bytes=config.OCR_CACHE_MAX_MEMORY_BYTES,
+            error_ttl_seconds=config.OCR_CACHE_ERROR_TTL_SECONDS,
+        )
+
+
+def _read_texts(chunk):
+    if "path" not in chunk[0]:
+        return [(record["text"], None, record["words"]) for record in chunk]
+
+    from carebite.image_prep import normalize_image
+    from carebite.ocr_batch import detect_texts_batch
+
+    images = []
+    for record in chunk:
+        with open(record["path"], "rb") as f:
+            images.append(f.read())
+    ocr_results = detect_texts_batch(
+        _worker_ocr_backend,
+        images,
+        _worker_ocr_cache,
+        max_workers=config.OCR_BATCH_MAX_WORKERS,
+        prepare_image=lambda content: normalize_image(
+            content, max_side=config.IMAGE_MAX_SIDE, jpeg_quality=config.IMAGE_JPEG_QUALITY
+        ).content,
+    )
+    return [(result["text"], result["error"], result.get("words")) for result in ocr_results]
+
+
+def process_chunk(chunk):
+    rows = []
+    scored_rows = []
+    raw_records = []
+
+    for record, (text, error, words) in zip(chunk, _read_texts(chunk)):
+        row = dict.fromkeys(OUTPUT_COLUMNS)
+        row["id"] = record["id"]
+        if record.get("error"):
+            row["상태"] = record["error"]
+        elif error:
+            row["상태"] = f"Vision API 오류: {error}"
+        elif not text:
+            row["상태"] = "텍스트 없음"
+        else:
+            try:
+                raw_health_data, _ = parse_health_data(text, words)
+            except Exception as e:
+                # 파서 예외도 그 행의 상태에 기록하고 나머지 행은 계속 처리
+                row["상태"] = f"파싱 실패: {e}"
+            else:
+                row.update(raw_health_data)
+                row["상태"] = "분석 완료"
+                raw_records.append(raw_health_data)
+                scored_rows.append(row)
+        rows.append(row)
+
+    _, prediction_probas = pipeline.score_raw_records(raw_records, _worker_engine)
+    risk_thresholds = pipeline.risk_thresholds(_worker_engine)
+    for row, prediction_proba in zip(scored_rows, prediction_probas):
+        row["예측 확률"] = float(prediction_proba)
+        row["위험 등급"] = classify_risk_level(prediction_proba, risk_thresholds)
+        row["모델 버전"] = _worker_engine.version
+
+    return rows
+
+
+# --- 결과 쓰기 ---
+def rows_to_frame(rows):
+    df = pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+    for col in OUTPUT_COLUMNS:
+        if col in TEXT_COLUMNS:
+            df[col] = df[col].astype("string")
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df
+
+
+class ChunkedWriter:
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.is_parquet = output_path.lower().endswith(".parquet")
+        self._parquet_writer = None
+        self._wrote_header = False
+        self.rows_written = 0
+
+    def write(self, rows):
+        df = rows_to_frame(rows)
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(
+                self.output_path,
+                mode="a" if self._wrote_header else "w",
+                header=not self._wrote_header,
+                index=False,
+                encoding="utf-8-sig" if not self._wrote_header else "utf-8",
+            )
+            self._wrote_header = True
+        self.rows_written += len(df)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def run(input_path, output_path, workers, chunk_size, artifact_path, model_path, scaler_path, image_chunk_size=None):
+    use_ocr = os.path.isdir(input_path)
+    records = iter_image_records(input_path) if use_ocr else iter_jsonl_records(input_path)
+    if use_ocr:
+        # 이미지 청크는 원본 + 정규화 이미지를 함께 들고 있으므로 텍스트 청크보다 훨씬 작게 나눔
+        chunk_size = image_chunk_size or config.BATCH_IMAGE_CHUNK_SIZE
+
+    writer = ChunkedWriter(output_path)
+    started = time.perf_counter()
+    # 메모리 사용량을 제한하기 위해 동시에 제출하는 청크 수를 작업 프로세스 수의 2배로 제한
+    max_in_flight = max(1, workers * 2)
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(artifact_path, model_path, scaler_path, use_ocr),
+        ) as executor:
+            in_flight = deque()
+            for chunk in iter_chunks(records, chunk_size):
+                in_flight.append(executor.submit(process_chunk, chunk))
+                if len(in_flight) >= max_in_flight:
+                    writer.write(in_flight.popleft().result())
+            while in_flight:
+                writer.write(in_flight.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"{writer.rows_written}건 처리 완료 ({elapsed:.1f}초) -> {output_path}", file=sys.stderr)
+    return writer.rows_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="건강검진 이미지/OCR 텍스트 일괄 고혈압 위험도 예측")
+    parser.add_argument("input", help="이미지 디렉터리 또는 OCR 텍스트 JSONL 파일")
+    parser.add_argument("-o", "--output", required=True, help="결과 파일 경로 (.csv 또는 .parquet)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="작업 프로세스 수")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="청크당 레코드 수 (JSONL 입력)")
+    parser.add_argument(
+        "--image-chunk-size",
+        type=int,
+        default=config.BATCH_IMAGE_CHUNK_SIZE,
+        help="청크당 이미지 수 (이미지 디렉터리 입력, 작업 프로세스가 한 번에 메모리에 올리는 이미지 수)",
+    )
+    parser.add_argument("--artifact", default=pipeline.MODEL_ARTIFACT_PATH, help="모델 아티팩트(JSON) 경로")
+    parser.add_argument("--model", default=pipeline.MODEL_PATH, help="아티팩트가 없을 때 사용할 로지스틱 회귀 모델 경로")
+    parser.add_argument("--scaler", default=pipeline.SCALER_PATH, help="아티팩트가 없을 때 사용할 스케일러 경로")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"입력 경로를 찾을 수 없습니다: {args.input}")
+
+    run(
+        args.input, args.output, max(1, args.workers), max(1, args.chunk_size), args.artifact, args.model, args.scaler,
+        image_chunk_size=max(1, args.image_chunk_size),
+    )
+
+
+if __name__ == "__main__":
+    main()
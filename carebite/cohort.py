@@ -0,0 +1,287 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from carebite import config
+from carebite import pipeline
+from carebite.features import MODEL_FEATURES, SOURCE_FIELDS
+from carebite.pipeline import classify_risk_levels
+from carebite.probability_index import SortedProbabilityIndex
+from carebite.risk_levels import RISK_LEVELS, classify_risk_level, validate_risk_thresholds
+
+# --- 코호트(대량 검진 레코드 파일) 점수화 ---
+# 이미 구조화된 검진 레코드(CSV/Parquet, 열 이름은 parse_health_data_from_ocr의 필드 이름)를
+# 청크 단위로 읽어 열 단위 피처 계산(FeatureBuilder.build_columns) -> 예측 엔진으로 점수화하고,
+# 위험 등급 분포/확률 분포 같은 집계와 예측 확률(행당 8바이트, 위험 등급 경계 탐색용)만 남깁니다.
+# 입력 레코드는 한 번에 청크 하나만 메모리에 올립니다.
+#
+#   python -m carebite.cohort records.parquet
+#   python -m carebite.cohort records.csv --chunk-rows 100000 --verify-all
+#   python -m carebite.cohort records.parquet --thresholds 0.5,0.6,0.8
+#
+# 청크마다 일부 행을 레코드(dict) 경로(build_features -> predict_proba -> classify_risk_level)로
+# 다시 계산해 열 단위 결과와 비트 단위로 같은지 확인합니다. (--verify-all이면 모든 행)
+
+COHORT_FILE_FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+PROBABILITY_BINS = 20
+MAX_MISMATCH_SAMPLES = 10
+
+
+class CohortFileError(ValueError):
+    pass
+
+
+def detect_file_format(name):
+    file_format = COHORT_FILE_FORMATS.get(os.path.splitext(name)[1].lower())
+    if file_format is None:
+        raise CohortFileError(f"CSV 또는 Parquet 파일만 분석할 수 있습니다: {name}")
+    return file_format
+
+
+# --- 청크 단위 읽기 ---
+def iter_column_chunks(source, file_format, chunk_rows):
+    # source: 파일 경로 또는 바이너리 파일 객체
+    # 반환값: (열 dict {필드: 1차원 배열}, 행 수, 진행률 0~1 또는 None) 반복자. 피처 계산에 쓰는 열만 읽습니다.
+    handle = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    if handle is source:
+        # 업로드 파일 등은 이전에 읽은 위치와 관계없이 처음부터 읽음
+        handle.seek(0)
+    try:
+        if file_format == "csv":
+            yield from _iter_csv_chunks(handle, chunk_rows)
+        elif file_format == "parquet":
+            yield from _iter_parquet_chunks(handle, chunk_rows)
+        else:
+            raise CohortFileError(f"지원하지 않는 파일 형식입니다: {file_format}")
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+def _iter_csv_chunks(handle, chunk_rows):
+    import pandas as pd
+
+    total_bytes = _remaining_bytes(handle)
+    start = handle.tell()
+    # utf-8-sig: 일괄 분석 결과 CSV(BOM 포함)도 그대로 읽음
+    reader = pd.read_csv(handle, chunksize=chunk_rows, usecols=lambda name: name in SOURCE_FIELDS, encoding="utf-8-sig")
+    with reader:
+        for chunk in reader:
+            progress = (handle.tell() - start) / total_bytes if total_bytes else None
+            columns = {name: chunk[name].to_numpy() for name in chunk.columns}
+            yield columns, len(chunk), progress
+
+
+def _iter_parquet_chunks(handle, chunk_rows):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(handle)
+    names = [name for name in parquet_file.schema_arrow.names if name in SOURCE_FIELDS]
+    total_rows = parquet_file.metadata.num_rows
+    done = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=names):
+        columns = {name: batch.column(name).to_numpy(zero_copy_only=False) for name in names}
+        done += batch.num_rows
+        yield columns, batch.num_rows, done / total_rows if total_rows else None
+
+
+def _remaining_bytes(handle):
+    try:
+        position = handle.tell()
+        size = handle.seek(0, os.SEEK_END)
+        handle.seek(position)
+        return size - position
+    except (AttributeError, OSError):
+        return None
+
+
+def column_records(columns, indexes):
+    # 열 형식 청크의 일부 행 -> 레코드(dict) 목록. 값은 Python 값(float/str/None 등)으로 꺼냄
+    names = list(columns)
+    values = [np.asarray(columns[name])[indexes].tolist() for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+# --- 집계 ---
+class CohortSummary:
+    def __init__(self, risk_thresholds=None, max_probability_bytes=None, model_version=None):
+        self.risk_thresholds = risk_thresholds
+        # 점수화에 쓴 예측 모델 버전 (분석 중 모델이 교체되어도 처음 받은 엔진으로 끝까지 점수화)
+        self.model_version = model_version
+        # 경계 탐색용으로 보관할 예측 확률의 최대 바이트 (None이면 제한 없음). 넘으면 보관을 멈추고 분포만 집계
+        self.max_probability_bytes = max_probability_bytes
+        self.probabilities_dropped = False
+        self.rows = 0
+        self.chunks = 0
+        self.level_counts = np.zeros(len(RISK_LEVELS), dtype=np.int64)
+        self.probability_histogram = np.zeros(PROBABILITY_BINS, dtype=np.int64)
+        self.probability_sum = 0.0
+        self.columns_found = set()
+        self.verified_rows = 0
+        self.mismatches = 0
+        self.mismatch_samples = []
+        self.elapsed_seconds = 0.0
+        self._probability_chunks = []
+        self._probability_index = None
+
+    def add_chunk(self, columns, probas, level_codes):
+        self.rows += len(probas)
+        self.chunks += 1
+        self.columns_found.update(columns)
+        self.level_counts += np.bincount(level_codes, minlength=len(RISK_LEVELS))
+        bins = np.clip((probas * PROBABILITY_BINS).astype(np.int64), 0, PROBABILITY_BINS - 1)
+        self.probability_histogram += np.bincount(bins, minlength=PROBABILITY_BINS)
+        self.probability_sum += float(probas.sum())
+        if self.probabilities_dropped:
+            return
+        if self.max_probability_bytes is not None and self.rows * probas.itemsize > self.max_probability_bytes:
+            self.probabilities_dropped = True
+            self.release_probabilities()
+            return
+        self._probability_chunks.append(probas)
+
+    def probability_index(self):
+        # 분석이 끝난 뒤 처음 호출할 때 한 번만 정렬하고, 청크별 확률 배열은 버림
+        if self._probability_index is None or self._probability_chunks:
+            chunks = self._probability_chunks
+            if self._probability_index is not None:
+                chunks = [self._probability_index.sorted_probabilities] + chunks
+            self._probability_chunks = []
+            self._probability_index = SortedProbabilityIndex.from_chunks(chunks)
+        return self._probability_index
+
+    def release_probabilities(self):
+        # 보관한 예측 확률(행당 8바이트)을 놓아 줌. 분포 집계는 그대로 남음
+        self._probability_chunks = []
+        self._probability_index = None
+
+    @property
+    def missing_fields(self):
+        return [name for name in SOURCE_FIELDS if name not in self.columns_found]
+
+    @property
+    def mean_probability(self):
+        return self.probability_sum / self.rows if self.rows else None
+
+    def level_distribution(self):
+        return {level: int(count) for level, count in zip(RISK_LEVELS, self.level_counts)}
+
+    def probability_distribution(self):
+        width = 1.0 / PROBABILITY_BINS
+        return {f"{i * width:.2f}-{(i + 1) * width:.2f}": int(count) for i, count in enumerate(self.probability_histogram)}
+
+
+def verify_rows(columns, indexes, model_input, probas, level_codes, engine, summary):
+    # 레코드 경로로 다시 계산한 피처/확률/위험 등급이 열 단위 결과와 정확히 같은지 확인
+    for i, record in zip(indexes.tolist(), column_records(columns, indexes)):
+        features = pipeline.build_features(record)
+        proba = float(engine.predict_proba(features))
+        level = classify_risk_level(proba, summary.risk_thresholds)
+        same = (
+            np.array_equal(features, model_input[i], equal_nan=True)
+            and (proba == probas[i] or (np.isnan(proba) and np.isnan(probas[i])))
+            and level == RISK_LEVELS[level_codes[i]]
+        )
+        summary.verified_rows += 1
+        if not same:
+            summary.mismatches += 1
+            if len(summary.mismatch_samples) < MAX_MISMATCH_SAMPLES:
+                summary.mismatch_samples.append({
+                    "row": summary.rows + i,
+                    "record": record,
+                    "column_probability": float(probas[i]),
+                    "record_probability": proba,
+                })
+
+
+def score_cohort(source, engine, file_format, chunk_rows=None, verify_rows_per_chunk=None, max_probability_bytes=None):
+    # 청크를 하나 처리할 때마다 (집계, 진행률)을 돌려주는 생성기
+    # verify_rows_per_chunk: 청크마다 레코드 경로로 확인할 행 수 (음수이면 모든 행)
+    # max_probability_bytes: 경계 탐색용 예측 확률 보관 한도 (CohortSummary 참고)
+    chunk_rows = chunk_rows or config.COHORT_CHUNK_ROWS
+    if verify_rows_per_chunk is None:
+        verify_rows_per_chunk = config.COHORT_VERIFY_ROWS_PER_CHUNK
+    summary = CohortSummary(pipeline.risk_thresholds(engine), max_probability_bytes, engine.version)
+    # 청크마다 같은 모델 입력 버퍼를 다시 씀
+    buffer = np.empty((chunk_rows, len(MODEL_FEATURES)), dtype=np.float64)
+    started = time.perf_counter()
+
+    for columns, n_rows, progress in iter_column_chunks(source, file_format, chunk_rows):
+        if summary.chunks == 0 and not columns:
+            raise CohortFileError(
+                f"검진 항목 열을 찾을 수 없습니다. 열 이름은 다음 필드 이름과 같아야 합니다: {', '.join(SOURCE_FIELDS)}"
+            )
+        if n_rows == 0:
+            continue
+        model_input = pipeline.build_model_input_columns(columns, n_rows, out=buffer[:n_rows])
+        probas = engine.predict_proba(model_input)
+        level_codes = classify_risk_levels(probas, summary.risk_thresholds)
+
+        if verify_rows_per_chunk:
+            if verify_rows_per_chunk < 0 or verify_rows_per_chunk >= n_rows:
+                indexes = np.arange(n_rows)
+            else:
+                indexes = np.unique(np.linspace(0, n_rows - 1, verify_rows_per_chunk).astype(np.int64))
+            verify_rows(columns, indexes, model_input, probas, level_codes, engine, summary)
+
+        summary.add_chunk(columns, probas, level_codes)
+        summary.elapsed_seconds = time.perf_counter() - started
+        yield summary, progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="검진 레코드 파일(CSV/Parquet)의 위험 등급 분포 계산")
+    parser.add_argument("path", help="CSV 또는 Parquet 파일")
+    parser.add_argument("--chunk-rows", type=int, default=config.COHORT_CHUNK_ROWS, help="청크당 행 수")
+    parser.add_argument("--verify-rows", type=int, default=config.COHORT_VERIFY_ROWS_PER_CHUNK,
+                        help="청크마다 레코드 경로로 확인할 행 수")
+    parser.add_argument("--verify-all", action="store_true", help="모든 행을 레코드 경로로 확인")
+    parser.add_argument("--thresholds", action="append", default=[],
+                        help="추가로 비교할 위험 등급 경계 (예: 0.5,0.6,0.8, 여러 번 지정 가능)")
+    args = parser.parse_args(argv)
+    try:
+        alternative_thresholds = [
+            validate_risk_thresholds(value.split(",")) for value in args.thresholds
+        ]
+    except ValueError as e:
+        parser.error(str(e))
+
+    engine = pipeline.load_scoring_engine()
+    summary = None
+    try:
+        for summary, progress in score_cohort(
+            args.path, engine, detect_file_format(args.path), args.chunk_rows, -1 if args.verify_all else args.verify_rows
+        ):
+            progress_note = f" ({progress:.0%})" if progress is not None else ""
+            print(f"{summary.rows:,}행 처리{progress_note}", file=sys.stderr)
+    except (CohortFileError, OSError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    if summary is None:
+        print("분석할 행이 없습니다.", file=sys.stderr)
+        return 1
+    rate = summary.rows / summary.elapsed_seconds if summary.elapsed_seconds else 0
+    print(f"{summary.rows:,}행, {summary.elapsed_seconds:.2f}초 ({rate:,.0f}행/초), 평균 예측 확률 {summary.mean_probability:.4f}")
+    print(f"모델 버전: {summary.model_version}")
+    for level, count in summary.level_distribution().items():
+        print(f"  {level:<4} {count:>10,}  ({count / summary.rows:.1%})")
+    if summary.missing_fields:
+        print(f"파일에 없는 필드(결측 처리): {', '.join(summary.missing_fields)}")
+    print(f"레코드 경로 확인: {summary.verified_rows:,}행, 불일치 {summary.mismatches:,}행")
+    if alternative_thresholds:
+        index = summary.probability_index()
+        for thresholds in alternative_thresholds:
+            counts = index.band_counts(thresholds)
+            print(f"경계 {', '.join(f'{t:g}' for t in thresholds)}: " + ", ".join(
+                f"{level} {count:,} ({count - base:+,})"
+                for level, count, base in zip(RISK_LEVELS, counts, summary.level_counts)
+            ))
+    return 1 if summary.mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import os
+
+# --- 환경 변수 기반 설정 ---
+# Streamlit 페이지와 백그라운드 작업에서 함께 쓰는 설정 값을 한곳에서 읽습니다.
+
+
+def env_str(name, default=None):
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+def env_int(name, default):
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def env_float(name, default):
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def env_floats(name, default=None):
+    # 쉼표로 구분한 실수 목록 (예: "0.48,0.59,0.74")
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return tuple(float(v) for v in value.split(","))
+    except ValueError:
+        return default
+
+
+# --- OCR 결과 캐시 ---
+# 메모리(LRU) 계층에 보관할 최대 항목 수
+OCR_CACHE_MAX_ENTRIES = env_int("CAREBITE_OCR_CACHE_MAX_ENTRIES", 256)
+# 메모리(LRU) 계층 최대 용량 (바이트, 추출 텍스트 + 단어 배치)
+OCR_CACHE_MAX_MEMORY_BYTES = env_int("CAREBITE_OCR_CACHE_MAX_MEMORY_BYTES", 32 * 1024 * 1024)
+# 디스크 계층 디렉터리 (비워두면 디스크 계층을 사용하지 않음)
+OCR_CACHE_DIR = env_str("CAREBITE_OCR_CACHE_DIR")
+# 디스크 계층 최대 용량 (바이트)
+OCR_CACHE_MAX_BYTES = env_int("CAREBITE_OCR_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+# 캐시 항목 유효 기간 (초), 0 이하이면 만료 없음
+OCR_CACHE_TTL_SECONDS = env_int("CAREBITE_OCR_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60)
+# 오류(할당량 초과, 시간 초과 등) 결과를 메모리 계층에 보관할 시간 (초, 디스크에는 저장하지 않음)
+OCR_CACHE_ERROR_TTL_SECONDS = env_int("CAREBITE_OCR_CACHE_ERROR_TTL_SECONDS", 60)
+
+# --- 일괄 분석 ---
+# Vision API 일괄 호출에 사용할 최대 동시 요청 수
+OCR_BATCH_MAX_WORKERS = env_int("CAREBITE_OCR_BATCH_MAX_WORKERS", 4)
+# 일괄 예측 CLI(carebite.batch_cli)가 이미지 디렉터리를 처리할 때 작업 프로세스에 한 번에 넘기는 이미지 수
+# 원본/정규화 이미지를 모두 메모리에 들고 있으므로 Vision API 일괄 호출 크기(16장) 정도로 작게 유지
+BATCH_IMAGE_CHUNK_SIZE = env_int("CAREBITE_BATCH_IMAGE_CHUNK_SIZE", 16)
+
+# --- 이미지 정규화 ---
+# Vision API로 보내기 전 이미지의 긴 변 최대 길이 (픽셀)
+IMAGE_MAX_SIDE = env_int("CAREBITE_IMAGE_MAX_SIDE", 2048)
+# 재인코딩 JPEG 품질 (1-95)
+IMAGE_JPEG_QUALITY = env_int("CAREBITE_IMAGE_JPEG_QUALITY", 85)
+
+# --- Vision API 호출 제한 시간/재시도 ---
+# 시도당 제한 시간 (초)
+OCR_TIMEOUT_SECONDS = env_float("CAREBITE_OCR_TIMEOUT_SECONDS", 20.0)
+# 실패 시 재시도 횟수 (첫 시도 제외)
+OCR_RETRIES = env_int("CAREBITE_OCR_RETRIES", 2)
+# 재시도 대기 시간 (지수 백오프 기본값/최댓값, 초)
+OCR_BACKOFF_BASE_SECONDS = env_float("CAREBITE_OCR_BACKOFF_BASE_SECONDS", 0.5)
+OCR_BACKOFF_MAX_SECONDS = env_float("CAREBITE_OCR_BACKOFF_MAX_SECONDS", 4.0)
+# Vision API 호출에 사용하는 스레드 수
+OCR_CALL_MAX_THREADS = env_int("CAREBITE_OCR_CALL_MAX_THREADS", 16)
+
+# --- 프로세스 전체 OCR 디스패처 ---
+# 동시에 진행할 수 있는 OCR 호출 수 (모든 세션 합계)
+OCR_DISPATCH_MAX_WORKERS = env_int("CAREBITE_OCR_DISPATCH_MAX_WORKERS", 8)
+# 대기열 최대 길이 (넘으면 요청을 바로 거절)
+OCR_DISPATCH_MAX_QUEUE = env_int("CAREBITE_OCR_DISPATCH_MAX_QUEUE", 64)
+# Vision API 할당량에 맞춘 초당 이미지 수와 순간 최대치 (0 이하이면 제한하지 않음)
+# 기본값은 Vision API 기본 할당량(분당 1,800건)에 맞춘 값
+OCR_RATE_LIMIT_PER_SECOND = env_float("CAREBITE_OCR_RATE_LIMIT_PER_SECOND", 30.0)
+OCR_RATE_LIMIT_BURST = env_int("CAREBITE_OCR_RATE_LIMIT_BURST", 10)
+
+# --- OCR 백엔드 ---
+# vision: Google Cloud Vision API, local: 고정 텍스트를 돌려주는 로컬 대체 구현 (벤치마크/부하 테스트용)
+OCR_BACKEND = env_str("CAREBITE_OCR_BACKEND", "vision")
+# 로컬 백엔드 픽스처 디렉터리 ('<이미지 sha256>.txt', 'default.txt')
+LOCAL_OCR_FIXTURES_DIR = env_str("CAREBITE_LOCAL_OCR_FIXTURES_DIR")
+# 로컬 백엔드 호출마다 주입할 지연 시간과 추가 무작위 지연 (초)
+LOCAL_OCR_LATENCY_SECONDS = env_float("CAREBITE_LOCAL_OCR_LATENCY_SECONDS", 0.0)
+LOCAL_OCR_LATENCY_JITTER_SECONDS = env_float("CAREBITE_LOCAL_OCR_LATENCY_JITTER_SECONDS", 0.0)
+
+# --- 예측 모델 ---
+# 예측 엔진을 읽을 JSON 모델 아티팩트 경로 (python -m carebite.model_artifact export)
+MODEL_ARTIFACT_PATH = env_str("CAREBITE_MODEL_ARTIFACT", "model/scoring_model.json")
+# model/ 모델 파일(아티팩트, pkl)이 바뀌었는지 확인하는 주기 (초). 바뀌면 검증 후 재시작 없이 교체
+# 0 이하이면 확인하지 않음 (모델을 바꾸려면 재시작)
+MODEL_RELOAD_INTERVAL_SECONDS = env_float("CAREBITE_MODEL_RELOAD_INTERVAL_SECONDS", 10.0)
+
+# --- 위험 등급 ---
+# 위험 등급 경계 '정상/주의,주의/위험,위험/고위험' (예: 0.48,0.59,0.74)
+# 비워두면 모델 아티팩트에 저장된 경계를, 아티팩트에 없으면 노트북 기본값(risk_levels.RISK_THRESHOLDS)을 사용
+RISK_THRESHOLDS = env_floats("CAREBITE_RISK_THRESHOLDS")
+
+# --- 예측 기록 ---
+# 예측 기록을 저장할 SQLite 데이터베이스 경로 (WAL 모드)
+HISTORY_DB_PATH = env_str("CAREBITE_HISTORY_DB", ".carebite/history.sqlite3")
+# 결과 페이지의 기록 목록 한 페이지당 항목 수
+HISTORY_PAGE_SIZE = env_int("CAREBITE_HISTORY_PAGE_SIZE", 20)
+
+# --- 분석 화면 ---
+# production: 예측 결과를 먼저 보여주고 추출 텍스트/파싱/피처 결과는 '분석 세부 정보' 토글을 켤 때만 그림
+# debug     : 세부 정보 토글을 켠 상태로 시작
+UI_MODE = env_str("CAREBITE_UI_MODE", "production")
+# 업로드 이미지 미리보기(썸네일)의 긴 변 길이 (px)
+THUMBNAIL_MAX_SIDE = env_int("CAREBITE_THUMBNAIL_MAX_SIDE", 480)
+
+# --- 코호트 분석 ---
+# 코호트 파일(CSV/Parquet)을 한 번에 읽어 점수화할 행 수
+COHORT_CHUNK_ROWS = env_int("CAREBITE_COHORT_CHUNK_ROWS", 50_000)
+# 청크마다 레코드 단위 경로로 다시 계산해 결과가 같은지 확인할 행 수 (0이면 확인하지 않음)
+COHORT_VERIFY_ROWS_PER_CHUNK = env_int("CAREBITE_COHORT_VERIFY_ROWS_PER_CHUNK", 64)
+# 서버에 있는 코호트 파일을 경로로 지정할 수 있는 디렉터리 (비워두면 업로드만 허용)
+COHORT_DATA_DIR = env_str("CAREBITE_COHORT_DATA_DIR")
+
+# --- 메모리 한도 ---
+# 세션 하나가 붙잡아 둘 수 있는 큰 중간 결과(업로드 미리보기, 코호트 예측 확률 등)의 합계 (바이트)
+SESSION_MEMORY_BUDGET_BYTES = env_int("CAREBITE_SESSION_MEMORY_BUDGET_BYTES", 64 * 1024 * 1024)
+# 모든 세션의 중간 결과 합계 한도 (바이트)
+PROCESS_MEMORY_BUDGET_BYTES = env_int("CAREBITE_PROCESS_MEMORY_BUDGET_BYTES", 512 * 1024 * 1024)
+# 중간 결과를 쓰지 않은 채로 보관하는 최대 시간 (초), 0 이하이면 시간으로 정리하지 않음
+SESSION_ARTIFACT_IDLE_SECONDS = env_int("CAREBITE_SESSION_ARTIFACT_IDLE_SECONDS", 30 * 60)
+# 프로세스 RSS가 이 값(바이트)을 넘으면 중간 결과와 OCR 메모리 캐시를 절반으로 줄임 (0이면 확인하지 않음)
+PROCESS_RSS_SOFT_LIMIT_BYTES = env_int("CAREBITE_PROCESS_RSS_SOFT_LIMIT_BYTES", 0)
+
+# --- JSON 점수화 API (python -m carebite.api) ---
+# 바인드 주소와 포트
+API_ADDRESS = env_str("CAREBITE_API_ADDRESS", "127.0.0.1")
+API_PORT = env_int("CAREBITE_API_PORT", 8502)
+# 한 요청의 최대 레코드 수와 본문 크기 (바이트)
+API_MAX_RECORDS = env_int("CAREBITE_API_MAX_RECORDS", 10_000)
+API_MAX_BODY_BYTES = env_int("CAREBITE_API_MAX_BODY_BYTES", 32 * 1024 * 1024)
+# /v1/score 인증 토큰 ('Authorization: Bearer <토큰>'), 비워두면 인증하지 않음
+API_TOKEN = env_str("CAREBITE_API_TOKEN")
+
+# --- 계측/관리자 화면 ---
+# 단계별 지표를 보관할 롤링 윈도우 크기 (최근 N건)
+METRICS_WINDOW = env_int("CAREBITE_METRICS_WINDOW", 1024)
+# Prometheus 텍스트 형식으로 지표를 주기적으로 기록할 파일 경로 (비워두면 기록하지 않음)
+METRICS_TEXTFILE = env_str("CAREBITE_METRICS_TEXTFILE")
+# 관리자 사이드바 접근 토큰 (?admin=<토큰>), 비워두면 관리자 화면을 표시하지 않음
+ADMIN_TOKEN = env_str("CAREBITE_ADMIN_TOKEN")
+
+# --- rerun 프로파일링 (carebite.profiling) ---
+# 1이면 모든 세션의 페이지 rerun을 프로파일링 (관리자는 ?admin=<토큰>&profile=1로 자기 세션만 켤 수 있음)
+PROFILE_ENABLED = env_str("CAREBITE_PROFILE", "0").lower() in ("1", "true", "yes")
+# rerun별 프로파일 파일(.prof, .txt)을 남길 디렉터리와 보관할 최대 rerun 수 (넘으면 오래된 것부터 삭제)
+PROFILE_DIR = env_str("CAREBITE_PROFILE_DIR", ".carebite/profiles")
+PROFILE_MAX_RUNS = env_int("CAREBITE_PROFILE_MAX_RUNS", 50)
+# 요약(사이드바, .txt)에 표시할 시간/할당 상위 항목 수
+PROFILE_TOP_N = env_int("CAREBITE_PROFILE_TOP_N", 15)
@@ -0,0 +1,227 @@
+from collections import namedtuple
+
+import numpy as np
+
+# --- 모델 피처 정의 ---
+# 모델 입력 피처의 순서, 원본(파싱 결과) 필드, 계산 방법, 결측값 처리를 이 표 한 곳에서 정의합니다.
+# 피처 엔지니어링, 모델 입력 배열, 모델 아티팩트의 스키마 검사가 모두 이 표에서 만들어지므로
+# 피처 이름/순서가 서로 어긋날 수 없습니다.
+#
+# kind별 계산 방법:
+#   value   : 원본 필드 값을 숫자로 그대로 사용
+#   mapping : 원본 필드 값을 params 표로 변환 (표에 없는 값은 결측)
+#   bucket  : 원본 값을 params 단위로 내림 (예: 나이 -> 5세 단위 연령대 코드)
+#   ratio   : sources[0] / sources[1] (분모가 0이면 결측)
+#   bmi     : 체중(kg) / 신장(m)^2, sources = (신장(cm), 체중(kg)) (신장이 0 이하이면 결측)
+#   constant: OCR로 얻을 수 없는 값. params 값을 그대로 사용 (NaN이면 결측)
+#
+# 결측값은 NaN으로 두며, 예측 엔진이 스케일링 후 0(학습 평균)으로 대체합니다.
+#
+# 같은 정의로 두 가지 계산 함수를 만듭니다.
+#   build/build_many : 레코드(dict) 단위 (페이지, 일괄 분석)
+#   build_columns    : 열(1차원 배열) 단위 NumPy 연산 (코호트 파일 등 대량 레코드)
+# 두 경로는 같은 입력에 대해 비트 단위로 같은 값을 만듭니다. (열 값은 Python 값으로 꺼낸 레코드 기준)
+
+NAN = float("nan")
+
+Feature = namedtuple("Feature", ["name", "kind", "sources", "params"], defaults=((), None))
+
+# `04_modeling.ipynb`에서 모델 학습에 사용된 피처 순서 (타겟 제외)
+FEATURE_SPEC = (
+    Feature('성별코드', 'mapping', ('성별',), {'남성': 1.0, '여성': 2.0}),
+    Feature('연령대코드(5세단위)', 'bucket', ('나이',), 5),
+    Feature('시력(평균)', 'constant', (), NAN),  # OCR에서 추출되지 않음
+    Feature('식전혈당(공복혈당)', 'value', ('공복 혈당',)),
+    Feature('총콜레스테롤', 'value', ('총 콜레스테롤',)),
+    Feature('혈색소', 'value', ('혈색소',)),
+    Feature('요단백', 'mapping', ('요단백',), {'정상': 0.0}),
+    Feature('혈청크레아티닌', 'value', ('혈청 크레아티닌',)),
+    Feature('감마지티피', 'value', ('감마지티피',)),
+    Feature('흡연상태', 'constant', (), 1.0),  # OCR에서 추출이 어려워 비흡연자(1)로 가정
+    Feature('음주여부', 'constant', (), NAN),  # OCR에서 추출되지 않음
+    Feature('bmi', 'bmi', ('신장', '체중')),
+    Feature('alt_ast_ratio', 'ratio', ('ALT', 'AST')),
+    Feature('tg_hdl_ratio', 'ratio', ('트리글리세라이드', 'HDL 콜레스테롤')),
+    Feature('ggtp_alt_ratio', 'ratio', ('감마지티피', 'ALT')),
+    Feature('ldl_hdl_ratio', 'ratio', ('LDL 콜레스테롤', 'HDL 콜레스테롤')),
+)
+
+MODEL_FEATURES = [feature.name for feature in FEATURE_SPEC]
+# 피처 계산에 필요한 원본(파싱 결과) 필드
+SOURCE_FIELDS = list(dict.fromkeys(source for feature in FEATURE_SPEC for source in feature.sources))
+
+
+def _to_float(value):
+    if value is None or isinstance(value, bool):
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+# --- 피처 정의 -> 계산 함수 ---
+def _compile_feature(feature):
+    kind = feature.kind
+    sources = feature.sources
+    params = feature.params
+
+    if kind == 'value':
+        (source,) = sources
+        return lambda raw: _to_float(raw.get(source))
+
+    if kind == 'mapping':
+        (source,) = sources
+        table = {key: float(value) for key, value in params.items()}
+        return lambda raw: table.get(raw.get(source), NAN)
+
+    if kind == 'bucket':
+        (source,) = sources
+        width = float(params)
+        # NaN // width 도 NaN이므로 결측값은 그대로 결측
+        return lambda raw: (_to_float(raw.get(source)) // width) * width
+
+    if kind == 'ratio':
+        numerator, denominator = sources
+
+        def ratio(raw):
+            bottom = _to_float(raw.get(denominator))
+            return _to_float(raw.get(numerator)) / bottom if bottom != 0 else NAN
+        return ratio
+
+    if kind == 'bmi':
+        height_source, weight_source = sources
+
+        def bmi(raw):
+            height = _to_float(raw.get(height_source))
+            if not height > 0:
+                return NAN
+            height_m = height / 100.0
+            # ** 2 대신 곱셈 (열 단위 계산과 반올림 결과가 같도록)
+            return _to_float(raw.get(weight_source)) / (height_m * height_m)
+        return bmi
+
+    if kind == 'constant':
+        value = float(params)
+        return lambda raw: value
+
+    raise ValueError(f"알 수 없는 피처 계산 방법입니다: {feature.name} ({kind})")
+
+
+# --- 피처 정의 -> 열 단위 계산 함수 ---
+# 각 함수는 (columns, n_rows) -> (n_rows,) float64 배열. columns에 없는 필드는 결측입니다.
+def _float_column(values, n_rows):
+    if values is None:
+        return np.full(n_rows, NAN)
+    values = np.asarray(values)
+    kind = values.dtype.kind
+    if kind in "iuf":
+        return values.astype(np.float64)
+    if kind == "b":
+        # _to_float은 bool을 결측으로 처리
+        return np.full(n_rows, NAN)
+    # 문자열/혼합 열은 값마다 _to_float (숫자 열은 위에서 벡터 연산으로 처리)
+    return np.fromiter(map(_to_float, values), dtype=np.float64, count=n_rows)
+
+
+def _mapped_column(values, table, n_rows):
+    if values is None:
+        return np.full(n_rows, NAN)
+    values = np.asarray(values)
+    if values.dtype.kind in "iufb":
+        # 숫자 열은 값 종류별로 한 번만 찾음
+        uniques, inverse = np.unique(values, return_inverse=True)
+        mapped = np.array([table.get(value, NAN) for value in uniques.tolist()], dtype=np.float64)
+        return mapped[inverse.reshape(-1)]
+    return np.fromiter((table.get(value, NAN) for value in values), dtype=np.float64, count=n_rows)
+
+
+def _compile_column_feature(feature):
+    kind = feature.kind
+    sources = feature.sources
+    params = feature.params
+
+    if kind == 'value':
+        (source,) = sources
+        return lambda columns, n_rows: _float_column(columns.get(source), n_rows)
+
+    if kind == 'mapping':
+        (source,) = sources
+        table = {key: float(value) for key, value in params.items()}
+        return lambda columns, n_rows: _mapped_column(columns.get(source), table, n_rows)
+
+    if kind == 'bucket':
+        (source,) = sources
+        width = float(params)
+
+        def bucket(columns, n_rows):
+            with np.errstate(invalid='ignore'):
+                return (_float_column(columns.get(source), n_rows) // width) * width
+        return bucket
+
+    if kind == 'ratio':
+        numerator, denominator = sources
+
+        def ratio(columns, n_rows):
+            bottom = _float_column(columns.get(denominator), n_rows)
+            top = _float_column(columns.get(numerator), n_rows)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(bottom != 0, top / bottom, NAN)
+        return ratio
+
+    if kind == 'bmi':
+        height_source, weight_source = sources
+
+        def bmi(columns, n_rows):
+            height = _float_column(columns.get(height_source), n_rows)
+            weight = _float_column(columns.get(weight_source), n_rows)
+            height_m = height / 100.0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(height > 0, weight / (height_m * height_m), NAN)
+        return bmi
+
+    if kind == 'constant':
+        value = float(params)
+        return lambda columns, n_rows: np.full(n_rows, value)
+
+    raise ValueError(f"알 수 없는 피처 계산 방법입니다: {feature.name} ({kind})")
+
+
+class FeatureBuilder:
+    def __init__(self, spec=FEATURE_SPEC):
+        self.spec = tuple(spec)
+        self.feature_names = [feature.name for feature in self.spec]
+        self._extractors = [_compile_feature(feature) for feature in self.spec]
+        self._column_extractors = [_compile_column_feature(feature) for feature in self.spec]
+
+    def build(self, raw_data, out=None):
+        # 레코드 한 건 -> (피처 수,) float64 배열. out을 주면 그 배열에 바로 씁니다.
+        if out is None:
+            out = np.empty(len(self._extractors), dtype=np.float64)
+        out[:] = [extract(raw_data) for extract in self._extractors]
+        return out
+
+    def build_many(self, raw_records, out=None):
+        # 레코드 여러 건 -> (레코드 수, 피처 수) float64 배열
+        if out is None:
+            out = np.empty((len(raw_records), len(self._extractors)), dtype=np.float64)
+        extractors = self._extractors
+        for i, raw_data in enumerate(raw_records):
+            out[i] = [extract(raw_data) for extract in extractors]
+        return out
+
+    def build_columns(self, columns, n_rows, out=None):
+        # 열 형식 레코드 {원본 필드: 길이 n_rows인 1차원 배열} -> (n_rows, 피처 수) float64 배열
+        # (pandas DataFrame도 columns로 그대로 넘길 수 있음)
+        if out is None:
+            out = np.empty((n_rows, len(self._column_extractors)), dtype=np.float64)
+        for j, extract in enumerate(self._column_extractors):
+            out[:, j] = extract(columns, n_rows)
+        return out
+
+    def to_dict(self, row):
+        # 화면 표시용 {피처 이름: 값}
+        return dict(zip(self.feature_names, np.asarray(row, dtype=np.float64).tolist()))
+
+
+FEATURE_BUILDER = FeatureBuilder()
@@ -0,0 +1,228 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from carebite import config
+from carebite.risk_levels import RISK_LEVELS
+
+# --- 예측 기록 저장소 (SQLite, WAL 모드) ---
+# 분석한 이미지의 해시, 파싱 결과, 모델 입력 피처, 예측 확률, 위험 등급, 모델 버전을 기록합니다.
+# 같은 이미지를 같은 모델로 다시 분석하면 기록을 그대로 돌려주므로 OCR과 예측을 건너뛸 수 있고,
+# 결과 페이지는 다시 계산하지 않고 기록 목록과 추이를 보여줍니다.
+#
+# (image_hash, model_version)마다 한 행을 두고, 다시 조회되면 last_seen_at/seen_count만 갱신합니다.
+# 연결은 스레드마다 따로 열고(Streamlit 세션별 스크립트 스레드), WAL 모드라 읽기와 쓰기가 서로 막지 않습니다.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    image_hash TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_seen_at REAL NOT NULL,
+    seen_count INTEGER NOT NULL DEFAULT 1,
+    probability REAL,
+    risk_level TEXT,
+    parsed_json TEXT NOT NULL,
+    features_json TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_predictions_image_model ON predictions (image_hash, model_version);
+CREATE INDEX IF NOT EXISTS idx_predictions_created_at ON predictions (created_at);
+"""
+
+# SQLite 한 문장의 바인딩 변수 수 제한을 넘지 않도록 IN 조회를 나누는 크기
+_IN_CHUNK = 500
+
+_SELECT_COLUMNS = (
+    "id, image_hash, model_version, created_at, last_seen_at, seen_count, "
+    "probability, risk_level, parsed_json, features_json"
+)
+
+
+class HistoryStore:
+    def __init__(self, path, busy_timeout_seconds=5.0):
+        self.path = path
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_seconds)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL에서는 NORMAL로도 커밋된 데이터가 손상되지 않음 (전원 장애 시 마지막 커밋만 유실 가능)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- 기록 ---
+    def record(self, image_hash, model_version, parsed, features, probability, risk_level):
+        return self.record_many([(image_hash, model_version, parsed, features, probability, risk_level)])
+
+    def record_many(self, entries):
+        # entries: [(image_hash, model_version, parsed, features, probability, risk_level), ...]
+        now = time.time()
+        rows = [
+            (
+                image_hash,
+                model_version,
+                now,
+                now,
+                None if probability is None else float(probability),
+                risk_level,
+                _dumps(parsed),
+                _dumps(features),
+            )
+            for image_hash, model_version, parsed, features, probability, risk_level in entries
+        ]
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO predictions (image_hash, model_version, created_at, last_seen_at, "
+                "probability, risk_level, parsed_json, features_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (image_hash, model_version) DO UPDATE SET "
+                "last_seen_at = excluded.last_seen_at, seen_count = seen_count + 1, "
+                "probability = excluded.probability, risk_level = excluded.risk_level, "
+                "parsed_json = excluded.parsed_json, features_json = excluded.features_json",
+                rows,
+            )
+        return len(rows)
+
+    # --- 이미지 해시로 조회 ---
+    def find(self, image_hash, model_version):
+        return self.find_many([image_hash], model_version).get(image_hash)
+
+    def find_many(self, image_hashes, model_version, touch=True):
+        # 반환값: {image_hash: 기록 dict}. touch=True이면 조회된 기록의 last_seen_at/seen_count를 갱신합니다.
+        image_hashes = list(dict.fromkeys(image_hashes))
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(image_hashes), _IN_CHUNK):
+            chunk = image_hashes[start:start + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(
+                f"SELECT {_SELECT_COLUMNS} FROM predictions "
+                f"WHERE model_version = ? AND image_hash IN ({placeholders})",
+                [model_version, *chunk],
+            )
+            for row in cursor:
+                found[row["image_hash"]] = _row_to_entry(row)
+
+        if touch and found:
+            now = time.time()
+            with conn:
+                conn.executemany(
+                    "UPDATE predictions SET last_seen_at = ?, seen_count = seen_count + 1 WHERE id = ?",
+                    [(now, entry["id"]) for entry in found.values()],
+                )
+        return found
+
+    # --- 기간별 조회 (결과 페이지) ---
+    def count(self, since=None, until=None):
+        where, params = _time_range(since, until)
+        return self._connection().execute(f"SELECT COUNT(*) FROM predictions {where}", params).fetchone()[0]
+
+    def list_page(self, limit, offset=0, since=None, until=None):
+        # 최근 기록부터 limit건 (created_at 인덱스로 정렬)
+        where, params = _time_range(since, until)
+        cursor = self._connection().execute(
+            f"SELECT {_SELECT_COLUMNS} FROM predictions {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            [*params, int(limit), int(offset)],
+        )
+        return [_row_to_entry(row) for row in cursor]
+
+    def daily_trend(self, since=None, until=None):
+        # 날짜별(서버 현지 시간) 분석 건수와 평균/최대 예측 확률
+        where, params = _time_range(since, until)
+        cursor = self._connection().execute(
+            "SELECT date(created_at, 'unixepoch', 'localtime') AS day, COUNT(*) AS count, "
+            "AVG(probability) AS mean_probability, MAX(probability) AS max_probability "
+            f"FROM predictions {where} GROUP BY day ORDER BY day",
+            params,
+        )
+        return [dict(row) for row in cursor]
+
+    def risk_level_counts(self, since=None, until=None, thresholds=None):
+        # thresholds: 위험 등급 경계 (risk_levels.risk_thresholds()). 주면 저장된 위험 등급 대신
+        # 예측 확률을 이 경계로 다시 분류해서 셉니다. (risk_levels.classify_risk_level과 같은 규칙)
+        where, params = _time_range(since, until)
+        level = "risk_level"
+        if thresholds is not None:
+            caution, danger, high_risk = thresholds
+            normal, caution_level, danger_level, high_risk_level = RISK_LEVELS
+            level = (
+                "CASE WHEN probability IS NULL THEN risk_level "
+                f"WHEN probability < ? THEN '{normal}' WHEN probability <= ? THEN '{caution_level}' "
+                f"WHEN probability <= ? THEN '{danger_level}' ELSE '{high_risk_level}' END"
+            )
+            params = [float(caution), float(danger), float(high_risk)] + list(params)
+        cursor = self._connection().execute(
+            f"SELECT {level} AS level, COUNT(*) AS count FROM predictions {where} GROUP BY level", params
+        )
+        return {row["level"]: row["count"] for row in cursor}
+
+    def stats(self):
+        conn = self._connection()
+        return {
+            "path": self.path,
+            "records": conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0],
+            "db_bytes": _file_size(self.path),
+            "wal_bytes": _file_size(f"{self.path}-wal"),
+        }
+
+
+# 페이지들이 함께 쓰는 프로세스 전체 저장소 (CAREBITE_HISTORY_DB)
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_history_store():
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = HistoryStore(config.HISTORY_DB_PATH)
+        return _default_store
+
+
+def _time_range(since, until):
+    clauses = []
+    params = []
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(float(since))
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(float(until))
+    return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _dumps(value):
+    # NaN은 JSON 표준이 아니므로 null로 저장
+    if isinstance(value, dict):
+        value = {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in value.items()}
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _row_to_entry(row):
+    entry = dict(row)
+    entry["parsed"] = json.loads(entry.pop("parsed_json"))
+    entry["features"] = json.loads(entry.pop("features_json"))
+    return entry
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,71 @@
+import io
+from collections import namedtuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# --- Vision API 전송 전 이미지 정규화 ---
+# 휴대폰으로 찍은 검진 결과지는 수 MB 크기인 경우가 많으므로, OCR에 필요한 해상도로
+# 줄이고 흑백으로 변환한 뒤 EXIF 없이 JPEG로 다시 인코딩해 전송 크기를 줄입니다.
+
+# 읽을 수 없는 이미지로 보는 예외. 픽셀 수가 Image.MAX_IMAGE_PIXELS의 2배를 넘는 이미지(압축 폭탄)는
+# OSError가 아닌 DecompressionBombError가 발생하고, 잘린 파일은 EOFError가 발생할 수 있음
+_UNREADABLE_IMAGE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, OSError, EOFError, ValueError)
+
+class ImagePrepResult(
+    namedtuple("ImagePrepResult", ["content", "original_bytes", "normalized_bytes", "width", "height", "normalized"])
+):
+    __slots__ = ()
+
+    @property
+    def bytes_saved(self):
+        return max(0, self.original_bytes - self.normalized_bytes)
+
+
+def normalize_image(image_bytes, max_side=2048, jpeg_quality=85):
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            img.seek(0)  # GIF 등 여러 프레임 이미지는 첫 프레임만 사용
+            # EXIF의 회전 정보를 픽셀에 먼저 반영한 뒤 EXIF를 버립니다.
+            img = ImageOps.exif_transpose(img)
+
+            if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+                # 투명 배경은 흰색으로 채워 글자가 묻히지 않도록 함
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img.convert("RGBA"), mask=img.convert("RGBA").getchannel("A"))
+                img = background
+            img = img.convert("L")
+
+            # 긴 변이 max_side를 넘는 경우에만 비율을 유지하며 축소
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+            output = io.BytesIO()
+            img.save(output, format="JPEG", quality=jpeg_quality, optimize=True)
+            width, height = img.size
+    except _UNREADABLE_IMAGE_ERRORS:
+        # 읽을 수 없는 이미지는 원본 그대로 보내고 판단은 Vision API에 맡김
+        return ImagePrepResult(image_bytes, len(image_bytes), len(image_bytes), None, None, False)
+
+    normalized = output.getvalue()
+    if len(normalized) >= len(image_bytes):
+        # 이미 충분히 작은 이미지는 원본 유지
+        return ImagePrepResult(image_bytes, len(image_bytes), len(image_bytes), width, height, False)
+    return ImagePrepResult(normalized, len(image_bytes), len(normalized), width, height, True)
+
+
+def make_thumbnail(image_bytes, max_side=480, jpeg_quality=75):
+    # 화면 미리보기용 축소 이미지 (JPEG). 읽을 수 없는 이미지는 None
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            img.seek(0)
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            output = io.BytesIO()
+            img.save(output, format="JPEG", quality=jpeg_quality, optimize=True)
+    except _UNREADABLE_IMAGE_ERRORS:
+        return None
+    return output.getvalue()
@@ -0,0 +1,246 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from carebite import config
+
+# --- 메모리 사용량 계산과 세션 중간 결과 보관소 ---
+# 세션(브라우저 탭)마다 붙잡는 큰 중간 결과(업로드 미리보기, 코호트 예측 확률 등)는 session_state에 직접 두지 않고
+# 프로세스 전체 보관소(ARTIFACTS)에 (세션, 이름) 키로 넣습니다. session_state에는 예측 확률/위험 등급처럼 작은 결과만 남깁니다.
+#   - 세션 한도: 한 세션의 합계가 넘으면 그 세션에서 가장 오래 쓰지 않은 것부터 해제
+#   - 프로세스 한도: 모든 세션 합계가 넘으면 전체에서 가장 오래 쓰지 않은 것부터 해제
+#   - 유휴 시간: 닫힌 탭처럼 오래 쓰지 않은 결과는 다음 저장/조회 때 정리
+#   - RSS 상한: 프로세스 RSS가 넘으면 보관소와 등록된 캐시(OCR 메모리 캐시 등)를 절반으로 줄임
+# 해제된 결과는 다시 만들 수 있는 것(썸네일)은 다시 만들고, 그렇지 않은 것은 화면에서 다시 분석하도록 안내합니다.
+
+
+def approx_size(obj):
+    # 객체가 참조하는 컨테이너/문자열/바이트/NumPy 배열까지 합친 대략적인 크기 (바이트, 같은 객체는 한 번만)
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        nbytes = getattr(item, "nbytes", None)
+        if isinstance(nbytes, int) and not isinstance(item, (bytes, bytearray, memoryview)):
+            # NumPy 배열: 데이터 버퍼 + 헤더
+            total += nbytes + sys.getsizeof(item) if getattr(item, "base", None) is None else sys.getsizeof(item)
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.append(vars(item))
+        elif hasattr(item, "__slots__"):
+            stack.extend(getattr(item, name) for name in item.__slots__ if hasattr(item, name))
+    return total
+
+
+def process_memory():
+    # 반환값: (현재 RSS 바이트, 최대 RSS 바이트)
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["VmRSS"].split()[0]) * 1024, int(fields["VmHWM"].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak *= 1 if sys.platform == "darwin" else 1024
+        return peak, peak
+
+
+class _Artifact:
+    __slots__ = ("value", "size", "last_used")
+
+    def __init__(self, value, size):
+        self.value = value
+        self.size = size
+        self.last_used = time.monotonic()
+
+
+class ArtifactStore:
+    def __init__(self, session_budget_bytes, process_budget_bytes, idle_seconds=0):
+        self.session_budget_bytes = int(session_budget_bytes)
+        self.process_budget_bytes = int(process_budget_bytes)
+        self.idle_seconds = idle_seconds
+
+        # (세션 id, 이름) -> _Artifact, 오래 쓰지 않은 순서
+        self._artifacts = OrderedDict()
+        self._session_bytes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"stored": 0, "rejected": 0, "evicted": 0, "expired": 0, "released": 0}
+
+    def put(self, session_id, name, value, size=None):
+        # 반환값: 보관했으면 True (세션 한도보다 크면 보관하지 않고 False)
+        size = approx_size(value) if size is None else int(size)
+        key = (session_id, name)
+        with self._lock:
+            self._remove(key)
+            if size > self.session_budget_bytes or size > self.process_budget_bytes:
+                self._counters["rejected"] += 1
+                return False
+            self._artifacts[key] = _Artifact(value, size)
+            self._session_bytes[session_id] = self._session_bytes.get(session_id, 0) + size
+            self._total_bytes += size
+            self._counters["stored"] += 1
+            self._expire_idle()
+            self._evict_session(session_id, keep=key)
+            self._evict_process(self.process_budget_bytes, keep=key)
+            return True
+
+    def get(self, session_id, name):
+        key = (session_id, name)
+        with self._lock:
+            self._expire_idle()
+            artifact = self._artifacts.get(key)
+            if artifact is None:
+                return None
+            artifact.last_used = time.monotonic()
+            self._artifacts.move_to_end(key)
+            return artifact.value
+
+    def discard(self, session_id, name):
+        with self._lock:
+            self._remove((session_id, name))
+
+    def shrink(self, target_bytes):
+        # 메모리 압박 시 전체 합계를 target_bytes 이하로 줄임. 반환값: 해제한 바이트
+        with self._lock:
+            before = self._total_bytes
+            self._evict_process(target_bytes)
+            return before - self._total_bytes
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return self._total_bytes
+
+    def session_bytes(self, session_id):
+        with self._lock:
+            return self._session_bytes.get(session_id, 0)
+
+    def stats(self, top_sessions=5):
+        with self._lock:
+            largest = sorted(self._session_bytes.items(), key=lambda item: item[1], reverse=True)[:top_sessions]
+            return {
+                "total_bytes": self._total_bytes,
+                "process_budget_bytes": self.process_budget_bytes,
+                "session_budget_bytes": self.session_budget_bytes,
+                "entries": len(self._artifacts),
+                "sessions": len(self._session_bytes),
+                "largest_sessions": [{"session": session_id[:8], "bytes": size} for session_id, size in largest],
+                **self._counters,
+            }
+
+    # 아래 함수들은 self._lock을 잡은 상태에서 호출
+    def _remove(self, key, counter=None):
+        artifact = self._artifacts.pop(key, None)
+        if artifact is None:
+            return
+        session_id = key[0]
+        remaining = self._session_bytes.get(session_id, 0) - artifact.size
+        if remaining > 0:
+            self._session_bytes[session_id] = remaining
+        else:
+            self._session_bytes.pop(session_id, None)
+        self._total_bytes -= artifact.size
+        if counter:
+            self._counters[counter] += 1
+
+    def _expire_idle(self):
+        if not self.idle_seconds or self.idle_seconds <= 0:
+            return
+        deadline = time.monotonic() - self.idle_seconds
+        # 오래 쓰지 않은 순서이므로 앞에서부터 만료된 것만 확인
+        while self._artifacts:
+            key, artifact = next(iter(self._artifacts.items()))
+            if artifact.last_used > deadline:
+                break
+            self._remove(key, "expired")
+
+    def _evict_session(self, session_id, keep=None):
+        if self._session_bytes.get(session_id, 0) <= self.session_budget_bytes:
+            return
+        for key in [key for key in self._artifacts if key[0] == session_id and key != keep]:
+            self._remove(key, "evicted")
+            if self._session_bytes.get(session_id, 0) <= self.session_budget_bytes:
+                return
+
+    def _evict_process(self, target_bytes, keep=None):
+        for key in list(self._artifacts):
+            if self._total_bytes <= target_bytes:
+                return
+            if key != keep:
+                self._remove(key, "evicted" if keep is not None else "released")
+
+
+# 프로세스 전체에서 하나만 사용
+ARTIFACTS = ArtifactStore(
+    config.SESSION_MEMORY_BUDGET_BYTES,
+    config.PROCESS_MEMORY_BUDGET_BYTES,
+    config.SESSION_ARTIFACT_IDLE_SECONDS,
+)
+
+# --- 메모리 압박 시 줄일 수 있는 프로세스 캐시 ---
+# shrink(목표 바이트)와 memory_bytes()가 있는 객체 (OcrCache 등)
+_releasable_caches = {}
+_pressure_lock = threading.Lock()
+_pressure_events = 0
+
+
+def register_releasable_cache(name, cache):
+    _releasable_caches[name] = cache
+
+
+def relieve_memory_pressure(rss_limit_bytes=None):
+    # RSS가 상한을 넘으면 보관소와 등록된 캐시를 절반으로 줄임. 반환값: 해제한 바이트 (대략)
+    global _pressure_events
+    rss_limit_bytes = config.PROCESS_RSS_SOFT_LIMIT_BYTES if rss_limit_bytes is None else rss_limit_bytes
+    if not rss_limit_bytes or rss_limit_bytes <= 0:
+        return 0
+    rss, _ = process_memory()
+    if rss <= rss_limit_bytes:
+        return 0
+    with _pressure_lock:
+        _pressure_events += 1
+        released = ARTIFACTS.shrink(ARTIFACTS.total_bytes // 2)
+        for cache in list(_releasable_caches.values()):
+            released += cache.shrink(cache.memory_bytes() // 2)
+    return released
+
+
+def memory_report(session_id=None, session_state=None):
+    # 관리자 화면용 메모리 현황
+    rss, peak = process_memory()
+    report = {
+        "rss_bytes": rss,
+        "peak_rss_bytes": peak,
+        "rss_soft_limit_bytes": config.PROCESS_RSS_SOFT_LIMIT_BYTES or None,
+        "pressure_events": _pressure_events,
+        "artifacts": ARTIFACTS.stats(),
+        "caches": {name: cache.memory_bytes() for name, cache in _releasable_caches.items()},
+    }
+    if session_id is not None:
+        report["this_session_artifact_bytes"] = ARTIFACTS.session_bytes(session_id)
+    if session_state is not None:
+        report["this_session_state_bytes"] = {key: approx_size(value) for key, value in session_state.items()}
+    return report
+
+
+def current_session_id():
+    # Streamlit 스크립트 스레드에서 호출하면 세션 id, 그 밖(배치 작업 등)에서는 "process"
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else "process"
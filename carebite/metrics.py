@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from carebite import config
+
+# --- 단계별 지연 시간/데이터 크기 계측 ---
+# 분석 파이프라인의 각 단계(OCR, 파싱, 피처 엔지니어링, 예측)의
+# 소요 시간과 처리한 데이터 크기를 최근 N건 롤링 윈도우에 기록하고
+# p50/p95/p99와 Prometheus 텍스트 형식으로 내보냅니다. 프로세스 전체에서 하나의 레지스트리를 공유합니다.
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# 단계 이름과 화면 표시 이름 (기록 순서대로 표시)
+STAGE_LABELS = {
+    "image_prep": "이미지 정규화",
+    "ocr_queue_wait": "OCR 대기열 대기",
+    "ocr_rate_wait": "OCR 호출량 제한 대기",
+    "ocr": "OCR 호출",
+    "ocr_batch": "OCR 일괄 호출",
+    "parse": "텍스트 파싱",
+    "features": "피처 엔지니어링",
+    "predict": "예측",
+    "model_load": "모델 로드/검증",
+    "api_score": "API 점수화 요청",
+}
+
+
+class RollingHistogram:
+    def __init__(self, window):
+        self._values = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self._values.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self, quantiles=QUANTILES):
+        values = sorted(self._values)
+        if not values:
+            return {q: None for q in quantiles}
+        last = len(values) - 1
+        return {q: values[min(last, int(round(q * last)))] for q in quantiles}
+
+
+class _Timing:
+    def __init__(self, size):
+        self.size = size
+
+
+class MetricsRegistry:
+    def __init__(self, window=1024, textfile_path=None, textfile_interval_seconds=15.0):
+        self.window = window
+        self.textfile_path = textfile_path
+        self.textfile_interval_seconds = textfile_interval_seconds
+        self._durations = {}
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._last_textfile_write = 0.0
+
+    def observe(self, stage, seconds, size=None):
+        with self._lock:
+            self._durations.setdefault(stage, RollingHistogram(self.window)).add(seconds)
+            if size is not None:
+                self._sizes.setdefault(stage, RollingHistogram(self.window)).add(size)
+        self._maybe_write_textfile()
+
+    @contextmanager
+    def timed(self, stage, size=None):
+        # 블록 안에서 timing.size를 바꾸면 처리한 데이터 크기로 함께 기록됩니다.
+        timing = _Timing(size)
+        started = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            self.observe(stage, time.perf_counter() - started, timing.size)
+
+    def snapshot(self):
+        rows = []
+        with self._lock:
+            order = list(STAGE_LABELS)
+            stages = sorted(self._durations, key=lambda s: (order.index(s) if s in order else len(order), s))
+            for stage in stages:
+                durations = self._durations[stage]
+                duration_q = durations.quantiles()
+                sizes = self._sizes.get(stage)
+                size_q = sizes.quantiles() if sizes else {q: None for q in QUANTILES}
+                rows.append({
+                    "stage": stage,
+                    "label": STAGE_LABELS.get(stage, stage),
+                    "count": durations.count,
+                    "p50_ms": _to_ms(duration_q[0.5]),
+                    "p95_ms": _to_ms(duration_q[0.95]),
+                    "p99_ms": _to_ms(duration_q[0.99]),
+                    "size_p50": size_q[0.5],
+                    "size_p99": size_q[0.99],
+                })
+        return rows
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            lines.extend(_summary_lines(
+                "carebite_stage_duration_seconds",
+                "Analysis pipeline stage duration in seconds (rolling window quantiles)",
+                self._durations,
+            ))
+            lines.extend(_summary_lines(
+                "carebite_stage_payload_size",
+                "Payload size handled by each stage (bytes, characters or rows; rolling window quantiles)",
+                self._sizes,
+            ))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._sizes.clear()
+
+    def _maybe_write_textfile(self):
+        # node_exporter textfile collector 등에서 읽을 수 있도록 주기적으로 파일에 기록
+        if not self.textfile_path:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_textfile_write < self.textfile_interval_seconds:
+                return
+            self._last_textfile_write = now
+        tmp_path = f"{self.textfile_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, self.textfile_path)
+        except OSError:
+            pass
+
+
+def _to_ms(seconds):
+    return None if seconds is None else seconds * 1000.0
+
+
+def _summary_lines(name, help_text, histograms):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+    for stage in sorted(histograms):
+        histogram = histograms[stage]
+        for q, value in histogram.quantiles().items():
+            if value is not None:
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {value:.9g}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total:.9g}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+    return lines
+
+
+REGISTRY = MetricsRegistry(
+    window=config.METRICS_WINDOW,
+    textfile_path=config.METRICS_TEXTFILE,
+)
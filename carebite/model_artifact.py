@@ -0,0 +1,180 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from carebite import config
+from carebite.scoring import MODEL_FEATURES, ScoringEngine
+
+# --- sklearn 없이 읽는 모델 아티팩트 ---
+# 로지스틱 회귀 계수/절편, 스케일러 평균/표준편차, 피처 순서, 위험 등급 경계를
+# 버전이 있는 JSON 파일 하나에 저장합니다. 로드는 json + NumPy만 사용하므로
+# 예측 경로에서 scikit-learn 임포트와 pickle 역직렬화가 없습니다.
+#
+#   python -m carebite.model_artifact export                    # model/*.pkl -> model/scoring_model.json
+#   python -m carebite.model_artifact export --model m.pkl --scaler s.pkl -o out.json
+#   python -m carebite.model_artifact show model/scoring_model.json
+#
+# 코드의 피처 스키마(MODEL_FEATURES)와 아티팩트의 피처 목록/스키마 해시가 다르면 로드를 거부하고,
+# 함께 저장된 기준 입력의 예측값이 다시 계산한 값과 다르면 손상된 것으로 봅니다.
+
+ARTIFACT_FORMAT = "carebite-logistic-regression"
+ARTIFACT_VERSION = 1
+MODEL_ARTIFACT_PATH = config.MODEL_ARTIFACT_PATH
+
+# 기준 입력 예측값 비교 허용 오차 (sklearn 비교와 같은 기준)
+REFERENCE_TOLERANCE = 1e-9
+REFERENCE_ROWS = 4
+
+
+class ModelArtifactError(ValueError):
+    pass
+
+
+def feature_schema_hash(feature_names=MODEL_FEATURES):
+    payload = json.dumps(list(feature_names), ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+# --- 내보내기 ---
+def build_artifact(model, scaler, risk_thresholds, feature_names=MODEL_FEATURES):
+    engine = ScoringEngine.from_sklearn(model, scaler, feature_names)
+    engine.verify_against_sklearn(model, scaler)
+
+    scaled_features = list(scaler.feature_names_in_)
+    # 평균값 근처의 입력과 결측값이 섞인 입력으로 기준 예측값을 남겨 로드 시 다시 확인
+    rng = np.random.default_rng(0)
+    reference_inputs = rng.normal(size=(REFERENCE_ROWS, len(feature_names)))
+    scaled_index = [list(feature_names).index(name) for name in scaled_features]
+    reference_inputs[:, scaled_index] = reference_inputs[:, scaled_index] * scaler.scale_ + scaler.mean_
+    reference_inputs[-1, ::3] = np.nan
+
+    content = {
+        "features": list(feature_names),
+        "coef": np.asarray(model.coef_, dtype=np.float64)[0].tolist(),
+        "intercept": float(model.intercept_[0]),
+        "scaler": {
+            "features": scaled_features,
+            "mean": np.asarray(scaler.mean_, dtype=np.float64).tolist(),
+            "scale": np.asarray(scaler.scale_, dtype=np.float64).tolist(),
+        },
+        "risk_thresholds": [float(t) for t in risk_thresholds],
+        "reference": {
+            "inputs": [[None if np.isnan(v) else float(v) for v in row] for row in reference_inputs],
+            "proba": engine.predict_proba(reference_inputs).tolist(),
+        },
+    }
+    return {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "schema_hash": feature_schema_hash(feature_names),
+        # 아티팩트 내용이 바뀌면 달라지는 모델 식별자 (예측 기록/캐시 키에 사용)
+        "model_id": _content_digest(content),
+        **content,
+    }
+
+
+def write_artifact(artifact, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def export_from_sklearn(model_path, scaler_path, output_path, risk_thresholds):
+    from joblib import load
+
+    artifact = build_artifact(load(model_path), load(scaler_path), risk_thresholds)
+    write_artifact(artifact, output_path)
+    return artifact
+
+
+# --- 로드 ---
+def load_artifact(path=MODEL_ARTIFACT_PATH, feature_names=MODEL_FEATURES):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            artifact = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ModelArtifactError(f"모델 아티팩트를 읽을 수 없습니다: {path} ({e})") from e
+    return engine_from_artifact(artifact, feature_names)
+
+
+def engine_from_artifact(artifact, feature_names=MODEL_FEATURES):
+    if artifact.get("format") != ARTIFACT_FORMAT:
+        raise ModelArtifactError(f"모델 아티팩트 형식이 아닙니다: {artifact.get('format')}")
+    if artifact.get("version") != ARTIFACT_VERSION:
+        raise ModelArtifactError(
+            f"지원하지 않는 모델 아티팩트 버전입니다: {artifact.get('version')} (지원: {ARTIFACT_VERSION})"
+        )
+    artifact_hash = feature_schema_hash(artifact.get("features") or [])
+    if artifact_hash != artifact.get("schema_hash"):
+        raise ModelArtifactError("모델 아티팩트의 스키마 해시가 피처 목록과 일치하지 않습니다 (파일 손상).")
+    expected_hash = feature_schema_hash(feature_names)
+    if artifact_hash != expected_hash:
+        raise ModelArtifactError(
+            f"모델 아티팩트의 피처 스키마({artifact_hash})가 코드의 피처 스키마({expected_hash})와 다릅니다. "
+            "모델을 다시 내보내세요."
+        )
+
+    try:
+        scaler = artifact["scaler"]
+        engine = ScoringEngine.from_parameters(
+            artifact["coef"],
+            artifact["intercept"],
+            scaler["features"],
+            scaler["mean"],
+            scaler["scale"],
+            feature_names,
+            risk_thresholds=artifact["risk_thresholds"],
+            version=artifact["model_id"],
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ModelArtifactError(f"모델 아티팩트 내용이 올바르지 않습니다: {e}") from e
+
+    reference = artifact.get("reference")
+    if reference:
+        inputs = np.array(
+            [[np.nan if v is None else v for v in row] for row in reference["inputs"]], dtype=np.float64
+        )
+        max_error = float(np.max(np.abs(engine.predict_proba(inputs) - np.asarray(reference["proba"]))))
+        if max_error > REFERENCE_TOLERANCE:
+            raise ModelArtifactError(f"모델 아티팩트의 기준 예측값과 결과가 다릅니다 (최대 오차 {max_error:.3g}).")
+    return engine
+
+
+def _content_digest(content):
+    payload = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def main(argv=None):
+    from carebite import pipeline
+    from carebite.risk_levels import RISK_THRESHOLDS
+
+    parser = argparse.ArgumentParser(description="예측 모델 아티팩트 내보내기/확인")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="sklearn 모델/스케일러(pkl)를 JSON 아티팩트로 내보내기")
+    export_parser.add_argument("--model", default=pipeline.MODEL_PATH, help="로지스틱 회귀 모델 경로")
+    export_parser.add_argument("--scaler", default=pipeline.SCALER_PATH, help="스케일러 경로")
+    export_parser.add_argument("-o", "--output", default=MODEL_ARTIFACT_PATH, help="아티팩트 경로")
+
+    show_parser = subparsers.add_parser("show", help="아티팩트를 검증하고 요약 출력")
+    show_parser.add_argument("path", nargs="?", default=MODEL_ARTIFACT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        artifact = export_from_sklearn(args.model, args.scaler, args.output, RISK_THRESHOLDS)
+        print(f"{args.output} (model_id={artifact['model_id']}, schema={artifact['schema_hash']})", file=sys.stderr)
+    else:
+        engine = load_artifact(args.path)
+        print(f"model_id={engine.version} 피처 {len(engine.feature_names)}개 위험 등급 경계={engine.risk_thresholds}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
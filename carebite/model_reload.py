@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from carebite import config
+from carebite import model_artifact
+from carebite import pipeline
+from carebite.risk_levels import RISK_THRESHOLDS
+from carebite.metrics import REGISTRY as metrics
+
+# --- 예측 모델 무중단 교체 ---
+# model/ 아래 모델 파일(JSON 아티팩트, pkl 모델/스케일러)의 크기/수정 시각을 주기적으로 확인하고,
+# 바뀌면 백그라운드 스레드에서 새 예측 엔진을 로드 -> 검증(카나리 예측) -> 교체합니다. (서버 재시작 없음)
+#   - 파일을 쓰는 도중에 읽지 않도록, 바뀐 상태가 다음 확인 때까지 그대로일 때 로드
+#   - 바뀐 쪽 파일에서 로드: 아티팩트가 바뀌었으면 아티팩트, pkl만 바뀌었으면 pkl
+#     (처음 로드는 load_scoring_engine과 같은 순서)
+#   - 아티팩트가 있는데 pkl만 바뀌었으면 새 pkl로 아티팩트를 다시 만들어(기존 위험 등급 경계 유지) 검증 후 덮어씀
+#     재시작하면 아티팩트를 먼저 읽으므로, 이렇게 해야 교체한 모델과 재시작 후 모델이 같음
+#   - 로드/검증에 실패하면 기존 모델을 계속 쓰고, 파일이 다시 바뀌면 재시도
+#   - 교체는 참조 하나를 바꾸는 것이므로 요청(rerun)은 처음 받은 엔진으로 끝까지 예측 (진행 중인 요청은 이전 버전으로 마무리)
+# 예측 기록/결과는 엔진의 version(아티팩트 model_id 또는 파라미터 해시)으로 구분하므로 교체 후에는 새 버전으로 다시 계산됩니다.
+
+# 카나리 예측 입력: 샘플 검진 결과와 모든 항목이 결측인 레코드
+CANARY_RECORDS = (
+    {
+        "나이": 45, "성별": "남성", "신장": 175, "체중": 72, "수축기 혈압": 135, "이완기 혈압": 85,
+        "혈색소": 14.2, "공복 혈당": 98.0, "총 콜레스테롤": 210.0, "HDL 콜레스테롤": 50.0,
+        "트리글리세라이드": 150.0, "LDL 콜레스테롤": 130.0, "혈청 크레아티닌": 0.9,
+        "AST": 25.0, "ALT": 30.0, "감마지티피": 40.0, "요단백": "정상",
+    },
+    {},
+)
+
+
+def canary_check(engine):
+    # 한 건 경로와 여러 건 경로의 예측이 같고 0~1 범위인지, 위험 등급 경계가 올바른지 확인
+    # 반환값: 카나리 입력별 예측 확률 (첫 예측으로 엔진도 미리 데워 둠)
+    single = [float(engine.predict_proba(pipeline.build_features(record))) for record in CANARY_RECORDS]
+    batch = engine.predict_proba(pipeline.build_model_input(list(CANARY_RECORDS)))
+    if not all(0.0 <= p <= 1.0 for p in single):
+        raise ValueError(f"카나리 예측 확률이 0~1 범위를 벗어났습니다: {single}")
+    if not np.array_equal(np.asarray(single), batch):
+        raise ValueError(f"카나리 예측의 한 건/여러 건 결과가 다릅니다: {single} != {batch.tolist()}")
+    pipeline.risk_thresholds(engine)
+    return single
+
+
+class ModelReloader:
+    def __init__(self, artifact_path=pipeline.MODEL_ARTIFACT_PATH, model_path=pipeline.MODEL_PATH,
+                 scaler_path=pipeline.SCALER_PATH, interval_seconds=10.0):
+        self.paths = {"artifact": artifact_path, "model": model_path, "scaler": scaler_path}
+        self.interval_seconds = interval_seconds
+
+        self._engine = None
+        self._lock = threading.Lock()
+        self._loaded_signature = None
+        self._pending_signature = None
+        self._failed_signature = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.source = None
+        self.loaded_at = None
+        self.previous_version = None
+        self.canary = None
+        self.last_error = None
+        self._counters = {"checks": 0, "reloads": 0, "failures": 0, "artifact_exports": 0}
+
+    def current(self):
+        # 요청 하나에서 한 번만 호출하고 받은 엔진을 끝까지 사용
+        return self._engine
+
+    # --- 로드 ---
+    def load(self):
+        # 처음 로드 (호출한 스레드에서 바로). 반환값: 로드한 엔진 또는 None (last_error에 이유)
+        self._swap_in(self._signature(), None)
+        return self._engine
+
+    def check(self):
+        # 파일이 바뀌었는지 한 번 확인. 반환값: 새 엔진으로 교체했으면 True
+        signature = self._signature()
+        with self._lock:
+            self._counters["checks"] += 1
+        if signature == self._loaded_signature or signature == self._failed_signature:
+            self._pending_signature = None
+            return False
+        if signature != self._pending_signature:
+            # 바뀐 직후에는 쓰는 중일 수 있으므로 다음 확인까지 기다림
+            self._pending_signature = signature
+            return False
+        self._pending_signature = None
+        return self._swap_in(signature, self._changed_source(signature))
+
+    def _signature(self):
+        signature = {}
+        for name, path in self.paths.items():
+            try:
+                stat = os.stat(path)
+                signature[name] = (stat.st_mtime_ns, stat.st_size)
+            except (OSError, TypeError):
+                signature[name] = None
+        return signature
+
+    def _changed_source(self, signature):
+        loaded = self._loaded_signature or {}
+        changed = {name for name, value in signature.items() if loaded.get(name) != value}
+        if "artifact" not in changed and changed & {"model", "scaler"} and signature["model"] and signature["scaler"]:
+            return "sklearn"
+        return None
+
+    def _artifact_exists(self):
+        artifact_path = self.paths["artifact"]
+        return bool(artifact_path) and os.path.exists(artifact_path)
+
+    def _rebuild_artifact(self):
+        # 바뀐 pkl로 아티팩트 내용을 만듦 (파일은 검증 후에 씀). 위험 등급 경계는 기존 아티팩트 값을 유지
+        from joblib import load
+
+        try:
+            with open(self.paths["artifact"], "r", encoding="utf-8") as f:
+                thresholds = json.load(f).get("risk_thresholds")
+        except (OSError, ValueError, AttributeError):
+            thresholds = None
+        return model_artifact.build_artifact(
+            load(self.paths["model"]), load(self.paths["scaler"]), thresholds or RISK_THRESHOLDS
+        )
+
+    def _swap_in(self, signature, source):
+        try:
+            with metrics.timed("model_load"):
+                artifact = None
+                if source == "sklearn" and self._artifact_exists():
+                    artifact = self._rebuild_artifact()
+                    engine = model_artifact.engine_from_artifact(artifact)
+                    source = "artifact"
+                elif source == "sklearn":
+                    engine = pipeline.load_sklearn_engine(self.paths["model"], self.paths["scaler"])
+                else:
+                    engine = pipeline.load_scoring_engine(
+                        self.paths["artifact"], self.paths["model"], self.paths["scaler"]
+                    )
+                    source = "artifact" if self._artifact_exists() else "sklearn"
+                canary = canary_check(engine)
+                if artifact is not None:
+                    # 검증을 통과한 뒤에만 덮어쓰고, 덮어쓴 아티팩트까지 포함한 상태를 로드한 상태로 기록
+                    model_artifact.write_artifact(artifact, self.paths["artifact"])
+                    signature = self._signature()
+        except Exception as e:
+            with self._lock:
+                self._failed_signature = signature
+                self._counters["failures"] += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            return False
+
+        with self._lock:
+            if self._engine is not None:
+                self.previous_version = self._engine.version
+                self._counters["reloads"] += 1
+            self._engine = engine
+            self._loaded_signature = signature
+            if artifact is not None:
+                self._counters["artifact_exports"] += 1
+            self._failed_signature = None
+            self.source = source
+            self.loaded_at = time.time()
+            self.canary = canary
+            self.last_error = None
+        return True
+
+    # --- 백그라운드 확인 ---
+    def start(self):
+        if self._thread is not None or not self.interval_seconds or self.interval_seconds <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name="model-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                with self._lock:
+                    self.last_error = f"{type(e).__name__}: {e}"
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self._engine.version if self._engine is not None else None,
+                "source": self.source,
+                "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.loaded_at)) if self.loaded_at else None,
+                "previous_version": self.previous_version,
+                "watching": self._thread is not None,
+                "interval_seconds": self.interval_seconds,
+                "canary": self.canary,
+                "last_error": self.last_error,
+                **self._counters,
+            }
+
+
+# --- 프로세스 전체에서 하나 ---
+# 이미지 분석/코호트 페이지가 같은 엔진을 쓰고, model/ 확인 스레드도 하나만 돕니다.
+_shared_reloader = None
+_shared_lock = threading.Lock()
+
+
+def shared_reloader(load=True):
+    # 처음 호출할 때 모델을 로드하고 (CAREBITE_MODEL_RELOAD_INTERVAL_SECONDS > 0이면) 변경 확인을 시작
+    # load=False: 아직 로드 전이면 로드하지 않고 None (관리자 화면 등)
+    global _shared_reloader
+    with _shared_lock:
+        if _shared_reloader is None and load:
+            reloader = ModelReloader(interval_seconds=config.MODEL_RELOAD_INTERVAL_SECONDS)
+            reloader.load()
+            reloader.start()
+            _shared_reloader = reloader
+        return _shared_reloader
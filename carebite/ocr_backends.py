@@ -0,0 +1,179 @@
+import os
+import random
+import threading
+import time
+
+from carebite import config
+from carebite.ocr_cache import image_digest
+from carebite.ocr_client import call_with_deadline, detect_document_text
+from carebite.ocr_layout import words_from_annotation, words_from_text
+
+# --- OCR 백엔드 ---
+# 페이지와 배치 작업은 이 인터페이스만 사용하며, 실제 구현은 설정(CAREBITE_OCR_BACKEND)으로 고릅니다.
+#   vision: Google Cloud Vision API (document_text_detection / batch_annotate_images)
+#   local : 네트워크/인증 정보 없이 고정 텍스트를 돌려주는 대체 구현 (부하 테스트/벤치마크용)
+# 두 구현 모두 call_with_deadline을 거치므로 제한 시간/재시도 동작은 같습니다.
+
+
+class OcrBackend:
+    name = "base"
+    # 일괄 요청 하나에 담을 수 있는 최대 이미지 수/크기
+    max_batch_images = 16
+    max_batch_bytes = 8 * 1024 * 1024
+    # 호출량 제한기 (OcrDispatcher가 설정). 이미지 한 장당 토큰 하나를 시도마다 소비합니다.
+    rate_limiter = None
+
+    def _before_attempt(self, units):
+        if self.rate_limiter is None:
+            return None
+        return lambda: self.rate_limiter.acquire(units)
+
+    def detect_text(self, image_content, on_wait=None, on_retry=None):
+        # 반환값: (추출된 텍스트, 오류 메시지, 단어 배치)
+        # 단어 배치: [(텍스트, x0, y0, x1, y1, 신뢰도), ...] 또는 None (carebite.ocr_layout)
+        raise NotImplementedError
+
+    def detect_texts(self, image_contents):
+        # 이미지 여러 장을 한 번의 요청으로 처리합니다. 반환값: [(텍스트, 오류 메시지, 단어 배치), ...]
+        return [self.detect_text(content) for content in image_contents]
+
+
+class VisionOcrBackend(OcrBackend):
+    name = "vision"
+
+    def __init__(self, client=None, credentials_info=None):
+        # client를 주지 않으면 첫 OCR 요청 때 만듭니다. (google.cloud.vision 임포트와
+        # gRPC 채널 생성을 랜딩 페이지/결과 페이지의 시작 시간에서 제외)
+        self._client = client
+        self._credentials_info = credentials_info
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                self._client = _create_vision_client(self._credentials_info)
+            return self._client
+
+    def detect_text(self, image_content, on_wait=None, on_retry=None):
+        return detect_document_text(
+            self.client, image_content, on_wait=on_wait, on_retry=on_retry, before_attempt=self._before_attempt(1)
+        )
+
+    def detect_texts(self, image_contents):
+        from google.cloud import vision
+
+        feature = vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)
+        requests = [
+            vision.AnnotateImageRequest(image=vision.Image(content=content), features=[feature])
+            for content in image_contents
+        ]
+
+        def request(timeout):
+            # 재시도는 call_with_deadline에서 처리하므로 클라이언트 자체 재시도는 끔
+            return self.client.batch_annotate_images(requests=requests, timeout=timeout, retry=None)
+
+        response = call_with_deadline(request, before_attempt=self._before_attempt(len(requests)))
+        return [
+            (result.full_text_annotation.text, result.error.message, words_from_annotation(result.full_text_annotation))
+            for result in response.responses
+        ]
+
+
+# 로컬 백엔드가 픽스처를 찾지 못했을 때 돌려주는 예시 검진 결과 텍스트
+SAMPLE_OCR_TEXT = """건강검진 결과
+나이
+45세
+성별
+남성
+키(cm)/몸무게(kg) 175(cm)/72(kg)
+고혈압 135 / 85 mmHg
+혈색소(g/dL) 14.2
+공복혈당(mg/dL) 98
+총콜레스테롤(mg/dL) 210
+고밀도 콜레스테롤(mg/dL) 50
+중성지방(mg/dL) 150
+저밀도 콜레스테롤(mg/dL) 130
+혈청 크레아티닌(mg/dL) 0.9
+AST(SGOT) 25
+ALT(SGPT) 30
+감마지티피 40
+요단백 정상
+"""
+
+
+class LocalOcrBackend(OcrBackend):
+    name = "local"
+
+    def __init__(self, fixtures_dir=None, latency_seconds=0.0, latency_jitter_seconds=0.0, default_text=SAMPLE_OCR_TEXT):
+        # fixtures_dir: '<이미지 sha256>.txt' 파일로 이미지별 텍스트를 지정하고,
+        # 'default.txt'가 있으면 일치하는 픽스처가 없을 때 사용합니다.
+        # 단어 배치는 텍스트의 줄/글자 위치로 만든 가상 배치입니다. (ocr_layout.words_from_text)
+        self.fixtures_dir = fixtures_dir
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.default_text = default_text
+
+        if fixtures_dir:
+            default_path = os.path.join(fixtures_dir, "default.txt")
+            if os.path.exists(default_path):
+                with open(default_path, "r", encoding="utf-8") as f:
+                    self.default_text = f.read()
+
+    def _simulate_latency(self):
+        delay = self.latency_seconds
+        if self.latency_jitter_seconds > 0:
+            delay += random.uniform(0, self.latency_jitter_seconds)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _lookup_text(self, image_content):
+        if self.fixtures_dir:
+            fixture_path = os.path.join(self.fixtures_dir, f"{image_digest(image_content)}.txt")
+            if os.path.exists(fixture_path):
+                with open(fixture_path, "r", encoding="utf-8") as f:
+                    return f.read()
+        return self.default_text
+
+    def detect_text(self, image_content, on_wait=None, on_retry=None):
+        def request(timeout):
+            self._simulate_latency()
+            text = self._lookup_text(image_content)
+            return text, None, words_from_text(text)
+
+        return call_with_deadline(request, on_wait=on_wait, on_retry=on_retry, before_attempt=self._before_attempt(1))
+
+    def detect_texts(self, image_contents):
+        def request(timeout):
+            # 일괄 요청 한 번에 지연 한 번 (Vision batch 호출과 같은 형태)
+            self._simulate_latency()
+            texts = [self._lookup_text(content) for content in image_contents]
+            return [(text, None, words_from_text(text)) for text in texts]
+
+        return call_with_deadline(request, before_attempt=self._before_attempt(len(image_contents)))
+
+
+def _create_vision_client(credentials_info=None):
+    from google.cloud import vision
+
+    if credentials_info:
+        from google.oauth2 import service_account
+
+        # 인증 정보를 파일로 쓰지 않고 메모리에서 바로 사용
+        credentials = service_account.Credentials.from_service_account_info(credentials_info)
+        return vision.ImageAnnotatorClient(credentials=credentials)
+    return vision.ImageAnnotatorClient()
+
+
+def create_ocr_backend(backend_name=None, credentials_info=None):
+    # credentials_info: 서비스 계정 정보 dict (없으면 GOOGLE_APPLICATION_CREDENTIALS 등 기본 인증 사용)
+    backend_name = (backend_name or config.OCR_BACKEND).lower()
+    if backend_name == "local":
+        return LocalOcrBackend(
+            fixtures_dir=config.LOCAL_OCR_FIXTURES_DIR,
+            latency_seconds=config.LOCAL_OCR_LATENCY_SECONDS,
+            latency_jitter_seconds=config.LOCAL_OCR_LATENCY_JITTER_SECONDS,
+        )
+    if backend_name == "vision":
+        return VisionOcrBackend(credentials_info=dict(credentials_info) if credentials_info else None)
+    raise ValueError(f"알 수 없는 OCR 백엔드입니다: {backend_name} (vision 또는 local)")
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from carebite.metrics import REGISTRY as metrics
+from carebite.ocr_cache import image_digest
+
+# --- 여러 이미지 일괄 OCR ---
+# OCR 백엔드의 일괄 요청 하나에 담을 수 있는 이미지 수와 요청 크기 제한에 맞춰
+# 묶음을 나누고, 묶음들은 제한된 스레드 풀에서 동시에 호출합니다.
+
+
+def _chunk_keys(keys, images_by_key, max_images, max_bytes):
+    chunks = []
+    current = []
+    current_bytes = 0
+    for key in keys:
+        size = len(images_by_key[key])
+        if current and (len(current) >= max_images or current_bytes + size > max_bytes):
+            chunks.append(current)
+            current = []
+            current_bytes = 0
+        current.append(key)
+        current_bytes += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _annotate_chunk(ocr_backend, chunk_keys, images_by_key):
+    chunk_images = [images_by_key[key] for key in chunk_keys]
+    with metrics.timed("ocr_batch", size=sum(len(content) for content in chunk_images)):
+        results = ocr_backend.detect_texts(chunk_images)
+    return [(key, text, error, words) for key, (text, error, words) in zip(chunk_keys, results)]
+
+
+def detect_texts_batch(ocr_backend, images, ocr_cache, max_workers=4, prepare_image=None):
+    # images: 이미지 바이트 리스트. 반환값은 입력 순서와 같은 OCR 캐시 항목 리스트입니다.
+    # prepare_image: 캐시에 없는 이미지만 전송 전에 변환하는 함수 (bytes -> bytes)
+    keys = [image_digest(content) for content in images]
+    results = [None] * len(images)
+
+    images_by_key = {}
+    pending_indices = {}
+    for index, (key, content) in enumerate(zip(keys, images)):
+        if key in pending_indices:
+            # 같은 배치 안에서 중복된 이미지는 한 번만 호출
+            pending_indices[key].append(index)
+            continue
+        entry = ocr_cache.get(key)
+        if entry is not None:
+            results[index] = entry
+            continue
+        images_by_key[key] = prepare_image(content) if prepare_image else content
+        pending_indices[key] = [index]
+
+    if not pending_indices:
+        return results
+
+    chunks = _chunk_keys(
+        list(pending_indices), images_by_key, ocr_backend.max_batch_images, ocr_backend.max_batch_bytes
+    )
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        futures = [(chunk, pool.submit(_annotate_chunk, ocr_backend, chunk, images_by_key)) for chunk in chunks]
+        for chunk, future in futures:
+            try:
+                annotated = [
+                    (key, ocr_cache.put(key, text, error, words)) for key, text, error, words in future.result()
+                ]
+            except Exception as e:
+                # 호출 자체가 실패한 묶음은 캐시에 저장하지 않고 오류만 기록
+                annotated = [(key, {"text": "", "error": str(e), "words": None}) for key in chunk]
+            for key, entry in annotated:
+                for index in pending_indices[key]:
+                    results[index] = entry
+
+    return results
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from carebite.memory import approx_size
+
+# --- 이미지 내용 기반 OCR 결과 캐시 ---
+# 같은 이미지 바이트에 대해 Vision API를 다시 호출하지 않도록
+# 이미지 해시를 키로 OCR 텍스트, 오류 메시지, 단어 배치(좌표 포함)를 저장합니다.
+# 1차: 프로세스 내 LRU 메모리 캐시 (항목 수 + 바이트 한도), 2차(선택): 용량/TTL 제한이 있는 디스크 캐시
+# 오류(할당량 초과, 시간 초과 등)가 담긴 결과는 일시적일 수 있으므로 메모리에만 짧게(error_ttl_seconds) 보관하고
+# 디스크에는 쓰지 않습니다. (같은 rerun/재시도 사이에는 Vision API를 다시 부르지 않고, 잠시 뒤에는 다시 시도)
+
+
+def image_digest(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class OcrCache:
+    def __init__(self, max_entries=256, disk_dir=None, disk_max_bytes=256 * 1024 * 1024, ttl_seconds=0,
+                 max_memory_bytes=0, error_ttl_seconds=60):
+        self.max_entries = max(1, int(max_entries))
+        # 메모리 계층 바이트 한도 (0 이하이면 항목 수로만 제한)
+        self.max_memory_bytes = int(max_memory_bytes or 0)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = int(disk_max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.error_ttl_seconds = error_ttl_seconds
+
+        self._memory = OrderedDict()
+        self._memory_sizes = {}
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._disk_bytes = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+
+    def _is_expired(self, created_at, now=None):
+        if not self.ttl_seconds or self.ttl_seconds <= 0:
+            return False
+        return ((now or time.time()) - created_at) > self.ttl_seconds
+
+    def _is_entry_expired(self, entry):
+        if entry.get("error"):
+            return (time.time() - entry["created_at"]) > self.error_ttl_seconds
+        return self._is_expired(entry["created_at"])
+
+    # --- 조회 ---
+    def get(self, key, record_stats=True):
+        # record_stats=False: 세션이 이미 받은 결과를 다시 읽는 경우 (적중률 통계에 넣지 않음)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._is_entry_expired(entry):
+                    self._forget(key)
+                else:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += record_stats
+                    return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is not None:
+                self.disk_hits += record_stats
+                self._remember(key, entry)
+                return entry
+            self.misses += record_stats
+            return None
+
+    # --- 저장 ---
+    def put(self, key, text, error=None, words=None):
+        entry = {
+            "text": text or "",
+            "error": error or None,
+            "words": words or None,
+            "created_at": time.time(),
+        }
+        with self._lock:
+            self._remember(key, entry)
+        if not entry["error"]:
+            self._write_disk(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        self._forget(key)
+        size = approx_size(entry)
+        self._memory[key] = entry
+        self._memory_sizes[key] = size
+        self._memory_bytes += size
+        while len(self._memory) > self.max_entries or self._over_memory_budget():
+            self._forget(next(iter(self._memory)))
+
+    def _over_memory_budget(self):
+        # 방금 넣은 항목 하나만 남았다면 한도보다 커도 유지 (디스크 계층과 같은 결과를 돌려주기 위해)
+        return self.max_memory_bytes > 0 and self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1
+
+    def _forget(self, key):
+        if self._memory.pop(key, None) is not None:
+            self._memory_bytes -= self._memory_sizes.pop(key)
+
+    # --- 메모리 압박 시 해제 (carebite.memory.relieve_memory_pressure) ---
+    def memory_bytes(self):
+        with self._lock:
+            return self._memory_bytes
+
+    def shrink(self, target_bytes):
+        # 메모리 계층을 target_bytes 이하로 줄임 (디스크 계층은 그대로). 반환값: 해제한 바이트
+        with self._lock:
+            before = self._memory_bytes
+            while self._memory and self._memory_bytes > target_bytes:
+                self._forget(next(iter(self._memory)))
+            return before - self._memory_bytes
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (hits / lookups) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    # --- 디스크 계층 ---
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # 오류 결과는 디스크에 쓰지 않음 (이전에 쓴 것이 남아 있으면 지우고 다시 시도)
+        if entry.get("error") or self._is_expired(entry.get("created_at", 0)):
+            self._remove_disk_file(path)
+            return None
+        return entry
+
+    def _write_disk(self, key, entry):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            # 같은 키를 덮어쓰는 경우 기존 파일 크기만큼은 이미 합계에 들어 있으므로 차이만 더함
+            try:
+                previous_size = os.path.getsize(path)
+            except FileNotFoundError:
+                previous_size = 0
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError:
+            self._remove_disk_file(tmp_path)
+            return
+
+        with self._lock:
+            self._disk_bytes += size - previous_size
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _scan_disk(self):
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict_disk(self):
+        # 만료된 항목을 먼저 지우고, 그래도 용량을 넘으면 오래된 순서로 삭제합니다.
+        now = time.time()
+        entries = sorted(self._scan_disk(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.disk_max_bytes * 0.9)
+
+        for path, size, mtime in entries:
+            if self._is_expired(mtime, now) or total > target:
+                if self._remove_disk_file(path):
+                    total -= size
+
+        with self._lock:
+            self._disk_bytes = total
+
+    @staticmethod
+    def _remove_disk_file(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from carebite import config
+from carebite.ocr_layout import words_from_annotation
+
+# --- 제한 시간과 재시도가 있는 Vision API 호출 ---
+# Vision API 호출을 별도 스레드 풀에서 실행하고, 스크립트 스레드는 제한 시간까지만 기다립니다.
+# 일시적인 오류(시간 초과, 할당량 초과, 서버 오류)는 지터를 준 지수 백오프로 재시도합니다.
+# 호출에도 같은 timeout을 넘기므로, 응답이 없는 요청은 gRPC 데드라인에서 끊어져 스레드가 반환됩니다.
+
+
+class OcrTimeoutError(TimeoutError):
+    pass
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=config.OCR_CALL_MAX_THREADS, thread_name_prefix="ocr-call")
+        return _executor
+
+
+def is_retryable(exc):
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    from google.api_core import exceptions as api_exceptions
+
+    return isinstance(
+        exc,
+        (
+            api_exceptions.ServiceUnavailable,
+            api_exceptions.DeadlineExceeded,
+            api_exceptions.TooManyRequests,
+            api_exceptions.ResourceExhausted,
+            api_exceptions.InternalServerError,
+            api_exceptions.BadGateway,
+            api_exceptions.GatewayTimeout,
+        ),
+    )
+
+
+def _wait_for_result(future, timeout, attempt, on_wait, poll_interval):
+    started = time.monotonic()
+    while True:
+        remaining = timeout - (time.monotonic() - started)
+        if remaining <= 0:
+            future.cancel()
+            raise OcrTimeoutError(f"{timeout:g}초 안에 Vision API 응답이 없습니다.")
+        done, _ = wait([future], timeout=min(poll_interval, remaining))
+        if done:
+            return future.result()
+        if on_wait:
+            on_wait(attempt, time.monotonic() - started)
+
+
+def call_with_deadline(
+    request,
+    timeout=None,
+    retries=None,
+    backoff_base=None,
+    backoff_max=None,
+    on_wait=None,
+    on_retry=None,
+    poll_interval=0.5,
+    before_attempt=None,
+):
+    # request(timeout)을 호출합니다. 시도마다 timeout초까지 기다리고, 최대 retries번 재시도합니다.
+    # on_wait(시도 번호, 경과 초): 응답을 기다리는 동안 poll_interval마다 호출
+    # on_retry(시도 번호, 오류, 대기 초): 재시도 직전에 호출
+    # before_attempt(): 시도(재시도 포함)마다 요청 직전에 호출 (호출량 제한 대기 등, 제한 시간에 포함되지 않음)
+    timeout = config.OCR_TIMEOUT_SECONDS if timeout is None else timeout
+    retries = config.OCR_RETRIES if retries is None else retries
+    backoff_base = config.OCR_BACKOFF_BASE_SECONDS if backoff_base is None else backoff_base
+    backoff_max = config.OCR_BACKOFF_MAX_SECONDS if backoff_max is None else backoff_max
+
+    attempts = retries + 1
+    for attempt in range(1, attempts + 1):
+        if before_attempt:
+            before_attempt()
+        future = _get_executor().submit(request, timeout)
+        try:
+            return _wait_for_result(future, timeout, attempt, on_wait, poll_interval)
+        except Exception as e:
+            if attempt == attempts or not is_retryable(e):
+                raise
+            # full jitter: 0 ~ min(최대 대기, 기본 대기 * 2^(시도-1))
+            delay = random.uniform(0, min(backoff_max, backoff_base * (2 ** (attempt - 1))))
+            if on_retry:
+                on_retry(attempt, e, delay)
+            time.sleep(delay)
+
+
+def detect_document_text(vision_client, image_content, on_wait=None, on_retry=None, before_attempt=None):
+    # 반환값: (추출된 텍스트, Vision API 오류 메시지, 단어 배치 (ocr_layout.words_from_annotation))
+    from google.cloud import vision
+
+    image = vision.Image(content=image_content)
+
+    def request(timeout):
+        # 재시도는 call_with_deadline에서 처리하므로 클라이언트 자체 재시도는 끔
+        return vision_client.document_text_detection(image=image, timeout=timeout, retry=None)
+
+    response = call_with_deadline(request, on_wait=on_wait, on_retry=on_retry, before_attempt=before_attempt)
+    annotation = response.full_text_annotation
+    return annotation.text, response.error.message, words_from_annotation(annotation)
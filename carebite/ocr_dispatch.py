@@ -0,0 +1,186 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from carebite.metrics import REGISTRY as metrics
+from carebite.ocr_backends import OcrBackend
+from carebite.ocr_cache import image_digest
+
+# --- 프로세스 전체 OCR 디스패처 ---
+# 모든 세션의 OCR 요청을 하나의 제한된 작업 풀로 보냅니다.
+#   - 작업 풀: 동시에 진행되는 OCR 호출 수를 max_workers로 제한하고, 대기열이 max_queue를 넘으면 바로 거절
+#   - 토큰 버킷: 초당 rate_per_second장, 최대 burst장까지 몰아서 호출 (Vision API 할당량에 맞춤, 재시도 포함)
+#   - single-flight: 같은 이미지가 이미 처리 중이면 새로 호출하지 않고 그 결과를 함께 기다림
+# 호출한 스레드(세션의 스크립트 스레드)는 결과를 기다리는 동안 on_wait/on_retry를 직접 호출하므로
+# 진행 상황 표시는 지금과 같이 동작합니다. 대기열에서 기다리는 동안에는 시도 번호 0으로 on_wait를 호출합니다.
+
+
+class OcrBusyError(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second, burst):
+        self.rate_per_second = float(rate_per_second)
+        self.capacity = max(1.0, float(burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units=1):
+        # 토큰을 먼저 예약하고(음수 허용) 부족한 만큼 잠듭니다. 예약 순서대로 호출되므로 대기 순서가 공정합니다.
+        # burst보다 큰 일괄 호출도 이미지 수만큼 모두 차감합니다. (초과분은 (units - burst) / rate초 동안 기다림)
+        # 반환값: 기다린 시간 (초)
+        units = float(units)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+            self._updated = now
+            self._tokens -= units
+            delay = -self._tokens / self.rate_per_second if self._tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+        metrics.observe("ocr_rate_wait", delay)
+        return delay
+
+    def available(self):
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+
+
+class _Flight:
+    # 처리 중인 이미지 한 장. 같은 이미지를 기다리는 모든 호출이 이 객체를 공유합니다.
+    __slots__ = ("key", "submitted_at", "attempt", "retries", "future")
+
+    def __init__(self, key):
+        self.key = key
+        self.submitted_at = time.monotonic()
+        self.attempt = 0  # 0: 대기열에서 기다리는 중
+        self.retries = []  # [(시도 번호, 오류, 대기 초), ...]
+        self.future = Future()
+
+
+class OcrDispatcher(OcrBackend):
+    def __init__(self, backend, max_workers=8, max_queue=64, rate_per_second=0.0, burst=1, poll_interval=0.5):
+        # rate_per_second가 0 이하이면 호출량을 제한하지 않습니다.
+        self.backend = backend
+        self.name = backend.name
+        self.max_batch_images = backend.max_batch_images
+        self.max_batch_bytes = backend.max_batch_bytes
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.poll_interval = poll_interval
+        self.rate_limiter = TokenBucket(rate_per_second, burst) if rate_per_second > 0 else None
+        backend.rate_limiter = self.rate_limiter
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-dispatch")
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._queued = 0
+        self._running = 0
+        self._counters = {"submitted": 0, "coalesced": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self._max_queue_depth = 0
+
+    # --- OcrBackend 인터페이스 ---
+    def detect_text(self, image_content, on_wait=None, on_retry=None):
+        (flight,) = self._dispatch([image_content], single=True)
+        return self._wait(flight, on_wait, on_retry)
+
+    def detect_texts(self, image_contents):
+        return [self._wait(flight) for flight in self._dispatch(image_contents, single=False)]
+
+    # --- 요청 배분 ---
+    def _dispatch(self, image_contents, single):
+        keys = [image_digest(content) for content in image_contents]
+        flights = []
+        new_flights = {}
+        new_contents = []
+        with self._lock:
+            for key, content in zip(keys, image_contents):
+                flight = self._flights.get(key) or new_flights.get(key)
+                if flight is not None:
+                    self._counters["coalesced"] += 1
+                else:
+                    flight = new_flights[key] = _Flight(key)
+                    new_contents.append(content)
+                flights.append(flight)
+
+            if new_flights:
+                if self._queued + len(new_flights) > self.max_queue:
+                    self._counters["rejected"] += len(new_flights)
+                    raise OcrBusyError(
+                        f"OCR 요청이 많아 대기열({self.max_queue}건)이 가득 찼습니다. 잠시 후 다시 시도해주세요."
+                    )
+                self._flights.update(new_flights)
+                self._queued += len(new_flights)
+                self._counters["submitted"] += len(new_flights)
+                self._max_queue_depth = max(self._max_queue_depth, self._queued)
+                self._executor.submit(self._run, list(new_flights.values()), new_contents, single)
+        return flights
+
+    def _run(self, flights, contents, single):
+        started = time.monotonic()
+        with self._lock:
+            self._queued -= len(flights)
+            self._running += len(flights)
+        for flight in flights:
+            flight.attempt = 1
+            metrics.observe("ocr_queue_wait", started - flight.submitted_at)
+
+        try:
+            if single:
+                (flight,) = flights
+
+                def record_retry(attempt, error, delay):
+                    flight.retries.append((attempt, error, delay))
+                    flight.attempt = attempt + 1
+
+                results = [self.backend.detect_text(contents[0], on_retry=record_retry)]
+            else:
+                results = self.backend.detect_texts(contents)
+        except BaseException as e:
+            results = None
+            error = e
+
+        with self._lock:
+            self._running -= len(flights)
+            for flight in flights:
+                self._flights.pop(flight.key, None)
+            self._counters["completed" if results is not None else "failed"] += len(flights)
+
+        for i, flight in enumerate(flights):
+            if results is not None:
+                flight.future.set_result(results[i])
+            else:
+                flight.future.set_exception(error)
+
+    def _wait(self, flight, on_wait=None, on_retry=None):
+        started = time.monotonic()
+        reported_retries = 0
+        while True:
+            done, _ = wait([flight.future], timeout=self.poll_interval)
+            if on_retry:
+                for retry in flight.retries[reported_retries:]:
+                    on_retry(*retry)
+            reported_retries = len(flight.retries)
+            if done:
+                return flight.future.result()
+            if on_wait:
+                on_wait(flight.attempt, time.monotonic() - started)
+
+    # --- 상태 ---
+    def stats(self):
+        with self._lock:
+            stats = {
+                "backend": self.backend.name,
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "in_flight": self._running,
+                "max_queue_depth": self._max_queue_depth,
+                **self._counters,
+            }
+        if self.rate_limiter is not None:
+            stats["rate_per_second"] = self.rate_limiter.rate_per_second
+            stats["tokens_available"] = round(self.rate_limiter.available(), 2)
+        return stats
@@ -0,0 +1,336 @@
+import re
+from statistics import median
+
+# --- 배치(좌표) 기반 검진 항목 추출 ---
+# Vision API의 pages -> blocks -> paragraphs -> words 계층에서 단어와 경계 상자를 꺼내고,
+# 레이블 단어(예: '혈색소', '나이')마다 같은 줄 오른쪽, 없으면 바로 아래 같은 열에서 가장 가까운 값 단어를 짝짓습니다.
+# 값/레이블 단어는 격자 공간 인덱스(셀 크기 = 단어 높이 중앙값의 몇 배)에 넣어 두므로 레이블 하나당 주변 셀 몇 개만 보고,
+# 전체 처리 시간은 단어 수에 비례합니다. 여러 열로 된 검진표나 표 형식(레이블 행 아래 값 행)도 읽을 수 있습니다.
+#
+# 단어는 (텍스트, x0, y0, x1, y1, 신뢰도) 튜플로 다루며, 그대로 JSON으로 OCR 캐시에 저장합니다.
+
+# 레이블(공백 제거, 소문자) -> 값을 읽을 필드 목록 (혈압처럼 값 두 개를 차례로 읽는 레이블도 있음)
+LAYOUT_LABELS = {
+    '나이': ('나이',), '연령': ('나이',), '만나이': ('나이',),
+    '성별': ('성별',),
+    '신장': ('신장',), '키': ('신장',),
+    '체중': ('체중',), '몸무게': ('체중',),
+    '혈압': ('수축기 혈압', '이완기 혈압'), '고혈압': ('수축기 혈압', '이완기 혈압'),
+    '수축기혈압': ('수축기 혈압',), '이완기혈압': ('이완기 혈압',),
+    '혈색소': ('혈색소',), '헤모글로빈': ('혈색소',),
+    '공복혈당': ('공복 혈당',), '식전혈당': ('공복 혈당',),
+    '총콜레스테롤': ('총 콜레스테롤',),
+    '고밀도콜레스테롤': ('HDL 콜레스테롤',), 'hdl콜레스테롤': ('HDL 콜레스테롤',), 'hdl': ('HDL 콜레스테롤',),
+    '중성지방': ('트리글리세라이드',), '트리글리세라이드': ('트리글리세라이드',),
+    '저밀도콜레스테롤': ('LDL 콜레스테롤',), 'ldl콜레스테롤': ('LDL 콜레스테롤',), 'ldl': ('LDL 콜레스테롤',),
+    '혈청크레아티닌': ('혈청 크레아티닌',), '크레아티닌': ('혈청 크레아티닌',),
+    'ast': ('AST',), 'sgot': ('AST',),
+    'alt': ('ALT',), 'sgpt': ('ALT',),
+    '감마지티피': ('감마지티피',), 'xgtp': ('감마지티피',), 'γ-gtp': ('감마지티피',), 'r-gtp': ('감마지티피',),
+    'gtp': ('감마지티피',), 'ggt': ('감마지티피',),
+    '요단백': ('요단백',),
+}
+_LABEL_PREFIXES = {label[:i] for label in LAYOUT_LABELS for i in range(1, len(label) + 1)}
+# 레이블 하나가 걸칠 수 있는 최대 단어 수 ('고밀도' '콜레스테롤', 'γ' '-' 'GTP' 등)
+MAX_LABEL_WORDS = 4
+
+# 필드별 값 형식: 정수, 실수, 성별, 한글 단어(요단백)
+INT_FIELDS = {'나이', '신장', '체중', '수축기 혈압', '이완기 혈압'}
+GENDER_VALUES = {'남': '남성', '남성': '남성', '남자': '남성', '여': '여성', '여성': '여성', '여자': '여성'}
+WORD_FIELDS = {'요단백'}
+
+# 탐색 범위와 배치별 신뢰도 가중치 (단위: 단어 높이 중앙값)
+GRID_CELL_HEIGHTS = 4.0
+RIGHT_MAX_HEIGHTS = 50.0
+BELOW_MAX_HEIGHTS = 3.0
+RIGHT_PLACEMENT_WEIGHT = 1.0
+BELOW_PLACEMENT_WEIGHT = 0.9
+
+# Vision 단어를 다시 나누는 토큰 ('175(cm)/72(kg)' -> '175' '(' 'cm' ')' '/' '72' ...)
+_TOKEN = re.compile(r'\d+(?:\.\d+)?[가-힣%]*|[가-힣]+|[A-Za-zγ]+(?:-[A-Za-z]+)?|\S')
+_NUMBER = re.compile(r'[<>≤≥]?(\d+(?:\.\d+)?)')
+_HANGUL_WORD = re.compile(r'[가-힣]+\Z')
+_MEANINGFUL = re.compile(r'[\d가-힣]')
+
+
+# --- Vision 응답 -> 단어 목록 ---
+def words_from_annotation(full_text_annotation):
+    # full_text_annotation: Vision API 응답의 full_text_annotation. 여러 페이지는 세로로 이어 붙임
+    # 반환값: [(텍스트, x0, y0, x1, y1, 신뢰도), ...] 읽는 순서, 단어가 없으면 None
+    words = []
+    y_offset = 0
+    for page in getattr(full_text_annotation, "pages", None) or ():
+        for block in page.blocks:
+            for paragraph in block.paragraphs:
+                for word in paragraph.words:
+                    text = "".join(symbol.text for symbol in word.symbols)
+                    vertices = word.bounding_box.vertices
+                    if not text or not vertices:
+                        continue
+                    xs = [vertex.x for vertex in vertices]
+                    ys = [vertex.y for vertex in vertices]
+                    words.append((
+                        text, min(xs), min(ys) + y_offset, max(xs), max(ys) + y_offset,
+                        round(float(word.confidence), 3),
+                    ))
+        y_offset += int(page.height or 0)
+    return words or None
+
+
+def words_from_text(text, char_width=10, line_height=20, line_gap=10):
+    # 좌표 정보가 없는 텍스트(로컬 백엔드 픽스처 등)를 한 줄 = 한 행, 한 글자 = char_width인 가상 배치로 바꿈
+    words = []
+    for row, line in enumerate(text.split('\n')):
+        y0 = row * (line_height + line_gap)
+        for match in _TOKEN.finditer(line):
+            words.append((match.group(), match.start() * char_width, y0, match.end() * char_width, y0 + line_height, 1.0))
+    return words or None
+
+
+class _Token:
+    __slots__ = ("index", "text", "key", "x0", "y0", "x1", "y1", "confidence", "number", "used")
+
+    def __init__(self, index, text, x0, y0, x1, y1, confidence):
+        self.index = index
+        self.text = text
+        self.key = text.lower()
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.confidence = confidence
+        number = _NUMBER.match(text)
+        self.number = number.group(1) if number else None
+        self.used = False
+
+    @property
+    def height(self):
+        return self.y1 - self.y0
+
+    @property
+    def center_y(self):
+        return (self.y0 + self.y1) / 2
+
+
+class _LabelGroup:
+    # 한 줄에 이어서 나온 레이블들 ('키(cm)/몸무게(kg)' -> 신장, 체중)
+    __slots__ = ("fields", "x0", "y0", "x1", "y1", "confidence", "first_index")
+
+    def __init__(self, tokens, fields):
+        self.fields = list(fields)
+        self.x0 = min(t.x0 for t in tokens)
+        self.y0 = min(t.y0 for t in tokens)
+        self.x1 = max(t.x1 for t in tokens)
+        self.y1 = max(t.y1 for t in tokens)
+        self.confidence = min(t.confidence for t in tokens)
+        self.first_index = tokens[0].index
+
+    def extend(self, tokens, fields):
+        self.fields.extend(field for field in fields if field not in self.fields)
+        self.x1 = max(self.x1, max(t.x1 for t in tokens))
+        self.y0 = min(self.y0, min(t.y0 for t in tokens))
+        self.y1 = max(self.y1, max(t.y1 for t in tokens))
+        self.confidence = min(self.confidence, min(t.confidence for t in tokens))
+
+    @property
+    def height(self):
+        return self.y1 - self.y0
+
+    @property
+    def center_y(self):
+        return (self.y0 + self.y1) / 2
+
+
+class _GridIndex:
+    # 경계 상자가 걸치는 격자 셀마다 항목을 넣어 두고, 직사각형 영역과 겹치는 셀만 조회
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self._cells = {}
+
+    def _range(self, low, high):
+        return range(int(low // self.cell_size), int(high // self.cell_size) + 1)
+
+    def add(self, item):
+        for cx in self._range(item.x0, item.x1):
+            for cy in self._range(item.y0, item.y1):
+                self._cells.setdefault((cx, cy), []).append(item)
+
+    def query(self, x0, y0, x1, y1):
+        found = {}
+        for cx in self._range(x0, x1):
+            for cy in self._range(y0, y1):
+                for item in self._cells.get((cx, cy), ()):
+                    if item.x1 >= x0 and item.x0 <= x1 and item.y1 >= y0 and item.y0 <= y1:
+                        found[id(item)] = item
+        return found.values()
+
+
+def _same_row(a, b):
+    # 세로 중심이 상대 상자 높이의 절반 안에 있으면 같은 줄
+    return abs(a.center_y - b.center_y) <= max(a.height, b.height) / 2
+
+
+def _tokenize(words):
+    tokens = []
+    for text, x0, y0, x1, y1, confidence in words:
+        if confidence is None:
+            confidence = 1.0
+        pieces = list(_TOKEN.finditer(text))
+        if len(pieces) == 1 and pieces[0].group() == text:
+            tokens.append(_Token(len(tokens), text, x0, y0, x1, y1, confidence))
+            continue
+        # 한 단어 안의 조각은 글자 위치 비율로 가로 좌표를 나눔
+        char_width = (x1 - x0) / max(1, len(text))
+        for piece in pieces:
+            tokens.append(_Token(
+                len(tokens), piece.group(), x0 + piece.start() * char_width, y0, x0 + piece.end() * char_width, y1,
+                confidence,
+            ))
+    return tokens
+
+
+def _adjacent(a, b):
+    # 같은 줄에서 이어지는 단어 (사이 간격이 단어 높이 이하)
+    return _same_row(a, b) and -a.height <= b.x0 - a.x1 <= max(a.height, b.height)
+
+
+def _match_labels(tokens):
+    # 읽는 순서로 단어를 훑으며 이어지는 단어(최대 MAX_LABEL_WORDS개)를 붙여 가장 긴 레이블을 찾음
+    # 반환값: [(레이블 단어 목록, 필드 목록), ...]
+    matches = []
+    i = 0
+    while i < len(tokens):
+        joined = ""
+        best = None
+        for j in range(i, min(len(tokens), i + MAX_LABEL_WORDS)):
+            if j > i and not _adjacent(tokens[j - 1], tokens[j]):
+                break
+            joined += tokens[j].key
+            if joined not in _LABEL_PREFIXES:
+                break
+            if joined in LAYOUT_LABELS:
+                best = (j, LAYOUT_LABELS[joined])
+        if best is None:
+            i += 1
+            continue
+        end, fields = best
+        matches.append((tokens[i:end + 1], fields))
+        i = end + 1
+    return matches
+
+
+def _group_labels(tokens, matches):
+    # 같은 줄에서 단위/기호만 사이에 두고 이어지는 레이블은 하나로 묶어 값을 차례로 읽음
+    groups = []
+    label_indexes = set()
+    previous_end = None
+    for label_tokens, fields in matches:
+        label_indexes.update(token.index for token in label_tokens)
+        start = label_tokens[0].index
+        if groups and previous_end is not None and all(
+            not _MEANINGFUL.search(tokens[k].text) for k in range(previous_end + 1, start)
+        ) and _same_row(tokens[previous_end], label_tokens[0]):
+            groups[-1].extend(label_tokens, fields)
+        else:
+            groups.append(_LabelGroup(label_tokens, fields))
+        previous_end = label_tokens[-1].index
+    return groups, label_indexes
+
+
+def _accepts(field, token):
+    if field in WORD_FIELDS:
+        return token.number is None and bool(_HANGUL_WORD.match(token.text))
+    if field == '성별':
+        return token.text in GENDER_VALUES
+    return token.number is not None
+
+
+def _convert(field, token):
+    if field == '성별':
+        return GENDER_VALUES[token.text]
+    if field in WORD_FIELDS:
+        return token.text
+    if field in INT_FIELDS:
+        return int(float(token.number))
+    return float(token.number)
+
+
+class LayoutFieldExtractor:
+    def extract(self, words):
+        # words: words_from_annotation/words_from_text 결과
+        # 반환값: (찾은 필드 값 dict, 필드별 신뢰도 dict 0~1)
+        tokens = _tokenize(words or ())
+        if not tokens:
+            return {}, {}
+
+        unit = max(1.0, median(token.height for token in tokens))
+        matches = _match_labels(tokens)
+        groups, label_indexes = _group_labels(tokens, matches)
+
+        value_index = _GridIndex(unit * GRID_CELL_HEIGHTS)
+        for token in tokens:
+            if token.index not in label_indexes and _MEANINGFUL.search(token.text):
+                value_index.add(token)
+        label_index = _GridIndex(unit * GRID_CELL_HEIGHTS)
+        for group in groups:
+            label_index.add(group)
+
+        values = {}
+        confidence = {}
+        for group in groups:
+            fields = [field for field in group.fields if field not in values]
+            if not fields:
+                continue
+            for field, token, weight in self._pair(group, fields, value_index, label_index, unit):
+                token.used = True
+                values[field] = _convert(field, token)
+                confidence[field] = round(group.confidence * token.confidence * weight, 3)
+        return values, confidence
+
+    def _pair(self, group, fields, value_index, label_index, unit):
+        pairs = []
+        remaining = list(fields)
+
+        # 1) 같은 줄 오른쪽: 다음 레이블이 나오기 전까지 왼쪽부터 차례로
+        right_end = group.x1 + unit * RIGHT_MAX_HEIGHTS
+        barrier = min(
+            (other.x0 for other in label_index.query(group.x1, group.y0, right_end, group.y1)
+             if other is not group and other.x0 >= group.x1 and _same_row(group, other)),
+            default=right_end,
+        )
+        row = sorted(
+            (token for token in value_index.query(group.x1, group.y0, barrier, group.y1)
+             if not token.used and token.x0 >= group.x1 - unit / 2 and token.x1 <= barrier + unit / 2
+             and _same_row(group, token)),
+            key=lambda token: token.x0,
+        )
+        for token in row:
+            if remaining and _accepts(remaining[0], token):
+                pairs.append((remaining.pop(0), token, RIGHT_PLACEMENT_WEIGHT))
+        if not remaining:
+            return pairs
+
+        # 2) 바로 아래 같은 열: 가장 가까운 줄의 값 (그 사이에 다른 레이블이 있으면 그 레이블의 값)
+        below_end = group.y1 + unit * BELOW_MAX_HEIGHTS
+        column_x0 = group.x0 - unit
+        column_x1 = group.x1 + unit
+        label_below = min(
+            (other.y0 for other in label_index.query(column_x0, group.y1, column_x1, below_end)
+             if other is not group and other.y0 >= group.y1 - unit / 2 and not _same_row(group, other)),
+            default=below_end,
+        )
+        below = [
+            token for token in value_index.query(column_x0, group.y1, column_x1, min(below_end, label_below))
+            if not token.used and token.y0 >= group.y1 - unit / 2 and not _same_row(group, token)
+            and token.y0 < label_below and any(_accepts(field, token) for field in remaining)
+        ]
+        if below:
+            nearest = min(below, key=lambda token: token.y0)
+            for token in sorted((t for t in below if _same_row(nearest, t)), key=lambda token: token.x0):
+                if remaining and _accepts(remaining[0], token):
+                    pairs.append((remaining.pop(0), token, BELOW_PLACEMENT_WEIGHT))
+        return pairs
+
+
+_default_extractor = LayoutFieldExtractor()
+
+
+def extract_layout_fields(words):
+    return _default_extractor.extract(words)
@@ -0,0 +1,193 @@
+import re
+
+from carebite.ocr_layout import extract_layout_fields
+
+# --- OCR 텍스트 파싱 엔진 ---
+# 필드마다 문서 전체를 다시 검색하는 대신, 미리 컴파일한 레이블 패턴 하나로
+# 텍스트를 줄 단위로 한 번만 훑습니다. 레이블을 만나면 그 뒤(또는 앞)의
+# 제한된 구간에서만 값을 찾으므로, 길고 잡음이 많은 OCR 결과에서도
+# 처리 시간이 텍스트 길이에 비례합니다.
+
+# 레이블 뒤에서 값을 찾는 최대 거리 (문자 수)
+VALUE_WINDOW = 200
+# 'mmHg', '(cm)/' 같은 단위 앞에서 숫자를 찾는 최대 거리 (문자 수)
+ANCHOR_WINDOW = 64
+
+# 결과 딕셔너리의 키 순서 (기존 parse_health_data_from_ocr 출력과 동일)
+FIELD_ORDER = [
+    '나이', '성별', '신장', '체중', '수축기 혈압', '이완기 혈압',
+    '혈색소', '공복 혈당', '총 콜레스테롤', 'HDL 콜레스테롤', '트리글리세라이드',
+    'LDL 콜레스테롤', '혈청 크레아티닌', 'AST', 'ALT', '감마지티피', '요단백',
+    '흡연 상태', '음주 여부',
+]
+
+_NUMBER_RIGHT_AFTER = re.compile(r'\s*(\d+(?:\.\d+)?)')
+_NEXT_NUMBER = re.compile(r'(\d+(?:\.\d+)?)')
+_WORD_RIGHT_AFTER = re.compile(r'\s*([가-힣]+)')
+
+# (필드, 레이블 패턴, 값 패턴, 값 찾는 방식)
+# 'match': 레이블 바로 뒤에 값이 와야 함, 'search': 레이블 뒤 첫 번째 값
+_LABEL_RULES = [
+    ('혈색소', r'혈색소\(g/dL\)', _NUMBER_RIGHT_AFTER, 'match'),
+    ('공복 혈당', r'공복혈당\(mg/dL\)', _NUMBER_RIGHT_AFTER, 'match'),
+    ('총 콜레스테롤', r'총콜레스테롤\(mg/dL\)', _NUMBER_RIGHT_AFTER, 'match'),
+    ('HDL 콜레스테롤', r'고밀도 콜레스테롤\(mg/dL\)', _NUMBER_RIGHT_AFTER, 'match'),
+    ('트리글리세라이드', r'중성지방\(mg/dL\)', _NUMBER_RIGHT_AFTER, 'match'),
+    ('LDL 콜레스테롤', r'저밀도 콜레스테롤\(mg/dL\)', _NUMBER_RIGHT_AFTER, 'match'),
+    ('혈청 크레아티닌', r'혈청 크레아티닌\(mg/dL\)', _NUMBER_RIGHT_AFTER, 'match'),
+    # AST/ALT/감마지티피는 레이블 뒤에 나오는 첫 번째 숫자를 사용 (유연성 유지)
+    ('AST', r'AST|SGOT', _NEXT_NUMBER, 'search'),
+    ('ALT', r'ALT|SGPT', _NEXT_NUMBER, 'search'),
+    ('감마지티피', r'감마지티피|XGTP', _NEXT_NUMBER, 'search'),
+    ('요단백', r'요단백', _WORD_RIGHT_AFTER, 'match'),  # '정상', '경계', '단백뇨 의심' 등
+]
+
+# 단위 토큰 앞쪽 구간에서 값을 찾는 패턴 (구간 끝에 붙어 있어야 함)
+_BLOOD_PRESSURE_BEFORE = re.compile(r'(\d+)\s*/\s*(\d+)\s*\Z')
+_HEIGHT_BEFORE = re.compile(r'(\d+)\Z')
+_WEIGHT_AFTER = re.compile(r'(\d+)\(kg\)')
+
+_AGE_VALUE = re.compile(r'(\d+)')
+_GENDER_VALUE = re.compile(r'(여성|남성)')
+
+
+def _to_number_or_text(value_str):
+    try:
+        return float(value_str)
+    except ValueError:
+        return value_str.strip()  # 숫자가 아니면 문자열 그대로 (예: 요단백)
+
+
+class HealthDataParser:
+    def __init__(self, value_window=VALUE_WINDOW, anchor_window=ANCHOR_WINDOW):
+        self.value_window = value_window
+        self.anchor_window = anchor_window
+
+        # 모든 레이블과 단위 토큰을 하나의 패턴으로 합쳐 한 번에 찾습니다.
+        alternatives = [f'(?P<r{i}>{label})' for i, (_, label, _, _) in enumerate(_LABEL_RULES)]
+        alternatives.append(r'(?P<bp>(?-i:mmHg))')
+        alternatives.append(r'(?P<hw>(?-i:\(cm\)/))')
+        self._tokenizer = re.compile('|'.join(alternatives), re.IGNORECASE)
+        self._scanned_field_count = len(_LABEL_RULES) + 2
+
+    def parse(self, text):
+        values = {}
+        lines = text.split('\n')
+        text_length = len(text)
+
+        # '나이'와 '성별'은 마지막으로 레이블이 나온 줄의 다음 줄에서 값을 읽습니다.
+        age_index = -1
+        gender_index = -1
+
+        line_start = 0
+        for i, line in enumerate(lines):
+            line_end = line_start + len(line)
+
+            if '나이' in line:
+                age_index = i
+            if '성별' in line:
+                gender_index = i
+
+            if len(values) < self._scanned_field_count:
+                for token in self._tokenizer.finditer(text, line_start, line_end):
+                    self._read_value(token, text, text_length, values)
+
+            line_start = line_end + 1
+
+        data = {}
+        data['나이'] = self._value_on_next_line(lines, age_index, _AGE_VALUE, int)
+        data['성별'] = self._value_on_next_line(lines, gender_index, _GENDER_VALUE, str.strip)
+
+        height_weight = values.get('hw')
+        data['신장'], data['체중'] = height_weight if height_weight else (None, None)
+
+        blood_pressure = values.get('bp')
+        data['수축기 혈압'], data['이완기 혈압'] = blood_pressure if blood_pressure else (None, None)
+
+        for key, _, _, _ in _LABEL_RULES:
+            data[key] = values.get(key)
+
+        # OCR에서 추출하지 않는 필드
+        data['흡연 상태'] = None
+        data['음주 여부'] = None
+
+        return {key: data[key] for key in FIELD_ORDER}
+
+    def _read_value(self, token, text, text_length, values):
+        name = token.lastgroup
+
+        if name == 'bp':
+            if 'bp' not in values:
+                window_start = max(0, token.start() - self.anchor_window)
+                match = _BLOOD_PRESSURE_BEFORE.search(text, window_start, token.start())
+                if match:
+                    values['bp'] = (int(match.group(1)), int(match.group(2)))
+            return
+
+        if name == 'hw':
+            if 'hw' not in values:
+                window_start = max(0, token.start() - self.anchor_window)
+                height_match = _HEIGHT_BEFORE.search(text, window_start, token.start())
+                weight_match = _WEIGHT_AFTER.match(text, token.end(), min(text_length, token.end() + self.anchor_window))
+                if height_match and weight_match:
+                    values['hw'] = (int(height_match.group(1)), int(weight_match.group(1)))
+            return
+
+        key, _, value_pattern, how = _LABEL_RULES[int(name[1:])]
+        if key in values:
+            return
+
+        window_end = min(text_length, token.end() + self.value_window)
+        if how == 'match':
+            match = value_pattern.match(text, token.end(), window_end)
+        else:
+            match = value_pattern.search(text, token.end(), window_end)
+        if match:
+            values[key] = _to_number_or_text(match.group(1))
+
+    @staticmethod
+    def _value_on_next_line(lines, label_index, value_pattern, convert):
+        if label_index == -1 or (label_index + 1) >= len(lines):
+            return None
+        match = value_pattern.search(lines[label_index + 1])
+        if not match:
+            return None
+        return convert(match.group(1))
+
+
+_default_parser = HealthDataParser()
+
+
+# --- 텍스트 파싱 함수 ---
+def parse_health_data_from_ocr(text):
+    return _default_parser.parse(text)
+
+
+# 텍스트 패턴(레이블 뒤/다음 줄)으로만 찾은 필드의 신뢰도
+TEXT_MATCH_CONFIDENCE = 0.5
+# 이 값보다 신뢰도가 낮은 필드는 화면에서 확인을 권함
+LOW_CONFIDENCE_THRESHOLD = 0.6
+# OCR에서 추출하지 않는 필드
+_NOT_EXTRACTED = {'흡연 상태', '음주 여부'}
+
+
+def parse_health_data(text, words=None):
+    # words: OCR 결과의 단어 배치 [(텍스트, x0, y0, x1, y1, 신뢰도), ...] (없으면 텍스트 패턴만 사용)
+    # 반환값: (parse_health_data_from_ocr와 같은 키의 필드 dict, 필드별 신뢰도 dict 0~1)
+    # 단어 배치가 있으면 좌표로 레이블-값을 짝지어 읽고, 거기서 찾지 못한 필드만 텍스트 패턴으로 채웁니다.
+    data = dict.fromkeys(FIELD_ORDER)
+    confidence = {}
+    if words:
+        layout_values, confidence = extract_layout_fields(words)
+        data.update(layout_values)
+
+    if any(data[key] is None for key in FIELD_ORDER if key not in _NOT_EXTRACTED):
+        for key, value in parse_health_data_from_ocr(text).items():
+            if data[key] is None and value is not None:
+                data[key] = value
+                confidence[key] = TEXT_MATCH_CONFIDENCE
+    return data, {key: confidence[key] for key in FIELD_ORDER if key in confidence}
+
+
+def low_confidence_fields(confidence):
+    return {key: value for key, value in confidence.items() if value < LOW_CONFIDENCE_THRESHOLD}
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+
+from carebite.features import FEATURE_BUILDER
+from carebite.model_artifact import MODEL_ARTIFACT_PATH, load_artifact
+from carebite.risk_levels import risk_thresholds
+from carebite.scoring import ScoringEngine
+
+# --- 건강 데이터 처리 파이프라인 ---
+# 파싱된 OCR 결과 -> 피처 엔지니어링(모델 입력 배열) -> 예측/위험 등급 분류.
+# Streamlit에 의존하지 않으므로 페이지와 배치 작업에서 함께 사용합니다.
+# joblib(sklearn)은 무거우므로 pkl 모델을 읽을 때만 임포트합니다. (페이지 시작 시간 단축)
+
+MODEL_PATH = 'model/logistic_model.pkl'
+SCALER_PATH = 'model/scaler.pkl'
+
+# 위험 등급/경계와 한 건 분류(classify_risk_level)는 carebite.risk_levels에서 가져다 씁니다.
+
+# --- 피처 엔지니어링 및 모델 입력 ---
+# 피처 이름/순서/계산 방법은 carebite.features.FEATURE_SPEC 한 곳에서 정의하며,
+# 파싱 결과에서 float64 배열을 바로 만듭니다. (요청마다 DataFrame을 만들지 않음)
+def build_features(raw_data, out=None):
+    # 파싱 결과 한 건 -> (피처 수,) 모델 입력 배열
+    return FEATURE_BUILDER.build(raw_data, out)
+
+def build_model_input(raw_records, out=None):
+    # 파싱 결과 여러 건 -> (레코드 수, 피처 수) 모델 입력 배열
+    return FEATURE_BUILDER.build_many(raw_records, out)
+
+def build_model_input_columns(columns, n_rows, out=None):
+    # 열 형식 레코드 {원본 필드: 1차원 배열} -> (n_rows, 피처 수) 모델 입력 배열 (build_model_input과 같은 값)
+    return FEATURE_BUILDER.build_columns(columns, n_rows, out)
+
+def classify_risk_levels(prediction_probas, thresholds=None):
+    # 확률 배열 -> RISK_LEVELS 인덱스 배열 (classify_risk_level과 같은 경계, NaN은 '고위험'과 같이 마지막 등급)
+    caution, danger, high_risk = thresholds or risk_thresholds()
+    p = np.asarray(prediction_probas, dtype=np.float64)
+    return np.where(p < caution, 0, np.where(p <= danger, 1, np.where(p <= high_risk, 2, 3)))
+
+# --- 모델 로드 ---
+def load_scoring_engine(artifact_path=MODEL_ARTIFACT_PATH, model_path=MODEL_PATH, scaler_path=SCALER_PATH):
+    # JSON 아티팩트(python -m carebite.model_artifact export)가 있으면 NumPy만으로 로드하고,
+    # 없을 때만 sklearn pkl 파일에서 만듭니다. 아티팩트의 피처 스키마가 다르면 ModelArtifactError가 발생합니다.
+    if artifact_path and os.path.exists(artifact_path):
+        return load_artifact(artifact_path)
+    return load_sklearn_engine(model_path, scaler_path)
+
+def load_sklearn_engine(model_path=MODEL_PATH, scaler_path=SCALER_PATH):
+    # 스케일러를 모델 계수에 접어 넣은 예측 엔진을 만들고, sklearn 결과와 일치하는지 확인합니다.
+    from joblib import load
+
+    loaded_model = load(model_path)
+    loaded_scaler = load(scaler_path)
+    engine = ScoringEngine.from_sklearn(loaded_model, loaded_scaler)
+    engine.verify_against_sklearn(loaded_model, loaded_scaler)
+    return engine
+
+def score_raw_records(raw_records, engine):
+    # 파싱된 레코드 여러 건을 한 번의 예측 엔진 호출로 점수화합니다. 반환값: (모델 입력 배열, 예측 확률)
+    model_input = build_model_input(raw_records)
+    if not len(raw_records):
+        return model_input, np.empty(0, dtype=np.float64)
+    return model_input, engine.predict_proba(model_input)
@@ -0,0 +1,51 @@
+import numpy as np
+
+from carebite.risk_levels import RISK_LEVELS
+
+# --- 정렬된 예측 확률 인덱스 ---
+# 코호트의 예측 확률을 한 번 정렬해 두면, 임의의 위험 등급 경계에 대한 등급별 건수를
+# 경계마다 이진 탐색(np.searchsorted) 한 번으로 구합니다. (행 수 N에 대해 O(log N), 다시 분류하지 않음)
+# classify_risk_levels와 같은 규칙을 따릅니다.
+#   정상: p < 정상/주의 경계, 주의: p <= 주의/위험 경계, 위험: p <= 위험/고위험 경계, 나머지는 고위험
+# np.sort는 NaN을 맨 뒤에 두므로 NaN은 classify_risk_levels와 같이 '고위험'으로 셉니다.
+# 정확히 같은 비교를 하기 위해 확률은 float64 그대로 보관합니다. (행당 8바이트)
+
+
+class SortedProbabilityIndex:
+    def __init__(self, probabilities, presorted=False):
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        self.sorted_probabilities = probabilities if presorted else np.sort(probabilities)
+        self.size = len(self.sorted_probabilities)
+
+    @classmethod
+    def from_chunks(cls, probability_chunks):
+        if not probability_chunks:
+            return cls(np.empty(0, dtype=np.float64))
+        # 합친 배열을 제자리 정렬 (정렬용 사본을 하나 더 만들지 않음)
+        probabilities = np.concatenate(probability_chunks).astype(np.float64, copy=False)
+        probabilities.sort()
+        return cls(probabilities, presorted=True)
+
+    def band_edges(self, thresholds):
+        # 등급별 시작 위치 + 끝: [0, 주의 시작, 위험 시작, 고위험 시작, N]
+        caution, danger, high_risk = thresholds
+        s = self.sorted_probabilities
+        return np.array([
+            0,
+            np.searchsorted(s, caution, side="left"),
+            np.searchsorted(s, danger, side="right"),
+            np.searchsorted(s, high_risk, side="right"),
+            self.size,
+        ], dtype=np.int64)
+
+    def band_counts(self, thresholds):
+        # thresholds: risk_levels.validate_risk_thresholds를 통과한 (오름차순) 경계
+        # 반환값: RISK_LEVELS 순서의 등급별 건수 배열
+        return np.diff(self.band_edges(thresholds))
+
+    def level_distribution(self, thresholds):
+        return {level: int(count) for level, count in zip(RISK_LEVELS, self.band_counts(thresholds))}
+
+    @property
+    def nbytes(self):
+        return self.sorted_probabilities.nbytes
@@ -0,0 +1,256 @@
+import cProfile
+import itertools
+import os
+import pstats
+import sysconfig
+import threading
+import time
+import tracemalloc
+
+from carebite import config
+
+# --- rerun 단위 프로파일링 ---
+# 켠 rerun 하나를 cProfile(함수별 시간)과 tracemalloc(코드 위치별 메모리 할당)으로 감싸고,
+# rerun마다 결과를 개수 제한이 있는 디렉터리에 남깁니다. (CAREBITE_PROFILE_MAX_RUNS를 넘으면 오래된 것부터 삭제)
+#   <디렉터리>/<시각>-<이름>-<세션>.prof : pstats 형식 (python -m pstats <파일>, snakeviz 등으로 열기)
+#   <디렉터리>/<시각>-<이름>-<세션>.txt  : 시간/할당 상위 N개 요약
+# cProfile은 rerun을 실행하는 스레드만 재지만 tracemalloc은 프로세스 전체를 추적하므로,
+# 동시에 실행 중인 다른 세션의 할당이 함께 잡힐 수 있습니다. 오버헤드는 프로파일링 중인 rerun이 있을 때만 생깁니다.
+# 추적 메모리 최대값(peak)도 프로세스 전체에 하나뿐이라, 프로파일링 중인 rerun이 하나일 때만 시작 시점에 초기화합니다.
+# 다른 rerun과 겹치면 그 값은 겹친 rerun들이 함께 쓴 프로세스 전체 최대값이며 요약에 그렇게 표시합니다. (peak_shared)
+# 이 rerun만의 값으로는 시작/끝 스냅샷 차이로 구한 순증가량(traced_growth_bytes)을 함께 남깁니다.
+
+# 할당 위치에서 제외할 파일 (추적 도구 자체, 임포트 장치)
+_ALLOCATION_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+# 스레드별 진행 중인 프로파일 (rerun은 세션의 스크립트 스레드 하나에서 실행됨)
+_local = threading.local()
+# tracemalloc을 쓰는 프로파일 (모두 끝나면 tracemalloc을 끔)
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = {}
+_write_lock = threading.Lock()
+_run_counter = itertools.count()
+
+
+def active_profile():
+    return getattr(_local, "profile", None)
+
+
+def start_rerun_profile(name, session_id=None):
+    # 이 스레드의 rerun 프로파일링 시작. 이전 rerun이 끝내지 못한 프로파일(예외, st.stop)은 버림
+    stale = active_profile()
+    if stale is not None:
+        stale.discard()
+    profile = RerunProfile(name, session_id)
+    profile.start()
+    return profile
+
+
+class RerunProfile:
+    def __init__(self, name, session_id=None, output_dir=None, max_runs=None, top_n=None):
+        self.name = name
+        self.session_id = session_id or "process"
+        self.output_dir = output_dir or config.PROFILE_DIR
+        self.max_runs = config.PROFILE_MAX_RUNS if max_runs is None else max_runs
+        self.top_n = top_n or config.PROFILE_TOP_N
+        self._profiler = None
+        self._thread = None
+        # 다른 프로파일과 tracemalloc 최대값을 함께 쓴 적이 있으면 True
+        self.peak_shared = False
+
+    def start(self):
+        self._thread = threading.current_thread()
+        _acquire_tracemalloc(self)
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+        self._profiler = cProfile.Profile()
+        _local.profile = self
+        self._profiler.enable()
+
+    def discard(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler = None
+        if active_profile() is self:
+            _local.profile = None
+        _release_tracemalloc(self)
+
+    def finish(self):
+        # 반환값: 요약 dict (이미 끝났으면 None)
+        if self._profiler is None:
+            return None
+        profiler = self._profiler
+        profiler.disable()
+        wall_seconds = time.perf_counter() - self._started
+        cpu_seconds = time.thread_time() - self._cpu_started
+        end_snapshot = tracemalloc.take_snapshot()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        self.discard()
+        differences = end_snapshot.filter_traces(_ALLOCATION_FILTERS).compare_to(
+            self._start_snapshot.filter_traces(_ALLOCATION_FILTERS), "lineno"
+        )
+
+        summary = {
+            "name": self.name,
+            "session": self.session_id[:8],
+            "wall_ms": round(wall_seconds * 1000, 1),
+            "cpu_ms": round(cpu_seconds * 1000, 1),
+            "peak_traced_bytes": peak_bytes,
+            "peak_shared": self.peak_shared,
+            "traced_growth_bytes": sum(difference.size_diff for difference in differences),
+            "hotspots": _hotspots(profiler, self.top_n),
+            "allocations": _allocations(differences, self.top_n),
+            "path": None,
+        }
+        try:
+            summary["path"] = self._write(profiler, summary)
+        except OSError as e:
+            summary["write_error"] = str(e)
+        return summary
+
+    # --- 파일 기록 ---
+    def _write(self, profiler, summary):
+        os.makedirs(self.output_dir, exist_ok=True)
+        now = time.time()
+        stem = "{}-{:03d}-{:04d}-{}-{}".format(
+            time.strftime("%Y%m%d-%H%M%S", time.localtime(now)),
+            int(now * 1000) % 1000,
+            next(_run_counter) % 10000,
+            _safe_name(self.name),
+            _safe_name(summary["session"]),
+        )
+        path = os.path.join(self.output_dir, stem)
+        with _write_lock:
+            profiler.dump_stats(f"{path}.prof")
+            with open(f"{path}.txt", "w", encoding="utf-8") as f:
+                f.write(format_summary(summary))
+            _rotate(self.output_dir, self.max_runs)
+        return f"{path}.prof"
+
+
+def format_summary(summary):
+    lines = [
+        f"{summary['name']} (세션 {summary['session']}): {summary['wall_ms']}ms, CPU {summary['cpu_ms']}ms",
+        f"추적 메모리 순증가 {summary['traced_growth_bytes'] / 1024 / 1024:.1f}MB, {format_peak(summary)}",
+        "",
+        "시간 상위 함수 (자체 시간 순)",
+    ]
+    for row in summary["hotspots"]:
+        lines.append(
+            f"  {row['자체 시간(ms)']:>10.2f}ms {row['누적 시간(ms)']:>10.2f}ms {row['호출 수']:>8}  {row['함수']}"
+        )
+    lines += ["", "메모리 할당 상위 위치 (rerun 동안 늘어난 크기 순)"]
+    for row in summary["allocations"]:
+        lines.append(f"  {row['증가(KB)']:>10.1f}KB {row['블록 수']:>8}  {row['위치']}")
+    return "\n".join(lines) + "\n"
+
+
+def format_peak(summary):
+    peak = f"추적 메모리 최대 {summary['peak_traced_bytes'] / 1024 / 1024:.1f}MB"
+    if summary["peak_shared"]:
+        return f"{peak} (동시에 프로파일링한 rerun과 함께 잰 프로세스 전체 값)"
+    return peak
+
+
+# --- 요약 ---
+def _hotspots(profiler, top_n):
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:top_n]
+    return [
+        {
+            "함수": _function_label(filename, lineno, function),
+            "호출 수": calls,
+            "자체 시간(ms)": round(own_seconds * 1000, 2),
+            "누적 시간(ms)": round(cumulative_seconds * 1000, 2),
+        }
+        for (filename, lineno, function), (_, calls, own_seconds, cumulative_seconds, _) in rows
+    ]
+
+
+def _allocations(differences, top_n):
+    rows = []
+    for difference in differences:
+        if difference.size_diff <= 0 or len(rows) >= top_n:
+            break
+        frame = difference.traceback[0]
+        rows.append({
+            "위치": f"{_short_path(frame.filename)}:{frame.lineno}",
+            "증가(KB)": round(difference.size_diff / 1024, 1),
+            "블록 수": difference.count_diff,
+        })
+    return rows
+
+
+def _function_label(filename, lineno, function):
+    if filename == "~":
+        # 내장 함수 ('<built-in method ...>')
+        return function
+    return f"{_short_path(filename)}:{lineno}({function})"
+
+
+def _short_path(filename):
+    # 앱 코드는 작업 디렉터리 기준, 라이브러리는 site-packages/표준 라이브러리 이후 경로만 표시
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    for prefix in (os.getcwd(), sysconfig.get_paths()["stdlib"]):
+        if filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+def _safe_name(value):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(value))
+
+
+def _rotate(output_dir, max_runs):
+    # rerun 하나의 파일(.prof, .txt)을 묶어서, 최근 max_runs개만 남김 (파일 이름이 시각 순)
+    if not max_runs or max_runs <= 0:
+        return
+    stems = sorted({
+        os.path.splitext(name)[0] for name in os.listdir(output_dir) if name.endswith((".prof", ".txt"))
+    })
+    for stem in stems[:-max_runs]:
+        for suffix in (".prof", ".txt"):
+            try:
+                os.remove(os.path.join(output_dir, stem + suffix))
+            except FileNotFoundError:
+                pass
+
+
+# --- tracemalloc 공유 ---
+def _acquire_tracemalloc(profile):
+    with _tracemalloc_lock:
+        _prune_tracemalloc_users()
+        if _tracemalloc_users:
+            # 최대값을 초기화하면 진행 중인 다른 프로파일의 값이 틀어지므로 그대로 두고, 서로 공유했다고 표시
+            profile.peak_shared = True
+            for other in _tracemalloc_users.values():
+                other.peak_shared = True
+        _tracemalloc_users[id(profile)] = profile
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not profile.peak_shared:
+            tracemalloc.reset_peak()
+
+
+def _release_tracemalloc(profile):
+    with _tracemalloc_lock:
+        _tracemalloc_users.pop(id(profile), None)
+        _prune_tracemalloc_users()
+        if not _tracemalloc_users and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _prune_tracemalloc_users():
+    # 끝내지 못하고 스레드도 끝난 프로파일은 정리 (tracemalloc이 계속 켜져 있지 않도록)
+    for key, profile in list(_tracemalloc_users.items()):
+        if not profile._thread.is_alive():
+            del _tracemalloc_users[key]
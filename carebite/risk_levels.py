@@ -0,0 +1,64 @@
+import json
+
+from carebite import config
+
+# --- 위험 등급과 경계 ---
+# 모든 페이지/배치 작업이 같은 경계로 위험 등급을 나누도록 경계를 정하는 곳을 하나로 모읍니다.
+# 우선순위: CAREBITE_RISK_THRESHOLDS > 모델 아티팩트에 저장된 경계 > RISK_THRESHOLDS(노트북 기본값)
+# NumPy 없이 동작하므로 결과 페이지처럼 모델을 쓰지 않는 페이지에서도 가볍게 임포트할 수 있습니다.
+
+# 위험 등급 경계 기본값: 정상(< 0.48), 주의(<= 0.59), 위험(<= 0.74), 고위험
+# 04_modeling.ipynb에서 Threshold 0.48로 조정된 값을 '정상'과 '주의'의 경계로 사용합니다.
+RISK_THRESHOLDS = (0.48, 0.59, 0.74)
+RISK_LEVELS = ("정상", "주의", "위험", "고위험")
+
+
+def validate_risk_thresholds(thresholds):
+    # 경계 3개, 0~1 범위, 오름차순(같은 값 허용)인지 확인하고 float 튜플로 반환
+    thresholds = tuple(float(t) for t in thresholds)
+    if len(thresholds) != len(RISK_LEVELS) - 1:
+        raise ValueError(f"위험 등급 경계는 {len(RISK_LEVELS) - 1}개여야 합니다: {thresholds}")
+    if not all(0.0 <= low <= high <= 1.0 for low, high in zip((0.0,) + thresholds, thresholds + (1.0,))):
+        raise ValueError(f"위험 등급 경계는 0~1 사이의 오름차순 값이어야 합니다: {thresholds}")
+    return thresholds
+
+
+def risk_thresholds(engine=None):
+    # engine: 예측 엔진 (모델 아티팩트에 저장된 경계를 반영). 없으면 환경 변수 또는 기본값
+    model_thresholds = getattr(engine, "risk_thresholds", None)
+    return _resolve_risk_thresholds(model_thresholds)
+
+
+def load_risk_thresholds(artifact_path=None):
+    # 예측 엔진을 만들지 않고 모델 아티팩트(JSON)에서 경계만 읽어 risk_thresholds(engine)과 같은 값을 반환
+    model_thresholds = None
+    try:
+        with open(artifact_path or config.MODEL_ARTIFACT_PATH, "r", encoding="utf-8") as f:
+            model_thresholds = json.load(f).get("risk_thresholds")
+    except (OSError, ValueError, AttributeError):
+        pass
+    return _resolve_risk_thresholds(model_thresholds)
+
+
+def _resolve_risk_thresholds(model_thresholds):
+    if config.RISK_THRESHOLDS is not None:
+        return validate_risk_thresholds(config.RISK_THRESHOLDS)
+    if model_thresholds is not None:
+        return validate_risk_thresholds(model_thresholds)
+    return RISK_THRESHOLDS
+
+
+def classify_risk_level(prediction_proba, thresholds=None):
+    # thresholds: risk_thresholds(engine)로 정한 경계 (None이면 risk_thresholds())
+    if prediction_proba is None:
+        return "분류 불가"
+
+    caution, danger, high_risk = thresholds or risk_thresholds()
+    if prediction_proba < caution:
+        return "정상"
+    elif prediction_proba <= danger:
+        return "주의"
+    elif prediction_proba <= high_risk:
+        return "위험"
+    else:
+        return "고위험"
@@ -0,0 +1,110 @@
+import hashlib
+
+import numpy as np
+
+from carebite.features import MODEL_FEATURES
+
+# --- 로지스틱 회귀 예측 엔진 ---
+# scaler.transform + predict_proba 대신, 로드 시 스케일러의 평균/표준편차를
+# 로지스틱 회귀 계수에 한 번 접어 넣고, 예측은 내적 한 번 + 시그모이드로 끝냅니다.
+#
+#   z = sum_j coef_j * (x_j - mean_j) / scale_j + intercept
+#     = sum_j (coef_j / scale_j) * x_j + (intercept - sum_j coef_j * mean_j / scale_j)
+#
+# 결측값(NaN)은 스케일링 후 0으로 채우는 것과 같게 처리합니다.
+# (스케일링 대상 피처는 평균값, 나머지 피처는 0으로 대체)
+
+
+# sklearn 결과와 비교할 때 허용하는 최대 오차
+SKLEARN_TOLERANCE = 1e-9
+
+
+class ScoringEngine:
+    def __init__(self, feature_names, weights, intercept, fill_values, risk_thresholds=None, version=None):
+        # risk_thresholds: 위험 등급 경계 (None이면 pipeline 기본값), version: 모델 아티팩트 버전 정보
+        self.feature_names = list(feature_names)
+        self.risk_thresholds = tuple(risk_thresholds) if risk_thresholds is not None else None
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.fill_values = np.ascontiguousarray(fill_values, dtype=np.float64)
+
+        if self.weights.shape != (len(self.feature_names),) or self.fill_values.shape != self.weights.shape:
+            raise ValueError("가중치/결측 대체값의 길이가 피처 수와 일치하지 않습니다.")
+
+        # 아티팩트 버전이 없으면(pkl에서 만든 경우) 파라미터로 식별자를 만들어 예측 기록에 남깁니다.
+        self.version = version or self._parameter_digest()
+
+    def _parameter_digest(self):
+        digest = hashlib.sha256()
+        digest.update(self.weights.tobytes())
+        digest.update(self.fill_values.tobytes())
+        digest.update(np.float64(self.intercept).tobytes())
+        return "params-" + digest.hexdigest()[:12]
+
+    @classmethod
+    def from_sklearn(cls, model, scaler, feature_names=MODEL_FEATURES):
+        if list(model.classes_) != [0, 1]:
+            raise ValueError(f"이진 분류 모델이 아닙니다: classes_={list(model.classes_)}")
+        scaled_features = list(getattr(scaler, 'feature_names_in_', []))
+        if len(scaled_features) != len(scaler.mean_):
+            raise ValueError("스케일러에 학습 피처 이름 정보가 없습니다.")
+        return cls.from_parameters(
+            model.coef_, model.intercept_[0], scaled_features, scaler.mean_, scaler.scale_, feature_names
+        )
+
+    @classmethod
+    def from_parameters(cls, coef, intercept, scaled_features, mean, scale, feature_names=MODEL_FEATURES, **kwargs):
+        # coef: (피처 수,) 또는 (1, 피처 수) 로지스틱 회귀 계수
+        # scaled_features/mean/scale: 스케일러가 표준화하는 피처와 그 평균/표준편차
+        feature_names = list(feature_names)
+        coef = np.asarray(coef, dtype=np.float64).reshape(1, -1)
+        if coef.shape != (1, len(feature_names)):
+            raise ValueError(f"모델 계수 크기 {coef.shape}가 피처 수 {len(feature_names)}와 일치하지 않습니다.")
+        if len(scaled_features) != len(mean) or len(mean) != len(scale):
+            raise ValueError("스케일러 피처/평균/표준편차의 길이가 서로 다릅니다.")
+
+        weights = coef[0].copy()
+        intercept = float(intercept)
+        fill_values = np.zeros(len(feature_names), dtype=np.float64)
+
+        for j, name in enumerate(scaled_features):
+            if name not in feature_names:
+                raise ValueError(f"스케일러 피처 '{name}'가 모델 피처 목록에 없습니다.")
+            i = feature_names.index(name)
+            mean_j = float(mean[j])
+            scale_j = float(scale[j])
+            intercept -= weights[i] * mean_j / scale_j
+            weights[i] = weights[i] / scale_j
+            fill_values[i] = mean_j
+
+        return cls(feature_names, weights, intercept, fill_values, **kwargs)
+
+    def decision_function(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        X = np.ascontiguousarray(np.where(np.isnan(X), self.fill_values, X))
+        # 행마다 같은 순서로 더하도록 einsum 사용 (BLAS 행렬-벡터 곱은 배열 크기에 따라 합산 순서가 달라
+        # 같은 레코드라도 한 건/여러 건 예측 결과가 마지막 자리에서 달라질 수 있음)
+        return np.einsum('...j,j->...', X, self.weights) + self.intercept
+
+    def predict_proba(self, X):
+        # X: (n_features,) 한 건 또는 (n_rows, n_features) 여러 건. 양성(1) 클래스 확률을 반환합니다.
+        z = self.decision_function(X)
+        # 1 / (1 + exp(-z))를 overflow 없이 계산
+        return np.exp(-np.logaddexp(0.0, -z))
+
+    def verify_against_sklearn(self, model, scaler, rows=64, seed=0):
+        # 무작위 입력으로 기존 scaler.transform + predict_proba 결과와 비교합니다.
+        rng = np.random.default_rng(seed)
+        X = rng.normal(size=(rows, len(self.feature_names)))
+        scaled_features = list(scaler.feature_names_in_)
+        scaled_index = [self.feature_names.index(name) for name in scaled_features]
+        X[:, scaled_index] = X[:, scaled_index] * scaler.scale_ + scaler.mean_
+
+        X_scaled = X.copy()
+        X_scaled[:, scaled_index] = (X[:, scaled_index] - scaler.mean_) / scaler.scale_
+        expected = model.predict_proba(X_scaled)[:, 1]
+
+        max_error = float(np.max(np.abs(self.predict_proba(X) - expected)))
+        if max_error > SKLEARN_TOLERANCE:
+            raise ValueError(f"예측 엔진 결과가 sklearn 결과와 다릅니다 (최대 오차 {max_error:.3g}).")
+        return max_error
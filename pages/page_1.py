@@ -1,359 +1,498 @@
+import hashlib
 import streamlit as st
-from google.cloud import vision
-import io
-import os
-import json
-import re
-import pandas as pd
-import numpy as np
-from joblib import load # 모델 로드를 위해 joblib 임포트
+import time
+from carebite import config
+from carebite.admin import finish_page_profile, profile_fragment, render_admin_sidebar, start_page_profile
+from carebite.history import get_history_store
+from carebite.image_prep import make_thumbnail, normalize_image
+from carebite.memory import ARTIFACTS, current_session_id, register_releasable_cache, relieve_memory_pressure
+from carebite.model_reload import shared_reloader
+from carebite.ocr_batch import detect_texts_batch
+from carebite.ocr_cache import OcrCache, image_digest
+from carebite.ocr_client import OcrTimeoutError
+from carebite.ocr_dispatch import OcrBusyError, OcrDispatcher
+from carebite.ocr_parser import low_confidence_fields, parse_health_data
+from carebite import pipeline
+from carebite.risk_levels import classify_risk_level
+from carebite.features import FEATURE_BUILDER
+from carebite.metrics import REGISTRY as metrics
 
 # st.set_page_config는 app.py에서 이미 호출되었으므로 여기서는 제거합니다.
 # st.set_page_config(page_title="이미지 건강 데이터 추출 및 분석", layout="centered")
 
-# --- Vision API 클라이언트와 임시 인증 파일 경로를 session_state에서 가져오기 ---
-# app.py에서 초기화된 client를 사용합니다.
-vision_client = st.session_state.get('vision_client')
-temp_credentials_path = st.session_state.get('temp_credentials_path')
+# --- OCR 백엔드를 session_state에서 가져오기 ---
+# app.py에서 초기화된 백엔드(Vision API 또는 로컬 대체 구현)를 사용합니다.
+ocr_backend = st.session_state.get('ocr_backend')
 
-# 클라이언트가 제대로 초기화되지 않았을 경우 오류 메시지 표시
-if vision_client is None:
-    st.error("Google Cloud Vision API 클라이언트가 초기화되지 않았습니다. 메인 페이지를 확인하거나 앱을 다시 시작해주세요.")
+# 백엔드가 제대로 초기화되지 않았을 경우 오류 메시지 표시
+if ocr_backend is None:
+    st.error("OCR 백엔드(Google Cloud Vision API 클라이언트)가 초기화되지 않았습니다. 메인 페이지를 확인하거나 앱을 다시 시작해주세요.")
     st.stop()
 
-# --- 텍스트 파싱 함수 ---
-def parse_health_data_from_ocr(text):
-    data = {}
-    lines = text.split('\n') # 텍스트를 줄 단위로 분리합니다.
-
-    # --- 나이 및 성별 파싱 개선 ---
-    age_index = -1
-    gender_index = -1
-
-    # '나이'와 '성별' 레이블의 줄 인덱스를 찾습니다.
-    for i, line in enumerate(lines):
-        if '나이' in line.strip():
-            age_index = i
-        if '성별' in line.strip():
-            gender_index = i
-
-    # 나이 값 파싱
-    if age_index != -1 and (age_index + 1) < len(lines):
-        age_value_line = lines[age_index + 1].strip()
-        age_match = re.search(r'(\d+)', age_value_line)
-        if age_match:
-            data['나이'] = int(age_match.group(1))
-        else:
-            data['나이'] = None
-    else:
-        data['나이'] = None
-
-    # 성별 값 파싱
-    if gender_index != -1 and (gender_index + 1) < len(lines):
-        gender_value_line = lines[gender_index + 1].strip()
-        gender_match = re.search(r'(여성|남성)', gender_value_line)
-        if gender_match:
-            data['성별'] = gender_match.group(1).strip()
-        else:
-            data['성별'] = None
-    else:
-        data['성별'] = None
-    # ---------------------------
-
-    # 키 및 몸무게 파싱
-    height_weight_match = re.search(r'(\d+)\(cm\)/(\d+)\(kg\)', text)
-    if height_weight_match:
-        data['신장'] = int(height_weight_match.group(1))
-        data['체중'] = int(height_weight_match.group(2))
-    else:
-        height_weight_match_with_label = re.search(r'키\(cm\)/몸무게\(kg\).*?(\d+)\(cm\)/(\d+)\(kg\)', text, re.DOTALL)
-        if height_weight_match_with_label:
-             data['신장'] = int(height_weight_match_with_label.group(1))
-             data['체중'] = int(height_weight_match_with_label.group(2))
-        else:
-            data['신장'] = None
-            data['체중'] = None
-
-    # 혈압 파싱
-    bp_match = re.search(r'(\d+)\s*/\s*(\d+)\s*mmHg', text)
-    if bp_match:
-        data['수축기 혈압'] = int(bp_match.group(1))
-        data['이완기 혈압'] = int(bp_match.group(2))
-    else:
-        bp_match_with_label = re.search(r'고혈압.*?(\d+)\s*/\s*(\d+)\s*mmHg', text, re.DOTALL)
-        if bp_match_with_label:
-            data['수축기 혈압'] = int(bp_match_with_label.group(1))
-            data['이완기 혈압'] = int(bp_match_with_label.group(2))
-        else:
-            data['수축기 혈압'] = None
-            data['이완기 혈압'] = None
-
-    # 기타 혈액 검사 및 기능 검사 결과 파싱
-    patterns = {
-        '혈색소': r'혈색소\(g/dL\)\s*(\d+(\.\d+)?)',
-        '공복 혈당': r'공복혈당\(mg/dL\)\s*(\d+(\.\d+)?)',
-        '총 콜레스테롤': r'총콜레스테롤\(mg/dL\)\s*(\d+(\.\d+)?)',
-        'HDL 콜레스테롤': r'고밀도 콜레스테롤\(mg/dL\)\s*(\d+(\.\d+)?)',
-        '트리글리세라이드': r'중성지방\(mg/dL\)\s*(\d+(\.\d+)?)',
-        'LDL 콜레스테롤': r'저밀도 콜레스테롤\(mg/dL\)\s*(\d+(\.\d+)?)',
-        '혈청 크레아티닌': r'혈청 크레아티닌\(mg/dL\)\s*(\d+(\.\d+)?)',
-        # --- AST 및 감마지티피 파싱 개선 ---
-        # AST: 'AST' 또는 'SGOT' 키워드를 포함하여 값을 찾습니다. (유연성 증가)
-        'AST': r'(?:AST|SGOT).*?(\d+(\.\d+)?)',
-        # ALT: 'ALT' 또는 'SGPT' 키워드를 포함하여 값을 찾습니다. (유연성 증가)
-        'ALT': r'(?:ALT|SGPT).*?(\d+(\.\d+)?)',
-        # 감마지티피: '감마지티피' 또는 'XGTP' 키워드를 포함하여 값을 찾습니다. (유연성 증가)
-        '감마지티피': r'(?:감마지티피|XGTP).*?(\d+(\.\d+)?)',
-        # -----------------------------------
-        '요단백': r'요단백\s*([가-힣]+)', # '정상', '경계', '단백뇨 의심' 등
-        '흡연 상태': None,
-        '음주 여부': None
-    }
-
-    for key, pattern in patterns.items():
-        if pattern is None:
-            data[key] = None
-            continue
-
-        # re.DOTALL은 줄바꿈도 .에 포함. re.IGNORECASE는 대소문자 무시.
-        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-        if match:
-            value_str = match.group(1) # 첫 번째 캡처 그룹이 실제 값
-            try:
-                data[key] = float(value_str)
-            except ValueError:
-                data[key] = value_str.strip() # 숫자가 아니면 문자열 그대로 (예: 요단백)
-            except IndexError:
-                # 이 경우는 패턴은 매칭되는데 캡처 그룹이 없을 때 발생.
-                # 현재 패턴들에서는 group(1)이 항상 존재해야 하므로 드물게 발생.
-                data[key] = None
-        else:
-            data[key] = None # 패턴을 찾지 못한 경우 None
-
-    return data
-
-# --- 피처 엔지니어링 및 전처리 함수 ---
-def preprocess_and_engineer_features(raw_data):
-    processed_data = {}
-
-    processed_data['식전혈당(공복혈당)'] = raw_data.get('공복 혈당')
-    processed_data['총콜레스테롤'] = raw_data.get('총 콜레스테롤')
-    processed_data['혈색소'] = raw_data.get('혈색소')
-    processed_data['혈청크레아티닌'] = raw_data.get('혈청 크레아티닌')
-    processed_data['감마지티피'] = raw_data.get('감마지티피')
-    processed_data['요단백'] = raw_data.get('요단백')
-
-    gender = raw_data.get('성별')
-    if gender == '남성':
-        processed_data['성별코드'] = 1
-    elif gender == '여성':
-        processed_data['성별코드'] = 2
-    else:
-        processed_data['성별코드'] = np.nan
-
-    processed_data['흡연상태'] = 1 # 예시로 비흡연자(1) 설정 (OCR에서 추출이 어렵기 때문)
-
-    age = raw_data.get('나이')
-    if age is not None:
-        processed_data['연령대코드(5세단위)'] = (age // 5) * 5
-    else:
-        processed_data['연령대코드(5세단위)'] = np.nan
-
-    processed_data['시력(평균)'] = np.nan # OCR에서 추출되지 않으므로 NaN 처리
-
-    height = raw_data.get('신장')
-    weight = raw_data.get('체중')
-    if height is not None and weight is not None and height > 0:
-        processed_data['bmi'] = weight / ((height / 100.0) ** 2)
-    else:
-        processed_data['bmi'] = np.nan
-
-    # 파생 변수 계산
-    alt = raw_data.get('ALT')
-    ast = raw_data.get('AST')
-    if alt is not None and ast is not None and ast != 0:
-        processed_data['alt_ast_ratio'] = alt / ast
-    else:
-        processed_data['alt_ast_ratio'] = np.nan
-
-    triglycerides = raw_data.get('트리글리세라이드')
-    hdl = raw_data.get('HDL 콜레스테롤')
-    if triglycerides is not None and hdl is not None and hdl != 0:
-        processed_data['tg_hdl_ratio'] = triglycerides / hdl
-    else:
-        processed_data['tg_hdl_ratio'] = np.nan
-
-    ggtp = raw_data.get('감마지티피')
-    alt = raw_data.get('ALT')
-    if ggtp is not None and alt is not None and alt != 0:
-        processed_data['ggtp_alt_ratio'] = ggtp / alt
-    else:
-        processed_data['ggtp_alt_ratio'] = np.nan
-
-    ldl = raw_data.get('LDL 콜레스테롤')
-    hdl = raw_data.get('HDL 콜레스테롤')
-    if ldl is not None and hdl is not None and hdl != 0:
-        processed_data['ldl_hdl_ratio'] = ldl / hdl
-    else:
-        processed_data['ldl_hdl_ratio'] = np.nan
-
-    # `04_modeling.ipynb`의 `df.columns`에서 확인된 피처 리스트 (타겟 제외)
-    required_features_from_notebook = [
-        '성별코드', '연령대코드(5세단위)', '시력(평균)', '식전혈당(공복혈당)', '총콜레스테롤', '혈색소', '요단백',
-        '혈청크레아티닌', '감마지티피', '흡연상태', '음주여부', 'bmi', 'alt_ast_ratio',
-        'tg_hdl_ratio', 'ggtp_alt_ratio', 'ldl_hdl_ratio'
-    ]
-
-    for feature in required_features_from_notebook:
-        if feature not in processed_data:
-            if feature == '요단백':
-                processed_data[feature] = None
-            elif feature == '음주여부':
-                processed_data[feature] = None
-            elif feature == '흡연상태':
-                processed_data[feature] = 1
-            else:
-                processed_data[feature] = np.nan
-
-    if processed_data.get('요단백') == '정상':
-        processed_data['요단백'] = 0
-    else:
-        processed_data['요단백'] = np.nan
-
-    return processed_data
-
-def prepare_model_input(processed_data):
-    df_sample = pd.DataFrame([processed_data])
-
-    try:
-        numeric_features = [
-            '연령대코드(5세단위)', '시력(평균)', '식전혈당(공복혈당)', '혈색소', '요단백',
-            '혈청크레아티닌', '감마지티피', 'bmi', 'alt_ast_ratio', 'tg_hdl_ratio',
-            'ggtp_alt_ratio', 'ldl_hdl_ratio'
-        ]
-
-        df_model_input = df_sample[numeric_features].copy()
-
-        for col in df_model_input.columns:
-            df_model_input[col] = pd.to_numeric(df_model_input[col], errors='coerce')
-
-        return df_model_input
-
-    except KeyError as e:
-        st.error(f"오류: 모델에 필요한 피처가 데이터에 없습니다: {e}")
-        st.write(f"데이터에 있는 피처: {df_sample.columns.tolist()}")
-        st.write(f"예상되는 피처 순서 (numeric_features): {numeric_features}")
-        return None
-    except Exception as e:
-        st.error(f"모델 입력 데이터 준비 중 오류 발생: {e}")
-        return None
-
-def classify_risk_level(prediction_proba):
-    if prediction_proba is None:
-        return "분류 불가"
-
-    if prediction_proba < 0.48:
-        return "정상"
-    elif prediction_proba <= 0.59:
-        return "주의"
-    elif prediction_proba <= 0.74:
-        return "위험"
-    else:
-        return "고위험"
+# rerun 프로파일링 (CAREBITE_PROFILE=1 또는 관리자 ?profile=1일 때만, 페이지 맨 끝에서 마무리)
+page_profile = start_page_profile("page_1")
 
 # --- Streamlit 앱 메인 로직 ---
 st.title("Google Cloud Vision API를 이용한 이미지 건강 데이터 추출 및 분석")
 st.write("건강검진 결과 이미지를 업로드하면 Vision API로 텍스트를 추출하고, 추출된 데이터를 분석하여 고혈압 위험도를 예측합니다.")
 st.write("⚠️ **주의:** 이 앱은 예시 목적으로, 실제 의료 진단에 사용될 수 없습니다. 예측 결과는 참고용입니다.")
+if ocr_backend.name != "vision":
+    st.caption(f"OCR 백엔드: {ocr_backend.name} (Vision API 대신 벤치마크용 대체 구현을 사용 중입니다)")
 
-# 모델 및 스케일러 로드 (앱 시작 시 한 번만 로드하도록 캐시)
-@st.cache_resource
+# 예측 모델 (프로세스 전체에서 하나, carebite.model_reload)
+# 첫 예측 직전에 로드합니다. JSON 모델 아티팩트가 있으면 NumPy만으로 읽고,
+# 없을 때만 sklearn/joblib으로 pkl 모델과 스케일러를 읽습니다.
+# model/ 파일이 바뀌면 백그라운드에서 검증한 뒤 교체하므로, rerun마다 한 번만 받아 그 rerun 안에서는 같은 엔진을 씁니다.
 def load_prediction_assets():
-    model_path = 'model/logistic_model.pkl'
-    scaler_path = 'model/scaler.pkl'
+    reloader = shared_reloader()
+    engine = reloader.current()
+    if engine is None:
+        st.error(f"모델 로드 중 오류 발생: {reloader.last_error}")
+        st.write("모델/스케일러 파일 경로를 확인하고 앱과 같은 위치 또는 접근 가능한 경로에 두세요.")
+    elif reloader.source == "artifact":
+        st.success(f"모델 아티팩트({pipeline.MODEL_ARTIFACT_PATH}, {engine.version})가 성공적으로 로드되었습니다.")
+    else:
+        st.success(f"모델({pipeline.MODEL_PATH}) 및 스케일러({pipeline.SCALER_PATH})가 성공적으로 로드되었습니다.")
+    return engine
 
-    loaded_model = None
-    loaded_scaler = None
+# OCR 결과 캐시 (프로세스 전체에서 공유, 같은 이미지는 Vision API를 다시 호출하지 않음)
+@st.cache_resource
+def get_ocr_cache():
+    cache = OcrCache(
+        max_entries=config.OCR_CACHE_MAX_ENTRIES,
+        disk_dir=config.OCR_CACHE_DIR,
+        disk_max_bytes=config.OCR_CACHE_MAX_BYTES,
+        ttl_seconds=config.OCR_CACHE_TTL_SECONDS,
+        max_memory_bytes=config.OCR_CACHE_MAX_MEMORY_BYTES,
+        error_ttl_seconds=config.OCR_CACHE_ERROR_TTL_SECONDS,
+    )
+    # 프로세스 RSS가 상한(CAREBITE_PROCESS_RSS_SOFT_LIMIT_BYTES)을 넘으면 메모리 계층을 줄임
+    register_releasable_cache("ocr_cache", cache)
+    return cache
+
+ocr_cache = get_ocr_cache()
+relieve_memory_pressure()
+session_id = current_session_id()
+
+# 예측 기록 (SQLite). 같은 모델로 이미 분석한 이미지는 세션/재시작과 관계없이 OCR과 예측을 건너뜀
+try:
+    prediction_history = get_history_store()
+except Exception as e:
+    prediction_history = None
+    st.warning(f"예측 기록 저장소({config.HISTORY_DB_PATH})를 열 수 없어 기록 없이 분석합니다: {e}")
+
+# 예측 결과 표시 및 결과 페이지로 전달
+def show_prediction(prediction_proba, risk_level, model_version):
+    st.write(f"예측된 고혈압 확률: **{prediction_proba:.4f}**")
+    st.write(f"고혈압 위험 등급: **{risk_level}**")
+
+    st.session_state['prediction_proba'] = prediction_proba
+    st.session_state['risk_level'] = risk_level
+    # 모델이 교체되어도 이 결과를 낸 모델 버전을 함께 전달
+    st.session_state['model_version'] = model_version
+
+def record_predictions(entries):
+    # entries: [(image_hash, model_version, parsed, features, probability, risk_level), ...]
+    if prediction_history is None or not entries:
+        return
+    try:
+        prediction_history.record_many(entries)
+    except Exception as e:
+        st.caption(f"예측 기록 저장 실패: {e}")
+
+# --- 분석 세부 정보 (추출 텍스트, 파싱/피처 결과) ---
+# 예측 결과를 먼저 보여주고, 세부 정보는 토글을 켠 세션에서만 그립니다.
+# (접힌 expander도 내용은 rerun마다 전송되므로, 토글이 꺼져 있으면 아예 그리지 않음)
+def show_details_toggle():
+    return st.toggle(
+        "분석 세부 정보 보기 (추출 텍스트 수정, 파싱/피처 결과)",
+        value=config.UI_MODE == "debug",
+        key="show_analysis_details",
+    )
+
+# --- 추출 텍스트 수정 -> 파싱/피처/예측만 다시 계산 ---
+# 텍스트를 고치면 이 fragment만 다시 실행되므로 이미지와 OCR 단계는 다시 그리거나 호출하지 않습니다.
+# 수정한 텍스트는 현재 업로드 정보(session_state['ocr_upload'])에 함께 보관하므로
+# 세부 정보를 닫았다 열거나 전체 rerun이 일어나도 유지됩니다.
+def remember_ocr_text_edit(text_key):
+    st.session_state['ocr_upload']['edited_text'] = st.session_state[text_key]
+
+def reset_ocr_text(text_key, ocr_text):
+    st.session_state['ocr_upload'].pop('edited_text', None)
+    st.session_state[text_key] = ocr_text
+
+@st.fragment
+@profile_fragment("page_1.analyze_ocr_text")
+def analyze_ocr_text(image_hash, ocr_text, ocr_words, prediction_engine, stage_status):
+    text = st.session_state['ocr_upload'].get('edited_text', ocr_text)
+    # 단어 배치(좌표)는 OCR 원본 텍스트에만 맞으므로 수정한 텍스트는 텍스트 패턴으로만 파싱
+    words = ocr_words if text == ocr_text else None
+    raw_health_data = None
+    field_confidence = {}
+    model_input = None
+    prediction_proba = None
+    risk_level = None
+
+    stage_status.update(label="2/4 텍스트 파싱 중...")
+    try:
+        with metrics.timed("parse", size=len(text)):
+            raw_health_data, field_confidence = parse_health_data(text, words)
+    except Exception as e:
+        stage_status.update(label="텍스트 파싱 실패", state="error")
+        st.error(f"텍스트 파싱 중 오류 발생: {e}")
 
-    if os.path.exists(model_path) and os.path.exists(scaler_path):
+    if raw_health_data is not None:
+        stage_status.update(label="3/4 데이터 전처리 및 피처 엔지니어링 중...")
         try:
-            loaded_model = load(model_path)
-            loaded_scaler = load(scaler_path)
-            st.success(f"모델({model_path}) 및 스케일러({scaler_path})가 성공적으로 로드되었습니다.")
-            return loaded_model, loaded_scaler
+            # 피처 정의(carebite.features)에 따라 모델 입력 배열을 바로 만듦
+            with metrics.timed("features", size=1):
+                model_input = pipeline.build_features(raw_health_data)
         except Exception as e:
-            st.error(f"모델 또는 스케일러 로드 중 오류 발생: {e}")
-            st.warning("모델/스케일러 파일이 손상되었거나 호환되지 않는 버전으로 저장되었을 수 있습니다.")
-            return None, None
-    else:
-        st.warning(f"모델 또는 스케일러 파일을 찾을 수 없습니다. 모델: {model_path}, 스케일러: {scaler_path}")
-        st.write("모델/스케일러 파일 경로를 확인하고 앱과 같은 위치 또는 접근 가능한 경로에 두세요.")
-        return None, None
+            stage_status.update(label="피처 엔지니어링 실패", state="error")
+            st.error(f"데이터 전처리 중 오류 발생: {e}")
 
-loaded_model, loaded_scaler = load_prediction_assets()
+    if model_input is not None:
+        stage_status.update(label="4/4 고혈압 위험 예측 중...")
+        if prediction_engine is not None:
+            try:
+                with metrics.timed("predict", size=1):
+                    prediction_proba = float(prediction_engine.predict_proba(model_input))
+                risk_level = classify_risk_level(prediction_proba, pipeline.risk_thresholds(prediction_engine))
+                # 수정한 텍스트로 얻은 결과도 같은 이미지의 기록으로 저장 (다음 업로드 때 수정된 결과를 사용)
+                # 이 fragment는 다른 위젯 때문에 일어난 전체 rerun에서도 다시 실행되므로,
+                # 분석한 텍스트나 모델 버전이 바뀐 경우에만 기록 (seen_count가 클릭 수만큼 늘지 않도록)
+                record_digest = hashlib.sha256(
+                    f"{prediction_engine.version}\0{text}".encode("utf-8")
+                ).hexdigest()
+                if st.session_state['ocr_upload'].get('recorded_digest') != record_digest:
+                    record_predictions([(
+                        image_hash, prediction_engine.version, raw_health_data,
+                        FEATURE_BUILDER.to_dict(model_input), prediction_proba, risk_level,
+                    )])
+                    st.session_state['ocr_upload']['recorded_digest'] = record_digest
+                stage_status.update(label="분석 완료", state="complete")
+            except Exception as e:
+                stage_status.update(label="예측 실패", state="error")
+                st.error(f"모델 예측 중 오류 발생: {e}")
+                st.warning("모델 입력 데이터의 형식이나 피처가 모델의 기대치와 다를 수 있습니다.")
+        else:
+            stage_status.update(label="모델 미로드", state="error")
+            st.warning("모델 또는 스케일러가 로드되지 않아 예측을 수행할 수 없습니다.")
+
+    # 결과를 먼저 표시
+    if prediction_proba is not None:
+        st.subheader("고혈압 위험 예측 결과:")
+        show_prediction(prediction_proba, risk_level, prediction_engine.version)
+        if text != ocr_text:
+            st.caption("수정한 텍스트로 다시 분석했습니다. (OCR 생략)")
+        # 신뢰도 안내는 좌표로 읽은 경우에만 (텍스트 패턴만 쓴 경우는 신뢰도를 알 수 없음)
+        uncertain_fields = low_confidence_fields(field_confidence) if words else {}
+        if uncertain_fields:
+            st.caption(
+                "인식 신뢰도가 낮은 항목: "
+                + ", ".join(f"{key}({value:.2f})" for key, value in uncertain_fields.items())
+                + " - 세부 정보에서 추출된 텍스트를 확인해주세요."
+            )
+        st.page_link("pages/page_2.py", label="결과 보기", icon="📈")
+
+    if not show_details_toggle():
+        return
+
+    st.subheader("1. Vision API 추출 텍스트:")
+    text_key = f"ocr_text_{image_hash}"
+    if text_key not in st.session_state:
+        st.session_state[text_key] = text
+    st.text_area(
+        "추출된 원본 텍스트 (값이 잘못 인식되었다면 직접 고친 뒤 Ctrl+Enter를 누르세요)",
+        height=300,
+        key=text_key,
+        on_change=remember_ocr_text_edit,
+        args=(text_key,),
+    )
+    if text != ocr_text:
+        st.button("추출된 텍스트로 되돌리기", on_click=reset_ocr_text, args=(text_key, ocr_text))
+    if raw_health_data is not None:
+        st.subheader("2. 텍스트 파싱 결과:")
+        st.json(raw_health_data)
+        if field_confidence:
+            # 좌표로 레이블-값을 짝지은 항목은 Vision 단어 신뢰도, 텍스트 패턴으로만 찾은 항목은 0.5
+            st.dataframe(
+                {"항목": list(field_confidence), "인식 신뢰도": list(field_confidence.values())},
+                hide_index=True,
+            )
+    if model_input is not None:
+        features = FEATURE_BUILDER.to_dict(model_input)
+        st.subheader("3. 데이터 전처리 및 피처 엔지니어링 결과:")
+        st.json(features)
+        st.subheader("4. 모델 입력 데이터 준비:")
+        st.dataframe({name: [value] for name, value in features.items()})
+
+# 분석 모드 선택 (단일 이미지 / 여러 이미지 일괄 분석)
+analysis_mode = st.radio("분석 모드", ["단일 이미지", "일괄 분석"], horizontal=True)
 
 # 이미지 업로드 위젯
-uploaded_file = st.file_uploader("건강검진 결과 이미지를 선택하세요...", type=["jpg", "jpeg", "png", "gif", "bmp"])
+uploaded_file = None
+uploaded_files = []
+if analysis_mode == "일괄 분석":
+    uploaded_files = st.file_uploader(
+        "건강검진 결과 이미지를 여러 장 선택하세요...",
+        type=["jpg", "jpeg", "png", "gif", "bmp"],
+        accept_multiple_files=True,
+    )
+else:
+    uploaded_file = st.file_uploader("건강검진 결과 이미지를 선택하세요...", type=["jpg", "jpeg", "png", "gif", "bmp"])
+
+# --- 세션 메모리 ---
+# session_state에는 이미지 해시, 수정한 텍스트, 예측 확률/위험 등급처럼 작은 값만 둡니다.
+#   - OCR 결과(텍스트, 단어 배치)는 프로세스 OCR 캐시에서 이미지 해시로 다시 읽음 (세션마다 사본을 두지 않음)
+#   - 미리보기는 세션 중간 결과 보관소(carebite.memory.ARTIFACTS)에 두고, 해제되었으면 다시 만듦
+#   - 원본/정규화 이미지 바이트는 OCR이 끝나면 바로 놓아 줌 (아래 analyze_ocr_text 참고)
+def start_ocr_upload(image_hash):
+    # 새 이미지가 올라오면 이전 업로드의 텍스트 수정 위젯 값을 정리
+    for key in [key for key in st.session_state if str(key).startswith("ocr_text_")]:
+        if key != f"ocr_text_{image_hash}":
+            del st.session_state[key]
+    st.session_state['ocr_upload'] = {'image_hash': image_hash}
 
 # 이미지가 업로드되면 처리 시작
-if uploaded_file is not None and vision_client is not None:
-    st.image(uploaded_file, caption="업로드된 이미지", use_column_width=True)
-    st.write("텍스트 추출 중...")
+if uploaded_file is not None and ocr_backend is not None:
+    image_content = uploaded_file.getvalue()
+    image_hash = image_digest(image_content)
+    prepared = None
+
+    # 원본 대신 축소한 미리보기만 전송 (업로드마다 한 번만 만들어 보관소에 보관)
+    thumbnail = ARTIFACTS.get(session_id, 'upload_thumbnail')
+    if thumbnail is None or thumbnail[0] != image_hash:
+        thumbnail = (image_hash, make_thumbnail(image_content, max_side=config.THUMBNAIL_MAX_SIDE))
+        ARTIFACTS.put(session_id, 'upload_thumbnail', thumbnail)
+    if thumbnail[1] is not None:
+        st.image(thumbnail[1], caption="업로드된 이미지", width=min(config.THUMBNAIL_MAX_SIDE, 320))
+
+    # 단계별 진행 상황 (텍스트 추출 -> 파싱 -> 피처 엔지니어링 -> 예측)
+    stage_status = st.status("1/4 텍스트 추출 중...")
+    ocr_result = None
+    history_entry = None
+    prediction_engine = load_prediction_assets()
+
+    def show_ocr_wait(attempt, elapsed):
+        if attempt == 0:
+            # 프로세스 전체 OCR 대기열에서 차례를 기다리는 중
+            stage_status.update(label=f"1/4 텍스트 추출 대기 중... ({elapsed:.0f}초 경과)")
+            return
+        retry_note = f", 재시도 {attempt - 1}회" if attempt > 1 else ""
+        stage_status.update(label=f"1/4 텍스트 추출 중... ({elapsed:.0f}초 경과{retry_note})")
+
+    def show_ocr_retry(attempt, error, delay):
+        stage_status.update(label=f"1/4 Vision API 응답 지연, {delay:.1f}초 후 재시도합니다... ({error})")
 
     try:
-        image_content = uploaded_file.read()
-        image = vision.Image(content=image_content)
-        response = vision_client.document_text_detection(image=image)
-        texts = response.full_text_annotation
-
-        if texts and texts.text:
-            st.subheader("1. Vision API 추출 텍스트:")
-            st.text_area("추출된 원본 텍스트", texts.text, height=300)
-
+        # 이 세션에서 방금 OCR한 이미지면 캐시의 결과를 그대로 사용 (텍스트 수정 화면 유지, Vision API 재호출 없음)
+        # 캐시에서 해제되었으면 아래 기록/캐시/OCR 순서로 다시 얻음
+        ocr_upload = st.session_state.get('ocr_upload')
+        if ocr_upload is not None and ocr_upload['image_hash'] == image_hash:
+            ocr_result = ocr_cache.get(image_hash, record_stats=False)
+
+        # 같은 모델로 분석한 기록이 있으면 OCR과 예측을 모두 건너뜀
+        if ocr_result is None and prediction_history is not None and prediction_engine is not None:
+            history_entry = prediction_history.find(image_hash, prediction_engine.version)
+
+        if ocr_result is None and history_entry is None:
+            # 캐시에 없을 때만 Vision API 호출
+            ocr_result = ocr_cache.get(image_hash)
+            if ocr_result is None:
+                # 해상도 축소/흑백 변환/EXIF 제거 후 전송
+                with metrics.timed("image_prep", size=len(image_content)):
+                    prepared = normalize_image(
+                        image_content, max_side=config.IMAGE_MAX_SIDE, jpeg_quality=config.IMAGE_JPEG_QUALITY
+                    )
+                if prepared.normalized:
+                    st.caption(
+                        f"이미지 최적화: {prepared.original_bytes:,} → {prepared.normalized_bytes:,} bytes "
+                        f"({prepared.bytes_saved / prepared.original_bytes:.0%} 절감)"
+                    )
+                with metrics.timed("ocr", size=len(prepared.content)):
+                    ocr_text, ocr_error, ocr_words = ocr_backend.detect_text(
+                        prepared.content, on_wait=show_ocr_wait, on_retry=show_ocr_retry
+                    )
+                ocr_result = ocr_cache.put(image_hash, ocr_text, ocr_error, ocr_words)
+            else:
+                st.caption("캐시된 OCR 결과를 사용합니다.")
+            # 세션에는 현재 업로드의 이미지 해시만 보관 (같은 이미지를 다시 얻은 경우 수정한 텍스트 유지)
+            if ocr_upload is None or ocr_upload['image_hash'] != image_hash:
+                start_ocr_upload(image_hash)
+    except OcrBusyError as e:
+        stage_status.update(label="텍스트 추출 대기열 초과", state="error")
+        st.error(str(e))
+    except OcrTimeoutError as e:
+        stage_status.update(label="텍스트 추출 시간 초과", state="error")
+        st.error(f"Vision API 응답 시간이 초과되었습니다. 잠시 후 다시 시도해주세요. ({e})")
+    except Exception as e:
+        stage_status.update(label="텍스트 추출 실패", state="error")
+        st.error(f"텍스트 추출 중 오류 발생: {e}")
+
+    # analyze_ocr_text(fragment)는 다음 전체 rerun까지 이 스크립트의 전역 변수를 붙잡고 있으므로
+    # 더 쓰지 않는 원본/정규화 이미지 바이트를 여기서 놓아 줌
+    image_content = prepared = None
+
+    if history_entry is not None:
+        analyzed_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(history_entry["created_at"]))
+        stage_status.update(label="분석 완료 (저장된 결과)", state="complete")
+        st.subheader("고혈압 위험 예측 결과:")
+        # 위험 등급은 저장된 확률을 현재 경계(pipeline.risk_thresholds)로 다시 분류
+        show_prediction(
+            history_entry["probability"],
+            classify_risk_level(history_entry["probability"], pipeline.risk_thresholds(prediction_engine)),
+            prediction_engine.version,
+        )
+        st.caption(f"{analyzed_at}에 같은 모델로 분석한 이미지입니다. 저장된 결과를 표시합니다. (OCR/예측 생략)")
+        st.page_link("pages/page_2.py", label="결과 보기", icon="📈")
+        if show_details_toggle():
             st.subheader("2. 텍스트 파싱 결과:")
-            raw_health_data = parse_health_data_from_ocr(texts.text)
-            st.json(raw_health_data)
-
+            st.json(history_entry["parsed"])
             st.subheader("3. 데이터 전처리 및 피처 엔지니어링 결과:")
-            processed_health_data = preprocess_and_engineer_features(raw_health_data)
-            st.json(processed_health_data)
-
-            st.subheader("4. 모델 입력 데이터 준비:")
-            model_input_df = prepare_model_input(processed_health_data)
+            st.json(history_entry["features"])
 
-            if model_input_df is not None and not model_input_df.empty:
-                st.dataframe(model_input_df)
+    if ocr_result is not None:
+        if ocr_result["error"]:
+            st.error(f"Vision API 오류 발생: {ocr_result['error']}")
 
-                st.subheader("5. 고혈압 위험 예측:")
-                if loaded_model is not None and loaded_scaler is not None:
-                    try:
-                        scaled_input = loaded_scaler.transform(model_input_df)
-                        prediction_proba = loaded_model.predict_proba(scaled_input)[:, 1]
-                        st.write(f"예측된 고혈압 확률: **{prediction_proba[0]:.4f}**")
-
-                        risk_level = classify_risk_level(prediction_proba[0])
-                        st.write(f"고혈압 위험 등급: **{risk_level}**")
+        if ocr_result["text"]:
+            analyze_ocr_text(image_hash, ocr_result["text"], ocr_result.get("words"), prediction_engine, stage_status)
+        else:
+            stage_status.update(label="텍스트 없음", state="error")
+            st.info("이미지에서 텍스트를 찾을 수 없습니다.")
 
-                        st.session_state['prediction_proba'] = prediction_proba[0]
-                        st.session_state['risk_level'] = risk_level
+# 여러 이미지가 업로드되면 일괄 처리
+BATCH_RESULT_COLUMNS = ["파일명", "상태", "예측 확률", "위험 등급"]
 
-                        st.page_link("pages/page_2.py", label="결과 보기", icon="📈")
+if uploaded_files and ocr_backend is not None:
+    st.write(f"이미지 {len(uploaded_files)}장에서 텍스트 추출 중...")
 
-                    except Exception as e:
-                        st.error(f"모델 예측 중 오류 발생: {e}")
-                        st.warning("모델 입력 데이터의 형식이나 피처가 모델의 기대치와 다를 수 있습니다.")
-                else:
-                    st.warning("모델 또는 스케일러가 로드되지 않아 예측을 수행할 수 없습니다.")
+    try:
+        image_contents = [f.getvalue() for f in uploaded_files]
+        image_hashes = [image_digest(content) for content in image_contents]
+
+        # 같은 모델로 분석한 기록이 있는 이미지는 OCR/예측 없이 저장된 결과를 사용
+        prediction_engine = load_prediction_assets()
+        risk_thresholds = pipeline.risk_thresholds(prediction_engine)
+        history_entries = {}
+        if prediction_history is not None and prediction_engine is not None:
+            history_entries = prediction_history.find_many(image_hashes, prediction_engine.version)
+        pending_indexes = [i for i, image_hash in enumerate(image_hashes) if image_hash not in history_entries]
+        if history_entries:
+            st.caption(f"{len(uploaded_files) - len(pending_indexes)}장은 이전에 분석한 결과를 사용합니다.")
+
+        # 캐시에 없는 이미지만 정규화하고, 절감된 전송량을 합산
+        prepared_images = []
+
+        def prepare_batch_image(content):
+            with metrics.timed("image_prep", size=len(content)):
+                prepared = normalize_image(
+                    content, max_side=config.IMAGE_MAX_SIDE, jpeg_quality=config.IMAGE_JPEG_QUALITY
+                )
+            prepared_images.append(prepared)
+            return prepared.content
+
+        ocr_results = detect_texts_batch(
+            ocr_backend,
+            [image_contents[i] for i in pending_indexes],
+            ocr_cache,
+            max_workers=config.OCR_BATCH_MAX_WORKERS,
+            prepare_image=prepare_batch_image,
+        )
+        ocr_results_by_index = dict(zip(pending_indexes, ocr_results))
+        if prepared_images:
+            original_total = sum(p.original_bytes for p in prepared_images)
+            saved_total = sum(p.bytes_saved for p in prepared_images)
+            st.caption(
+                f"이미지 최적화: {len(prepared_images)}장, {original_total:,} bytes 중 {saved_total:,} bytes 절감"
+            )
+        # 이미지 바이트는 OCR 이후에 쓰지 않으므로 결과 표 생성 전에 놓아 줌
+        image_contents = prepared_images = None
+
+        batch_rows = []
+        scored_rows = []
+        parsed_records = []
+        parsed_hashes = []
+        for i, batch_file in enumerate(uploaded_files):
+            row = {"파일명": batch_file.name, "상태": "분석 완료", "예측 확률": None, "위험 등급": None, "모델 버전": None}
+            history_entry = history_entries.get(image_hashes[i])
+            ocr_result = ocr_results_by_index.get(i)
+            if history_entry is not None:
+                row.update(history_entry["parsed"])
+                row["상태"] = "이전 분석 결과"
+                row["예측 확률"] = history_entry["probability"]
+                row["모델 버전"] = prediction_engine.version
+                row["위험 등급"] = classify_risk_level(history_entry["probability"], risk_thresholds)
+            elif ocr_result["error"]:
+                row["상태"] = f"Vision API 오류: {ocr_result['error']}"
+            elif not ocr_result["text"]:
+                row["상태"] = "텍스트 없음"
             else:
-                st.warning("모델 입력 데이터 준비 실패 또는 데이터가 비어있습니다. 예측을 수행할 수 없습니다.")
+                with metrics.timed("parse", size=len(ocr_result["text"])):
+                    raw_health_data, _ = parse_health_data(ocr_result["text"], ocr_result.get("words"))
+                row.update(raw_health_data)
+                parsed_records.append(raw_health_data)
+                parsed_hashes.append(image_hashes[i])
+                scored_rows.append(row)
+            batch_rows.append(row)
+
+        # 파싱된 모든 레코드를 배열 하나로 만들어 한 번의 예측 엔진 호출로 예측
+        if parsed_records:
+            if prediction_engine is None:
+                st.warning("모델 또는 스케일러가 로드되지 않아 예측을 수행할 수 없습니다.")
+            else:
+                try:
+                    with metrics.timed("features", size=len(parsed_records)):
+                        model_input = pipeline.build_model_input(parsed_records)
+                    with metrics.timed("predict", size=len(parsed_records)):
+                        prediction_probas = prediction_engine.predict_proba(model_input)
+                    for row, prediction_proba in zip(scored_rows, prediction_probas):
+                        row["예측 확률"] = float(prediction_proba)
+                        row["모델 버전"] = prediction_engine.version
+                        row["위험 등급"] = classify_risk_level(prediction_proba, risk_thresholds)
+                    record_predictions([
+                        (
+                            image_hash, prediction_engine.version, raw_health_data,
+                            FEATURE_BUILDER.to_dict(features), row["예측 확률"], row["위험 등급"],
+                        )
+                        for image_hash, raw_health_data, features, row
+                        in zip(parsed_hashes, parsed_records, model_input, scored_rows)
+                    ])
+                except Exception as e:
+                    st.error(f"모델 예측 중 오류 발생: {e}")
+                    st.warning("모델 입력 데이터의 형식이나 피처가 모델의 기대치와 다를 수 있습니다.")
+
+        import pandas as pd
+
+        st.subheader("일괄 분석 결과:")
+        batch_results_df = pd.DataFrame(batch_rows)
+        # 기본 화면은 결과 열만 전송하고, 파싱된 검진 항목 전체는 세부 정보를 켰을 때만 표시 (CSV에는 모두 포함)
+        if show_details_toggle():
+            st.dataframe(batch_results_df)
         else:
-            st.info("이미지에서 텍스트를 찾을 수 없습니다.")
-
-        if response.error.message:
-            st.error(f"Vision API 오류 발생: {response.error.message}")
+            st.dataframe(batch_results_df[BATCH_RESULT_COLUMNS])
+        st.download_button(
+            "결과 CSV 다운로드",
+            batch_results_df.to_csv(index=False).encode("utf-8-sig"),
+            file_name="batch_results.csv",
+            mime="text/csv",
+        )
 
     except Exception as e:
-        st.error(f"텍스트 추출 또는 데이터 처리 중 오류 발생: {e}")
+        st.error(f"일괄 텍스트 추출 또는 데이터 처리 중 오류 발생: {e}")
 
 st.markdown("---")
 st.write("이 애플리케이션은 Google Cloud Vision API 및 제공된 데이터 처리 로직을 사용합니다.")
+
+# 관리자 사이드바 (?admin=<토큰>으로 접속한 경우에만 표시)
+admin_sections = {"OCR 캐시": ocr_cache.stats()}
+if isinstance(ocr_backend, OcrDispatcher):
+    admin_sections["OCR 디스패처"] = ocr_backend.stats()
+if prediction_history is not None:
+    admin_sections["예측 기록"] = prediction_history.stats()
+model_reloader = shared_reloader(load=False)
+if model_reloader is not None:
+    admin_sections["예측 모델"] = model_reloader.stats()
+render_admin_sidebar(admin_sections)
+finish_page_profile(page_profile)
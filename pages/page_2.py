@@ -1,5 +1,11 @@
+import math
+import time
+
 import streamlit as st
-import numpy as np
+
+from carebite import config
+from carebite.history import get_history_store
+from carebite.risk_levels import RISK_LEVELS, classify_risk_level, load_risk_thresholds
 
 # st.set_page_config는 app.py에서 이미 호출되었으므로 여기서는 제거합니다.
 # st.set_page_config(page_title="고혈압 위험도 예측 결과", layout="centered")
@@ -8,21 +14,15 @@ import numpy as np
 # app.py에서 전역적으로 CSS를 적용하므로 여기서는 제거합니다.
 # st.markdown("""...""")
 
-# --- 고혈압 위험 등급 분류 함수 ---
-def classify_risk_level(prediction_proba):
-    if prediction_proba is None:
-        return "분류 불가", "#CCCCCC" # 회색
-
-    # 04_modeling.ipynb에서 Threshold 0.48로 조정되었으므로, 이를 반영하여 분류
-    # 이 분류 로직은 예측 확률을 4단계로 나누는 것이므로, 0.48은 '정상'과 '주의'를 나누는 기준으로만 적용
-    if prediction_proba < 0.48: # 0.48 미만이면 '정상'으로 분류 (양성 예측을 줄임)
-        return "정상", "#38ADA9"  # 초록색
-    elif prediction_proba <= 0.59: # 0.48 이상 0.59 이하
-        return "주의", "#F7D400"  # 노란색
-    elif prediction_proba <= 0.74: # 0.59 초과 0.74 이하
-        return "위험", "#F79C00"  # 주황색
-    else: # prediction_proba > 0.74
-        return "고위험", "#FF4D4D"  # 빨간색
+# --- 위험 등급별 색상 ---
+# 등급 경계는 carebite.risk_levels 한 곳에서 정하고(이미지 분석 페이지와 같은 값), 여기서는 색상만 정합니다.
+RISK_LEVEL_COLORS = {
+    "정상": "#38ADA9",  # 초록색
+    "주의": "#F7D400",  # 노란색
+    "위험": "#F79C00",  # 주황색
+    "고위험": "#FF4D4D",  # 빨간색
+}
+UNCLASSIFIED_COLOR = "#CCCCCC"  # 회색
 
 # --- Streamlit 앱 메인 로직 ---
 
@@ -34,9 +34,9 @@ prediction_proba_from_session = st.session_state.get('prediction_proba')
 risk_level_from_session = st.session_state.get('risk_level')
 
 if prediction_proba_from_session is not None and risk_level_from_session is not None:
-    # 예측 확률에 따라 등급과 색상 결정 (다시 계산)
-    # page_1.py에서 이미 계산된 등급을 가져와 사용해도 됨
-    risk_level, color = classify_risk_level(prediction_proba_from_session)
+    # 등급은 page_1.py에서 같은 경계(risk_levels.risk_thresholds)로 계산한 값을 그대로 사용
+    risk_level = risk_level_from_session
+    color = RISK_LEVEL_COLORS.get(risk_level, UNCLASSIFIED_COLOR)
 
     # 원형 그래프 표시
     st.markdown(
@@ -48,11 +48,78 @@ if prediction_proba_from_session is not None and risk_level_from_session is not
         """,
         unsafe_allow_html=True
     )
+    model_version = st.session_state.get('model_version')
+    if model_version:
+        st.caption(f"예측 모델: {model_version}")
 else:
     st.info("예측 결과가 없습니다. '이미지 분석 시작하기' 페이지에서 이미지를 업로드하여 분석을 먼저 진행해주세요.")
     # page_1.py로 돌아가는 버튼 추가
     st.page_link("pages/page_1.py", label="이미지 분석 시작하기", icon="🚀")
 
+# --- 분석 기록 (예측 기록 저장소에서 조회, 다시 계산하지 않음) ---
+st.markdown("---")
+st.subheader("분석 기록")
+
+HISTORY_PERIODS = {"전체": None, "최근 7일": 7, "최근 30일": 30, "최근 90일": 90}
+
+try:
+    prediction_history = get_history_store()
+except Exception as e:
+    prediction_history = None
+    st.warning(f"예측 기록 저장소({config.HISTORY_DB_PATH})를 열 수 없습니다: {e}")
+
+if prediction_history is not None:
+    period = st.selectbox("기간", list(HISTORY_PERIODS), index=0)
+    period_days = HISTORY_PERIODS[period]
+    since = time.time() - period_days * 24 * 60 * 60 if period_days else None
+
+    total = prediction_history.count(since=since)
+    if total == 0:
+        st.info("저장된 분석 기록이 없습니다.")
+    else:
+        # 위험 등급별 건수 (저장된 예측 확률을 현재 경계로 다시 분류, 모델 아티팩트의 경계까지 반영)
+        risk_thresholds = load_risk_thresholds()
+        level_counts = prediction_history.risk_level_counts(since=since, thresholds=risk_thresholds)
+        for column, level in zip(st.columns(len(RISK_LEVELS)), RISK_LEVELS):
+            column.metric(level, f"{level_counts.get(level, 0)}건")
+
+        # 날짜별 평균 예측 확률 추이
+        trend = prediction_history.daily_trend(since=since)
+        if len(trend) > 1:
+            st.line_chart(
+                {
+                    "날짜": [row["day"] for row in trend],
+                    "평균 예측 확률": [row["mean_probability"] for row in trend],
+                    "최대 예측 확률": [row["max_probability"] for row in trend],
+                },
+                x="날짜",
+                y=["평균 예측 확률", "최대 예측 확률"],
+            )
+
+        # 최근 기록부터 페이지 단위로 조회
+        page_size = max(1, config.HISTORY_PAGE_SIZE)
+        page_count = math.ceil(total / page_size)
+        page_number = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1)
+        offset = (page_number - 1) * page_size
+        entries = prediction_history.list_page(page_size, offset, since=since)
+        # 위험 등급은 위 건수와 같은 규칙으로 (저장 당시 등급이 아니라 현재 경계로 다시 분류)
+        st.dataframe(
+            [
+                {
+                    "분석 시각": time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created_at"])),
+                    "위험 등급": classify_risk_level(entry["probability"], risk_thresholds),
+                    "예측 확률": entry["probability"],
+                    "나이": entry["parsed"].get("나이"),
+                    "성별": entry["parsed"].get("성별"),
+                    "수축기 혈압": entry["parsed"].get("수축기 혈압"),
+                    "이완기 혈압": entry["parsed"].get("이완기 혈압"),
+                    "조회 횟수": entry["seen_count"],
+                }
+                for entry in entries
+            ],
+            hide_index=True,
+        )
+        st.caption(f"전체 {total:,}건 중 {offset + 1:,}-{offset + len(entries):,}건 ({page_number}/{page_count} 페이지)")
 
 st.markdown("---")
 st.write("이 페이지는 예측 결과 시각화를 위한 것입니다.")
@@ -1 +1,219 @@
+import os
 
+import streamlit as st
+
+from carebite import config
+from carebite.admin import finish_page_profile, profile_fragment, render_admin_sidebar, start_page_profile
+from carebite.cohort import CohortFileError, detect_file_format, score_cohort
+from carebite.features import SOURCE_FIELDS
+from carebite.memory import ARTIFACTS, current_session_id, relieve_memory_pressure
+from carebite.model_reload import shared_reloader
+from carebite.risk_levels import RISK_LEVELS, validate_risk_thresholds
+
+# st.set_page_config는 app.py에서 이미 호출되었으므로 여기서는 호출하지 않습니다.
+
+# --- 코호트 분석 페이지 ---
+# 구조화된 검진 레코드 파일(CSV/Parquet)을 청크 단위로 점수화하고, 처리되는 대로 위험 등급 분포를 갱신합니다.
+# 파일 전체를 메모리에 올리지 않으며, 세션에는 집계(분포)만 남깁니다.
+# 경계 탐색용 정렬된 예측 확률(행당 8바이트)은 세션 중간 결과 보관소(carebite.memory.ARTIFACTS)에 두므로
+# 세션/프로세스 메모리 한도를 넘으면 해제되고, 그때는 분석을 다시 실행해야 경계를 탐색할 수 있습니다.
+# pandas/pyarrow는 분석을 시작할 때만 임포트합니다. (페이지 시작 시간 단축)
+
+# rerun 프로파일링 (CAREBITE_PROFILE=1 또는 관리자 ?profile=1일 때만, 페이지 맨 끝에서 마무리)
+page_profile = start_page_profile("page_3")
+
+st.title("코호트 분석")
+st.write(
+    "여러 사람의 검진 결과가 정리된 CSV 또는 Parquet 파일을 올리면 모든 레코드의 고혈압 위험도를 예측하고 "
+    "위험 등급 분포를 보여줍니다."
+)
+st.caption(f"열 이름은 검진 항목 이름과 같아야 합니다: {', '.join(SOURCE_FIELDS)}")
+
+relieve_memory_pressure()
+session_id = current_session_id()
+
+# 예측 모델 (이미지 분석 페이지와 같은 엔진, model/ 파일이 바뀌면 검증 후 교체됨)
+# 분석 한 번은 시작할 때 받은 엔진으로 끝까지 점수화합니다.
+def load_cohort_engine():
+    reloader = shared_reloader()
+    engine = reloader.current()
+    if engine is None:
+        raise RuntimeError(f"예측 모델을 로드하지 못했습니다: {reloader.last_error}")
+    return engine
+
+# --- 입력 파일 선택 ---
+cohort_source = None
+cohort_name = None
+source_options = ["파일 업로드"]
+if config.COHORT_DATA_DIR:
+    source_options.append("서버 파일")
+source_kind = st.radio("데이터 위치", source_options, horizontal=True) if len(source_options) > 1 else source_options[0]
+
+if source_kind == "파일 업로드":
+    uploaded_cohort = st.file_uploader("검진 레코드 파일을 선택하세요...", type=["csv", "parquet", "pq"])
+    if uploaded_cohort is not None:
+        cohort_source = uploaded_cohort
+        cohort_name = uploaded_cohort.name
+else:
+    # 허용한 디렉터리(CAREBITE_COHORT_DATA_DIR) 안의 파일만 선택 가능
+    data_dir = os.path.realpath(config.COHORT_DATA_DIR)
+    try:
+        server_files = sorted(
+            name for name in os.listdir(data_dir)
+            if os.path.splitext(name)[1].lower() in (".csv", ".parquet", ".pq")
+        )
+    except OSError as e:
+        server_files = []
+        st.warning(f"코호트 데이터 디렉터리({data_dir})를 읽을 수 없습니다: {e}")
+    selected_file = st.selectbox("서버 파일", server_files, index=None, placeholder="파일을 선택하세요")
+    if selected_file:
+        cohort_source = os.path.join(data_dir, selected_file)
+        cohort_name = selected_file
+
+# --- 결과 표시 ---
+def show_cohort_summary(summary, name, running=False):
+    rows = summary.rows
+    status_note = "분석 중" if running else "분석 완료"
+    st.subheader(f"{name} ({status_note})")
+
+    metric_columns = st.columns(3)
+    metric_columns[0].metric("레코드", f"{rows:,}건")
+    mean_probability = summary.mean_probability
+    metric_columns[1].metric("평균 예측 확률", f"{mean_probability:.3f}" if mean_probability is not None else "-")
+    rate = rows / summary.elapsed_seconds if summary.elapsed_seconds else 0
+    metric_columns[2].metric("처리 속도", f"{rate:,.0f}건/초")
+    st.caption(f"예측 모델: {summary.model_version}")
+    model_reloader = shared_reloader(load=False)
+    current_engine = model_reloader.current() if model_reloader is not None else None
+    if not running and current_engine is not None and current_engine.version != summary.model_version:
+        st.warning(f"분석 후 예측 모델이 {current_engine.version}(으)로 교체되었습니다. 새 모델로 보려면 분석을 다시 실행하세요.")
+
+    level_distribution = summary.level_distribution()
+    for column, level in zip(st.columns(len(RISK_LEVELS)), RISK_LEVELS):
+        count = level_distribution[level]
+        column.metric(level, f"{count:,}건", f"{count / rows:.1%}" if rows else None, delta_color="off")
+
+    probability_distribution = summary.probability_distribution()
+    st.bar_chart(
+        {"예측 확률 구간": list(probability_distribution), "레코드 수": list(probability_distribution.values())},
+        x="예측 확률 구간",
+        y="레코드 수",
+    )
+
+    if summary.missing_fields:
+        st.caption(f"파일에 없는 항목(결측으로 처리): {', '.join(summary.missing_fields)}")
+    if summary.verified_rows:
+        if summary.mismatches:
+            st.error(
+                f"레코드 단위 계산과 다른 결과가 {summary.mismatches:,}건 있습니다. "
+                f"(확인 {summary.verified_rows:,}건)"
+            )
+            st.json(summary.mismatch_samples)
+        else:
+            st.caption(f"레코드 단위 계산(이미지 분석과 같은 경로)과 결과 일치: {summary.verified_rows:,}건 확인")
+
+# --- 위험 등급 경계 탐색 ---
+# 정렬된 예측 확률 인덱스에서 경계마다 이진 탐색 한 번으로 등급별 건수를 구하므로
+# 슬라이더를 움직여도 레코드를 다시 분류하지 않습니다. fragment라 이 영역만 다시 실행됩니다.
+THRESHOLD_SLIDERS = (
+    ("explore_threshold_caution", "정상/주의 경계 (이상이면 주의)"),
+    ("explore_threshold_danger", "주의/위험 경계 (초과이면 위험)"),
+    ("explore_threshold_high_risk", "위험/고위험 경계 (초과이면 고위험)"),
+)
+
+def reset_explore_thresholds(thresholds):
+    for (key, _), value in zip(THRESHOLD_SLIDERS, thresholds):
+        st.session_state[key] = float(value)
+
+@st.fragment
+@profile_fragment("page_3.show_threshold_explorer")
+def show_threshold_explorer(summary):
+    st.subheader("위험 등급 경계 탐색")
+    st.caption("경계를 옮기면 이 코호트의 위험 등급 분포가 어떻게 바뀌는지 바로 보여줍니다. (예측은 다시 하지 않음)")
+    base_thresholds = summary.risk_thresholds
+    index = ARTIFACTS.get(session_id, 'cohort_probability_index')
+    if index is None:
+        if summary.probabilities_dropped:
+            st.info(
+                f"레코드가 많아 경계 탐색용 예측 확률을 보관하지 않았습니다. "
+                f"(세션 메모리 한도 {config.SESSION_MEMORY_BUDGET_BYTES / 1024 / 1024:.1f} MB)"
+            )
+        else:
+            st.info("메모리 한도로 경계 탐색용 예측 확률이 해제되었습니다. 분석을 다시 실행하면 탐색할 수 있습니다.")
+        return
+
+    for (key, _), value in zip(THRESHOLD_SLIDERS, base_thresholds):
+        st.session_state.setdefault(key, float(value))
+    thresholds = tuple(
+        column.slider(label, min_value=0.0, max_value=1.0, step=0.01, format="%.2f", key=key)
+        for column, (key, label) in zip(st.columns(len(THRESHOLD_SLIDERS)), THRESHOLD_SLIDERS)
+    )
+    st.button("현재 경계로 되돌리기", on_click=reset_explore_thresholds, args=(base_thresholds,))
+    try:
+        thresholds = validate_risk_thresholds(thresholds)
+    except ValueError:
+        st.error("경계는 정상/주의 <= 주의/위험 <= 위험/고위험 순서여야 합니다.")
+        return
+
+    base_counts = index.band_counts(base_thresholds)
+    counts = index.band_counts(thresholds)
+    rows = index.size
+    for column, level, count, base in zip(st.columns(len(RISK_LEVELS)), RISK_LEVELS, counts, base_counts):
+        column.metric(
+            level,
+            f"{count:,}건 ({count / rows:.1%})" if rows else "0건",
+            f"{count - base:+,}건" if count != base else None,
+            delta_color="off",
+        )
+    st.caption(
+        f"현재 경계 {', '.join(f'{t:.2f}' for t in base_thresholds)} 대비 변화 "
+        f"(정렬된 예측 확률 {rows:,}건, {index.nbytes / 1024 / 1024:.1f} MB)"
+    )
+
+if cohort_source is not None:
+    if st.button("분석 시작", type="primary"):
+        try:
+            engine = load_cohort_engine()
+            file_format = detect_file_format(cohort_name)
+            progress_bar = st.progress(0.0, text="분석 준비 중...")
+            summary_placeholder = st.empty()
+            summary = None
+            # 경계 탐색용 예측 확률은 세션 메모리 한도 안에서만 보관
+            for summary, progress in score_cohort(
+                cohort_source, engine, file_format, max_probability_bytes=config.SESSION_MEMORY_BUDGET_BYTES
+            ):
+                progress_bar.progress(
+                    min(1.0, progress or 0.0), text=f"{summary.rows:,}건 처리 중... ({summary.elapsed_seconds:.1f}초)"
+                )
+                # 청크가 끝날 때마다 분포를 다시 그림
+                with summary_placeholder.container():
+                    show_cohort_summary(summary, cohort_name, running=True)
+            progress_bar.empty()
+            summary_placeholder.empty()
+            if summary is None:
+                st.info("파일에 분석할 레코드가 없습니다.")
+            # 세션에는 집계만, 정렬된 예측 확률은 보관소에 남김 (rerun 때 다시 계산하지 않음)
+            ARTIFACTS.discard(session_id, 'cohort_probability_index')
+            if summary is not None and not summary.probabilities_dropped:
+                index = summary.probability_index()
+                summary.release_probabilities()
+                ARTIFACTS.put(session_id, 'cohort_probability_index', index, size=index.nbytes)
+            st.session_state['cohort_result'] = (cohort_name, summary)
+            if summary is not None:
+                # 새 코호트는 현재 경계에서 탐색을 시작
+                reset_explore_thresholds(summary.risk_thresholds)
+        except CohortFileError as e:
+            st.error(str(e))
+        except Exception as e:
+            st.error(f"코호트 파일 분석 중 오류 발생: {e}")
+
+cohort_result = st.session_state.get('cohort_result')
+if cohort_result is not None and cohort_result[1] is not None:
+    show_cohort_summary(cohort_result[1], cohort_result[0])
+    if cohort_result[1].rows:
+        show_threshold_explorer(cohort_result[1])
+
+# 관리자 사이드바 (?admin=<토큰>으로 접속한 경우에만 표시)
+model_reloader = shared_reloader(load=False)
+render_admin_sidebar({"예측 모델": model_reloader.stats()} if model_reloader is not None else None)
+finish_page_profile(page_profile)
@@ -0,0 +1,27 @@
+import json
+
+from tornado.testing import AsyncHTTPTestCase
+
+from carebite.api import make_app
+
+
+class ScoreHandlerTest(AsyncHTTPTestCase):
+    def get_app(self):
+        return make_app()
+
+    def post_json(self, payload):
+        response = self.fetch("/v1/score", method="POST", body=json.dumps(payload, ensure_ascii=False))
+        return response.code, json.loads(response.body)
+
+    def test_bad_record_does_not_fail_the_batch(self):
+        code, body = self.post_json({
+            "records": [
+                {"id": "bad", "성별": ["남성"]},
+                {"id": "good", "나이": 45, "성별": "남성", "수축기 혈압": 135, "이완기 혈압": 85},
+            ]
+        })
+        assert code == 200
+        bad, good = body["results"]
+        assert bad["id"] == "bad" and "성별" in bad["error"]
+        assert good["id"] == "good" and 0.0 <= good["probability"] <= 1.0
+        assert "error" not in good
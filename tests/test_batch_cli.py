@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from carebite import batch_cli, pipeline
+from carebite.ocr_parser import FIELD_ORDER
+
+CHECKUP_TEXT = """건강검진 결과
+나이
+45세
+성별
+남성
+키(cm)/몸무게(kg) 175(cm)/72(kg)
+고혈압 135 / 85 mmHg
+공복혈당(mg/dL) 98
+총콜레스테롤(mg/dL) 210
+"""
+
+
+@pytest.fixture(scope="module", autouse=True)
+def worker():
+    batch_cli._init_worker(pipeline.MODEL_ARTIFACT_PATH, pipeline.MODEL_PATH, pipeline.SCALER_PATH, False)
+
+
+def write_jsonl(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_malformed_jsonl_line_is_recorded_and_processing_continues(tmp_path):
+    path = write_jsonl(tmp_path / "records.jsonl", [
+        json.dumps({"id": "a", "text": CHECKUP_TEXT}, ensure_ascii=False),
+        '{"id": "b", "text": ',
+        "[1, 2]",
+        json.dumps({"id": "d", "text": CHECKUP_TEXT}, ensure_ascii=False),
+    ])
+
+    rows = batch_cli.process_chunk(list(batch_cli.iter_jsonl_records(path)))
+
+    assert [row["id"] for row in rows] == ["a", "2", "3", "d"]
+    assert rows[1]["상태"].startswith("JSON 형식 오류")
+    assert rows[2]["상태"].startswith("JSON 형식 오류")
+    for row in (rows[0], rows[3]):
+        assert row["상태"] == "분석 완료"
+        assert 0.0 <= row["예측 확률"] <= 1.0
+
+
+def test_parser_exception_is_recorded_in_that_row(tmp_path, monkeypatch):
+    parse_health_data = batch_cli.parse_health_data
+
+    def flaky_parse(text, words=None):
+        if "깨진" in text:
+            raise ValueError("예상하지 못한 형식")
+        return parse_health_data(text, words)
+
+    monkeypatch.setattr(batch_cli, "parse_health_data", flaky_parse)
+    chunk = [
+        {"id": "ok", "text": CHECKUP_TEXT, "words": None},
+        {"id": "bad", "text": "깨진 결과지", "words": None},
+    ]
+
+    ok, bad = batch_cli.process_chunk(chunk)
+
+    assert ok["상태"] == "분석 완료" and ok["위험 등급"] is not None
+    assert bad["상태"] == "파싱 실패: 예상하지 못한 형식"
+    assert all(bad[field] is None for field in FIELD_ORDER) and bad["예측 확률"] is None
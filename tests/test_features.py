@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from carebite.features import FEATURE_BUILDER, MODEL_FEATURES, SOURCE_FIELDS
+
+NAN = float("nan")
+
+RECORDS = [
+    {
+        "나이": 45, "성별": "남성", "신장": 175, "체중": 72, "공복 혈당": 98.0, "총 콜레스테롤": 210.0,
+        "혈색소": 14.2, "요단백": "정상", "혈청 크레아티닌": 0.9, "AST": 25.0, "ALT": 30.0, "감마지티피": 40.0,
+        "트리글리세라이드": 150.0, "HDL 콜레스테롤": 50.0, "LDL 콜레스테롤": 130.0,
+    },
+    # 표에 없는 범주 값, 숫자 문자열, 0 분모/신장
+    {
+        "나이": "61", "성별": "기타", "신장": 0, "체중": 60, "요단백": "단백뇨 의심", "AST": 0, "ALT": 12.5,
+        "감마지티피": "측정불가", "HDL 콜레스테롤": 0, "트리글리세라이드": 120,
+    },
+    # None/NaN 결측
+    {"나이": None, "성별": None, "신장": NAN, "체중": None, "AST": NAN, "ALT": None, "요단백": None},
+    # 필드가 아예 없는 레코드
+    {},
+]
+
+
+def as_columns(records):
+    columns = {}
+    for field in SOURCE_FIELDS:
+        values = [record.get(field) for record in records]
+        array = np.asarray(values, dtype=object)
+        # 숫자만 있는 열은 숫자 배열 (API 열 형식/코호트 파일과 같은 경로)
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            array = np.asarray(values, dtype=np.float64)
+        columns[field] = array
+    return columns
+
+
+def test_build_many_matches_build():
+    many = FEATURE_BUILDER.build_many(RECORDS)
+    assert many.shape == (len(RECORDS), len(MODEL_FEATURES))
+    for row, record in zip(many, RECORDS):
+        np.testing.assert_array_equal(row, FEATURE_BUILDER.build(record))
+
+
+def test_build_columns_matches_build_many():
+    expected = FEATURE_BUILDER.build_many(RECORDS)
+    actual = FEATURE_BUILDER.build_columns(as_columns(RECORDS), len(RECORDS))
+    # 비트 단위로 같아야 함 (NaN 위치 포함)
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_build_columns_accepts_dataframe():
+    expected = FEATURE_BUILDER.build_many(RECORDS)
+    frame = pd.DataFrame({field: values for field, values in as_columns(RECORDS).items()})
+    np.testing.assert_array_equal(FEATURE_BUILDER.build_columns(frame, len(RECORDS)), expected)
+
+
+def test_unknown_category_and_missing_values_are_nan():
+    features = dict(zip(MODEL_FEATURES, FEATURE_BUILDER.build(RECORDS[1])))
+    assert np.isnan(features["성별코드"])
+    assert np.isnan(features["요단백"])
+    assert np.isnan(features["bmi"])  # 신장 0
+    assert np.isnan(features["alt_ast_ratio"])  # AST 0
+    assert features["연령대코드(5세단위)"] == 60.0
+    missing = FEATURE_BUILDER.build(RECORDS[2])
+    assert np.isnan(missing[MODEL_FEATURES.index("연령대코드(5세단위)")])
+    assert missing[MODEL_FEATURES.index("흡연상태")] == 1.0
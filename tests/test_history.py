@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+from carebite.history import HistoryStore
+from carebite.risk_levels import classify_risk_level
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.sqlite3"))
+
+
+def entry(image_hash, model_version="m1", probability=0.5, risk_level="주의"):
+    return (image_hash, model_version, {"나이": 45}, {"bmi": 23.5}, probability, risk_level)
+
+
+def test_record_upserts_and_counts_seen(store):
+    store.record(*entry("a", probability=0.4))
+    store.record(*entry("a", probability=0.7, risk_level="위험"))
+
+    assert store.count() == 1
+    (row,) = store.list_page(10)
+    assert row["seen_count"] == 2
+    # 같은 키를 다시 기록하면 최신 결과로 바뀜
+    assert row["probability"] == 0.7 and row["risk_level"] == "위험"
+    assert row["parsed"] == {"나이": 45}
+
+
+def test_image_and_model_version_are_the_unique_key(store):
+    store.record_many([entry("a", "m1"), entry("a", "m2"), entry("b", "m1")])
+    assert store.count() == 3
+    assert store.find("a", "m2")["model_version"] == "m2"
+    assert store.find("a", "m3") is None
+
+    conn = sqlite3.connect(store.path)
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute(
+            "INSERT INTO predictions (image_hash, model_version, created_at, last_seen_at, probability, risk_level, "
+            "parsed_json, features_json) VALUES ('a', 'm1', 0, 0, 0.1, '정상', '{}', '{}')"
+        )
+
+
+def test_find_touches_seen_count_only_when_asked(store):
+    store.record(*entry("a"))
+    store.find_many(["a"], "m1", touch=False)
+    assert store.list_page(1)[0]["seen_count"] == 1
+    store.find("a", "m1")
+    assert store.list_page(1)[0]["seen_count"] == 2
+
+
+def test_risk_level_counts_reclassifies_with_thresholds(store):
+    probabilities = [0.1, 0.5, 0.55, 0.65, 0.9, None]
+    store.record_many([
+        entry(f"h{i}", probability=p, risk_level="정상" if p is not None else "분류 불가")
+        for i, p in enumerate(probabilities)
+    ])
+
+    # 저장된 등급 그대로
+    assert store.risk_level_counts() == {"정상": 5, "분류 불가": 1}
+
+    # SQL 재분류는 classify_risk_level과 같은 규칙 (경계 값 포함), 확률이 없으면 저장된 등급
+    thresholds = (0.5, 0.6, 0.8)
+    expected = {}
+    for p in probabilities:
+        level = classify_risk_level(p, thresholds) if p is not None else "분류 불가"
+        expected[level] = expected.get(level, 0) + 1
+    assert store.risk_level_counts(thresholds=thresholds) == expected
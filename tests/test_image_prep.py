@@ -0,0 +1,43 @@
+import io
+
+import pytest
+from PIL import Image
+
+from carebite.image_prep import make_thumbnail, normalize_image
+
+
+def png_bytes(size=(1200, 800)):
+    output = io.BytesIO()
+    Image.new("RGB", size, (200, 200, 200)).save(output, format="PNG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def bomb(monkeypatch):
+    # 픽셀 수 제한을 낮춰 평범한 이미지를 압축 폭탄으로 취급하게 함 (제한의 2배를 넘으면 DecompressionBombError)
+    content = png_bytes()
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    with pytest.raises(Image.DecompressionBombError):
+        Image.open(io.BytesIO(content))
+    return content
+
+
+@pytest.mark.parametrize("content", [b"not an image", png_bytes()[:100]])
+def test_unreadable_image_falls_back_to_original_bytes(content):
+    result = normalize_image(content)
+    assert result.content == content and not result.normalized
+    assert make_thumbnail(content) is None
+
+
+def test_decompression_bomb_falls_back_to_original_bytes(bomb):
+    result = normalize_image(bomb)
+    assert result.content == bomb and not result.normalized and result.width is None
+    assert make_thumbnail(bomb) is None
+
+
+def test_readable_image_is_normalized_and_thumbnailed():
+    content = png_bytes()
+    result = normalize_image(content, max_side=600)
+    assert (result.width, result.height) == (600, 400)
+    thumbnail = make_thumbnail(content, max_side=120)
+    assert Image.open(io.BytesIO(thumbnail)).size == (120, 80)
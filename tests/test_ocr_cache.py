@@ -0,0 +1,84 @@
+import os
+
+from carebite import ocr_cache as ocr_cache_module
+from carebite.ocr_cache import OcrCache, image_digest
+
+
+def key(n):
+    return image_digest(str(n).encode())
+
+
+def disk_files(directory):
+    return [name for _, _, files in os.walk(directory) for name in files if name.endswith(".json")]
+
+
+def test_memory_tier_evicts_least_recently_used_entry():
+    cache = OcrCache(max_entries=2)
+    cache.put(key(1), "one")
+    cache.put(key(2), "two")
+    cache.get(key(1))
+    cache.put(key(3), "three")
+    assert cache.get(key(2)) is None
+    assert cache.get(key(1))["text"] == "one"
+    assert cache.get(key(3))["text"] == "three"
+
+
+def test_memory_tier_respects_byte_budget():
+    cache = OcrCache(max_entries=100, max_memory_bytes=20_000)
+    for n in range(10):
+        cache.put(key(n), "x" * 5_000)
+    assert cache.memory_bytes() <= 20_000
+    assert cache.get(key(0)) is None
+    assert cache.get(key(9)) is not None
+    # 한도보다 큰 항목 하나는 그대로 유지
+    cache.put(key("big"), "y" * 50_000)
+    assert cache.get(key("big")) is not None
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path, monkeypatch):
+    cache = OcrCache(disk_dir=str(tmp_path), ttl_seconds=60)
+    cache.put(key(1), "text", words=[["혈색소", 0, 0, 10, 10, 0.9]])
+    assert OcrCache(disk_dir=str(tmp_path), ttl_seconds=60).get(key(1))["text"] == "text"
+
+    now = ocr_cache_module.time.time()
+    monkeypatch.setattr(ocr_cache_module.time, "time", lambda: now + 120)
+    assert OcrCache(disk_dir=str(tmp_path), ttl_seconds=60).get(key(1)) is None
+    assert disk_files(tmp_path) == []
+
+
+def test_disk_tier_evicts_oldest_files_over_budget(tmp_path):
+    cache = OcrCache(disk_dir=str(tmp_path), disk_max_bytes=5_000)
+    for n in range(10):
+        cache.put(key(n), "x" * 900)
+    assert cache.stats()["disk_bytes"] <= 5_000
+    assert sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(tmp_path) for name in files) == cache.stats()["disk_bytes"]
+    assert OcrCache(disk_dir=str(tmp_path)).get(key(9)) is not None
+
+
+def test_overwriting_a_disk_entry_counts_only_the_size_difference(tmp_path):
+    # 회귀: 같은 키를 덮어쓰면 디스크 합계가 계속 늘어나 일찍 삭제가 일어났음
+    cache = OcrCache(disk_dir=str(tmp_path))
+    for _ in range(5):
+        cache.put(key(1), "x" * 1000)
+    assert cache.stats()["disk_bytes"] == OcrCache(disk_dir=str(tmp_path)).stats()["disk_bytes"]
+
+
+def test_error_results_stay_in_memory_only_and_expire(tmp_path, monkeypatch):
+    # 회귀: 일시적인 Vision 오류가 디스크 TTL(며칠) 동안 이미지에 붙어 있었음
+    cache = OcrCache(disk_dir=str(tmp_path), ttl_seconds=7 * 24 * 3600, error_ttl_seconds=60)
+    cache.put(key(1), "", error="429 quota exceeded")
+    assert cache.get(key(1))["error"] == "429 quota exceeded"
+    assert disk_files(tmp_path) == []
+    assert OcrCache(disk_dir=str(tmp_path)).get(key(1)) is None
+
+    now = ocr_cache_module.time.time()
+    monkeypatch.setattr(ocr_cache_module.time, "time", lambda: now + 61)
+    assert cache.get(key(1)) is None
+
+
+def test_error_entries_left_on_disk_are_dropped(tmp_path):
+    cache = OcrCache(disk_dir=str(tmp_path))
+    cache._write_disk(key(1), {"text": "", "error": "deadline", "words": None, "created_at": 0})
+    assert OcrCache(disk_dir=str(tmp_path)).get(key(1)) is None
+    assert disk_files(tmp_path) == []
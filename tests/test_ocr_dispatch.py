@@ -0,0 +1,23 @@
+import time
+
+from carebite.ocr_dispatch import TokenBucket
+
+
+def test_token_bucket_charges_batches_larger_than_burst():
+    rate, burst, units = 50.0, 10, 30
+    bucket = TokenBucket(rate, burst)
+
+    started = time.monotonic()
+    waited = bucket.acquire(units)
+    elapsed = time.monotonic() - started
+
+    # burst까지는 바로, 나머지는 초당 rate개씩
+    assert waited >= (units - burst) / rate - 1e-6
+    assert elapsed >= (units - burst) / rate - 0.01
+    # 이미지 수만큼 모두 차감했으므로 남은 토큰이 없음
+    assert bucket.available() < 1.0
+
+
+def test_token_bucket_within_burst_does_not_wait():
+    bucket = TokenBucket(50.0, 10)
+    assert bucket.acquire(10) == 0.0
@@ -0,0 +1,99 @@
+from carebite.ocr_layout import words_from_text
+from carebite.ocr_parser import (
+    FIELD_ORDER, TEXT_MATCH_CONFIDENCE, VALUE_WINDOW, HealthDataParser, parse_health_data,
+    parse_health_data_from_ocr,
+)
+
+CHECKUP_TEXT = """건강검진 결과
+나이
+45세
+성별
+남성
+키(cm)/몸무게(kg) 175(cm)/72(kg)
+고혈압 135 / 85 mmHg
+혈색소(g/dL) 14.2
+공복혈당(mg/dL) 98
+총콜레스테롤(mg/dL) 210
+고밀도 콜레스테롤(mg/dL) 50
+중성지방(mg/dL) 150
+저밀도 콜레스테롤(mg/dL) 130
+혈청 크레아티닌(mg/dL) 0.9
+AST(SGOT) 25
+ALT(SGPT) 30
+감마지티피 40
+요단백 정상
+"""
+
+
+def test_parse_reads_every_field_in_field_order():
+    data = HealthDataParser().parse(CHECKUP_TEXT)
+    assert list(data) == FIELD_ORDER
+    assert data == {
+        '나이': 45, '성별': '남성', '신장': 175, '체중': 72, '수축기 혈압': 135, '이완기 혈압': 85,
+        '혈색소': 14.2, '공복 혈당': 98.0, '총 콜레스테롤': 210.0, 'HDL 콜레스테롤': 50.0,
+        '트리글리세라이드': 150.0, 'LDL 콜레스테롤': 130.0, '혈청 크레아티닌': 0.9,
+        'AST': 25.0, 'ALT': 30.0, '감마지티피': 40.0, '요단백': '정상',
+        '흡연 상태': None, '음주 여부': None,
+    }
+
+
+def test_blood_pressure_and_height_weight_are_read_around_unit_anchors():
+    data = parse_health_data_from_ocr("측정 결과 키 168(cm)/59(kg) 혈압 118/76mmHg")
+    assert (data['신장'], data['체중']) == (168, 59)
+    assert (data['수축기 혈압'], data['이완기 혈압']) == (118, 76)
+
+
+def test_missing_anchor_values_stay_none():
+    data = parse_health_data_from_ocr("혈압 mmHg\n(cm)/ 체중 미측정")
+    assert data['수축기 혈압'] is None and data['이완기 혈압'] is None
+    assert data['신장'] is None and data['체중'] is None
+
+
+def test_ast_alt_use_first_number_after_label():
+    data = parse_health_data_from_ocr("AST 결과 (참고치 이하) 31 U/L\nSGPT 결과 22")
+    assert data['AST'] == 31.0
+    assert data['ALT'] == 22.0
+
+
+def test_urine_protein_keeps_text_value():
+    assert parse_health_data_from_ocr("요단백 경계")['요단백'] == '경계'
+    assert parse_health_data_from_ocr("요단백 음성(-)")['요단백'] == '음성'
+
+
+def test_age_and_gender_are_read_from_the_line_after_the_last_label():
+    data = parse_health_data_from_ocr("나이 성별\n62세 여성\n")
+    assert data['나이'] == 62
+    assert data['성별'] == '여성'
+    # 레이블이 마지막 줄이면 값이 없음
+    assert parse_health_data_from_ocr("이름 홍길동\n나이")['나이'] is None
+
+
+def test_search_value_window_cutoff():
+    within = "AST" + " " * (VALUE_WINDOW - 10) + "25"
+    beyond = "AST" + " " * (VALUE_WINDOW + 10) + "25"
+    assert parse_health_data_from_ocr(within)['AST'] == 25.0
+    assert parse_health_data_from_ocr(beyond)['AST'] is None
+    assert HealthDataParser(value_window=VALUE_WINDOW + 20).parse(beyond)['AST'] == 25.0
+
+
+def test_parse_health_data_prefers_layout_values():
+    # 좌표(단어 배치)로 읽은 값이 텍스트 패턴 값보다 우선
+    words = words_from_text("혈색소 15.1\n나이 50")
+    data, confidence = parse_health_data(CHECKUP_TEXT, words)
+    assert data['혈색소'] == 15.1
+    assert data['나이'] == 50
+    assert confidence['혈색소'] == confidence['나이'] == 1.0
+
+
+def test_parse_health_data_falls_back_to_text_for_fields_missing_in_layout():
+    words = words_from_text("혈색소 15.1")
+    data, confidence = parse_health_data(CHECKUP_TEXT, words)
+    assert data['공복 혈당'] == 98.0
+    assert confidence['공복 혈당'] == TEXT_MATCH_CONFIDENCE
+    assert '흡연 상태' not in confidence
+
+
+def test_parse_health_data_without_words_matches_text_parser():
+    data, confidence = parse_health_data(CHECKUP_TEXT)
+    assert data == parse_health_data_from_ocr(CHECKUP_TEXT)
+    assert set(confidence.values()) == {TEXT_MATCH_CONFIDENCE}
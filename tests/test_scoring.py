@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from carebite import pipeline
+from carebite.scoring import SKLEARN_TOLERANCE, ScoringEngine
+
+joblib = pytest.importorskip("joblib")
+pytest.importorskip("sklearn")
+
+
+@pytest.fixture(scope="module")
+def sklearn_model():
+    return joblib.load(pipeline.MODEL_PATH), joblib.load(pipeline.SCALER_PATH)
+
+
+def sklearn_proba(model, scaler, X, feature_names):
+    # 기존 경로: 스케일링 대상 피처만 scaler.transform, 결측값은 스케일링 후 0(학습 평균)으로 채움
+    scaled_features = list(scaler.feature_names_in_)
+    scaled_index = [feature_names.index(name) for name in scaled_features]
+    X_scaled = X.copy()
+    X_scaled[:, scaled_index] = scaler.transform(pd.DataFrame(X[:, scaled_index], columns=scaled_features))
+    return model.predict_proba(np.nan_to_num(X_scaled, nan=0.0))[:, 1]
+
+
+def realistic_inputs(scaler, feature_names, rows, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, len(feature_names)))
+    scaled_index = [feature_names.index(name) for name in scaler.feature_names_in_]
+    X[:, scaled_index] = X[:, scaled_index] * scaler.scale_ + scaler.mean_
+    return X
+
+
+def test_engine_matches_sklearn(sklearn_model):
+    model, scaler = sklearn_model
+    engine = ScoringEngine.from_sklearn(model, scaler)
+    X = realistic_inputs(scaler, engine.feature_names, 256, seed=1)
+    expected = sklearn_proba(model, scaler, X, engine.feature_names)
+    np.testing.assert_allclose(engine.predict_proba(X), expected, rtol=0, atol=SKLEARN_TOLERANCE)
+    # 한 건 경로도 같은 값
+    assert abs(float(engine.predict_proba(X[0])) - expected[0]) <= SKLEARN_TOLERANCE
+
+
+def test_engine_imputes_missing_values_like_sklearn(sklearn_model):
+    model, scaler = sklearn_model
+    engine = ScoringEngine.from_sklearn(model, scaler)
+    X = realistic_inputs(scaler, engine.feature_names, 64, seed=2)
+    rng = np.random.default_rng(3)
+    X[rng.random(X.shape) < 0.3] = np.nan
+    X[0, :] = np.nan
+    expected = sklearn_proba(model, scaler, X, engine.feature_names)
+    np.testing.assert_allclose(engine.predict_proba(X), expected, rtol=0, atol=SKLEARN_TOLERANCE)
+
+
+def test_all_missing_row_scores_at_training_mean(sklearn_model):
+    model, scaler = sklearn_model
+    engine = ScoringEngine.from_sklearn(model, scaler)
+    # 모든 피처가 결측이면 스케일링 후 입력이 0 벡터이므로 절편만으로 정해짐
+    row = np.full(len(engine.feature_names), np.nan)
+    expected = 1.0 / (1.0 + np.exp(-model.intercept_[0]))
+    assert abs(float(engine.predict_proba(row)) - expected) <= SKLEARN_TOLERANCE
+
+
+def test_verify_against_sklearn_passes_for_shipped_model(sklearn_model):
+    model, scaler = sklearn_model
+    assert ScoringEngine.from_sklearn(model, scaler).verify_against_sklearn(model, scaler) <= SKLEARN_TOLERANCE